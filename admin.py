@@ -1,7 +1,13 @@
 import streamlit as st
 import pandas as pd
 import os
-from datetime import datetime
+from utils_audit import get_audit_store, get_audit_writer
+from utils_schema import to_editable_frame
+from utils_profiling import get_profiler
+from utils_storage import (
+    get_case_store, editor_changes_to_records,
+    get_generation, bump_generation, DATA_GENERATION, LOG_GENERATION
+)
 
 # --- Konfigurasi Halaman ---
 st.set_page_config(
@@ -203,7 +209,10 @@ st.markdown("""
 
 # --- Path ke File ---
 DATA_FILE_PATH = "data_dbd.csv"
-LOG_FILE_PATH = "admin_log.csv" 
+DATA_DB_PATH = "data_dbd.db"  # Penyimpanan utama; CSV hanya sebagai seed
+LOG_FILE_PATH = "admin_log.csv"  # Log lama; di-import sekali ke LOG_DB_PATH
+LOG_DB_PATH = "admin_log.db"
+LOG_PAGE_SIZE = 50
 
 # --- Definisi Pengguna (Admin) ---
 KODE_KABUPATEN_KOTA = [
@@ -230,45 +239,80 @@ for code in KODE_KABUPATEN_KOTA:
 
 # --- Fungsi Helper untuk LOG ---
 
-def init_log_file(filepath):
-    """Membuat file log jika belum ada."""
-    if not os.path.exists(filepath):
-        try:
-            log_df = pd.DataFrame(columns=["timestamp", "username", "action", "details"])
-            log_df.to_csv(filepath, index=False)
-        except Exception as e:
-            st.error(f"Gagal membuat file log: {e}")
+def get_log_store():
+    """AuditLogStore bersama; log CSV lama (LOG_FILE_PATH) di-import sekali ke database log."""
+    return get_audit_store(LOG_DB_PATH, seed_csv_path=LOG_FILE_PATH)
 
-def write_log(username, action, details):
-    """Menulis satu baris log ke file CSV."""
-    try:
-        new_log_entry = pd.DataFrame({
-            "timestamp": [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-            "username": [username],
-            "action": [action],
-            "details": [details]
-        })
-        new_log_entry.to_csv(LOG_FILE_PATH, mode='a', header=False, index=False)
-    except Exception as e:
-        print(f"Error writing log: {e}") 
+def get_log_writer():
+    """AuditLogWriter bersama untuk semua session (setiap flush menaikkan generasi log)."""
+    return get_audit_writer(
+        LOG_DB_PATH,
+        on_flush=lambda count: bump_generation(LOG_GENERATION),
+        store=get_log_store()
+    )
 
-@st.cache_data
-def load_logs(filepath):
-    """Memuat semua log dari file CSV."""
-    if not os.path.exists(filepath):
-        return pd.DataFrame(columns=["timestamp", "username", "action", "details"])
+def write_log(username, action, details):
+    """Memasukkan satu baris log ke antrean (ditulis batch oleh background thread)."""
+    get_log_writer().write(username, action, details)
+
+def write_logs(entries):
+    """Memasukkan banyak baris log (username, action, details) sekaligus."""
+    get_log_writer().write_many(entries)
+
+@st.cache_data(max_entries=16)
+def load_log_page(actions=None, username=None, page=1, page_size=LOG_PAGE_SIZE, log_generation=0):
+    """
+    Memuat satu halaman log (terbaru dulu) dan total baris yang cocok dengan filter.
+    `log_generation` hanya dipakai sebagai kunci cache (naik setiap flush log).
+    """
     try:
-        return pd.read_csv(filepath)
+        store = get_log_store()
+        total = store.count(actions=actions, username=username)
+        log_df = store.query(actions=actions, username=username, limit=page_size, offset=(page - 1) * page_size)
+        return log_df, total
     except Exception as e:
         st.error(f"Gagal memuat log: {e}")
-        return pd.DataFrame(columns=["timestamp", "username", "action", "details"])
+        return pd.DataFrame(columns=["timestamp", "username", "action", "details"]), 0
+
+@st.cache_data(max_entries=4)
+def load_log_usernames(log_generation=0):
+    """Daftar username yang pernah tercatat di log (untuk filter)."""
+    return get_log_store().usernames()
+
+def render_log_page(actions, username, key, empty_message):
+    """Menampilkan satu tabel log dengan pagination (hanya halaman aktif yang di-query)."""
+    page_key = f"{key}_page"
+    log_generation = get_generation(LOG_GENERATION)
+    page = st.session_state.get(page_key, 1)
+    log_df, total = load_log_page(actions, username, page, LOG_PAGE_SIZE, log_generation)
+    
+    total_pages = max(1, -(-total // LOG_PAGE_SIZE))
+    if page > total_pages:
+        # Filter berubah dan halaman aktif tidak ada lagi: kembali ke halaman terakhir
+        page = total_pages
+        st.session_state[page_key] = page
+        log_df, total = load_log_page(actions, username, page, LOG_PAGE_SIZE, log_generation)
+    
+    if total == 0:
+        st.info(empty_message)
+        return
+    
+    st.dataframe(
+        log_df,
+        use_container_width=True,
+        height=300
+    )
+    st.number_input(
+        f"Halaman (dari {total_pages}, total {total:,} log)",
+        min_value=1, max_value=total_pages, step=1, key=page_key
+    )
 
 # --- Fungsi Helper untuk DATA ---
 
-@st.cache_data
-def load_data(filepath):
-    """Memuat data dari CSV."""
-    if not os.path.exists(filepath):
+@st.cache_data(max_entries=4)
+def load_data(filepath, data_generation=0):
+    """Memuat data (CSV sebagai seed database; data_generation = kunci cache)."""
+    if not os.path.exists(filepath) and not os.path.exists(DATA_DB_PATH):
         st.error(f"File data {filepath} tidak ditemukan!")
         st.info("Pastikan Anda sudah membuat file `data_dbd.csv` di folder yang sama.")
         return pd.DataFrame(columns=[
@@ -277,33 +321,47 @@ def load_data(filepath):
         ])
     
     try:
-        df = pd.read_csv(filepath)
-        if 'kode_kabupaten_kota' in df.columns:
-            df['kode_kabupaten_kota'] = df['kode_kabupaten_kota'].astype(str)
-        return df
+        store = get_case_store(DATA_DB_PATH)
+        store.sync_from_csv(filepath)
+        return store.load_frame()
     except Exception as e:
         st.error(f"Gagal memuat data: {e}")
         return pd.DataFrame()
 
-def save_data(df, filepath):
-    """Menyimpan DataFrame kembali ke CSV."""
+def save_changes(upserts, deleted_ids):
+    """Menyimpan hanya baris yang berubah ke database (UPSERT/DELETE per baris)."""
     try:
-        if "pilih_hapus" in df.columns:
-            df_to_save = df.drop(columns=["pilih_hapus"])
-        else:
-            df_to_save = df
-            
-        df_to_save.to_csv(filepath, index=False)
+        get_case_store(DATA_DB_PATH).apply_changes(upserts, deleted_ids)
+        bump_generation(DATA_GENERATION)
         return True
     except Exception as e:
         st.error(f"Gagal menyimpan data: {e}")
         return False
 
+def reimport_data(filepath):
+    """Import ulang seluruh data dari CSV (menimpa semua perubahan di database)."""
+    try:
+        get_case_store(DATA_DB_PATH).sync_from_csv(filepath, force=True)
+        bump_generation(DATA_GENERATION)
+        return True
+    except Exception as e:
+        st.error(f"Gagal import ulang data: {e}")
+        return False
+
+def render_profiling_panel():
+    """Panel p50/p95 per span dari rerun semua.py / dashboard.py (sink JSONL)."""
+    profiler = get_profiler()
+    with st.expander("⏱️ Profiling Rerun (p50/p95 per span)"):
+        if not profiler.enabled:
+            st.info("Profiling dimatikan (DBD_PROFILING=0).")
+            return
+        st.markdown(f"**Semua session** (`{profiler.sink_path}`)")
+        st.dataframe(profiler.summary(), use_container_width=True)
+
 def check_login(username, password):
     """Memeriksa kredensial pengguna dan mencatat log jika berhasil."""
     user = ADMIN_USERS.get(username)
     if user and user["password"] == password:
-        init_log_file(LOG_FILE_PATH)
         write_log(username, "LOGIN", f"Admin '{username}' berhasil login.")
         return True, user["role"], user["region_code"]
     return False, None, None
@@ -336,15 +394,12 @@ if not st.session_state.logged_in:
                 st.session_state.role = role
                 st.session_state.username = username
                 st.session_state.region_code = region_code
-                st.cache_data.clear() 
                 st.rerun()
             else:
                 st.error("Username atau Password salah!")
 else:
     # --- Halaman Aplikasi Utama (Setelah Login) ---
     
-    init_log_file(LOG_FILE_PATH)
-
     # Sidebar (Kini menggunakan style dari CSS)
     with st.sidebar:
         # Menggunakan style header sidebar dari dashboard
@@ -368,7 +423,6 @@ else:
             st.session_state.role = None
             st.session_state.username = None
             st.session_state.region_code = None
-            st.cache_data.clear()
             st.rerun()
 
     # Konten Utama (Kini menggunakan style dari CSS)
@@ -377,7 +431,7 @@ else:
     st.markdown('<h1 class="main-header">📊 Dashboard Admin Kasus DBD Jawa Barat</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">Manajemen Data Kasus Demam Berdarah Dengue</p>', unsafe_allow_html=True)
 
-    df_full = load_data(DATA_FILE_PATH)
+    df_full = load_data(DATA_FILE_PATH, get_generation(DATA_GENERATION))
     
     if df_full.empty:
         st.warning("Data kosong atau gagal dimuat. Cek file `data_dbd.csv`.")
@@ -388,12 +442,12 @@ else:
             df_display = df_full.copy()
         else: # role == "daerah"
             region_code = st.session_state.region_code
-            nama_daerah_series = df_full[df_full['kode_kabupaten_kota'] == region_code]['nama_kabupaten_kota']
+            nama_daerah_series = df_full[df_full['kode_kabupaten_kota'] == int(region_code)]['nama_kabupaten_kota']
             nama_daerah = nama_daerah_series.iloc[0] if not nama_daerah_series.empty else f"Kode {region_code}"
             
             st.header(f"Data untuk Wilayah: {nama_daerah}") # Menggunakan st.header
             
-            df_display = df_full[df_full['kode_kabupaten_kota'] == region_code].copy()
+            df_display = df_full[df_full['kode_kabupaten_kota'] == int(region_code)].copy()
             
             if df_display.empty:
                 st.warning("Belum ada data untuk wilayah Anda.")
@@ -401,6 +455,9 @@ else:
         # --- Fitur CRUD ---
         st.header("Kelola Data (CRUD)")
 
+        # Kolom categorical -> string agar nilai baru bisa diketik di editor
+        df_display = to_editable_frame(df_display)
+
         if not df_display.empty:
             df_display.insert(0, "pilih_hapus", False)
 
@@ -409,6 +466,8 @@ else:
                 "Pilih Hapus", 
                 help="Centang untuk menghapus baris. Klik 'Hapus Baris Terpilih' di bawah."
             ),
+            # id adalah primary key database; baris baru mendapat id otomatis
+            "id": st.column_config.NumberColumn(disabled=True),
         }
 
         if st.session_state.role == "daerah":
@@ -441,37 +500,44 @@ else:
             if st.button("💾 Simpan Perubahan (Edit/Tambah)", use_container_width=True, type="primary"):
                 username = st.session_state.username
                 
-                edited_changes = st.session_state.data_editor.get("edited_rows", {})
-                added_changes = st.session_state.data_editor.get("added_rows", [])
+                editor_state = st.session_state.data_editor
+                edited_changes = editor_state.get("edited_rows", {})
+                added_changes = editor_state.get("added_rows", [])
 
                 try:
+                    log_entries = []
                     for row_index, changes in edited_changes.items():
                         original_row = df_display.iloc[row_index]
                         details = f"Memperbarui baris (id: {original_row.get('id', 'N/A')}, wilayah: {original_row.get('nama_kabupaten_kota', 'N/A')}). Perubahan: {changes}"
-                        write_log(username, "UPDATE", details)
+                        log_entries.append((username, "UPDATE", details))
 
                     for new_row in added_changes:
                         nama_wilayah = new_row.get('nama_kabupaten_kota', 'N/A')
                         if nama_wilayah == 'N/A' and st.session_state.role == 'daerah':
                             code = st.session_state.region_code
-                            nama_daerah_list = df_full[df_full['kode_kabupaten_kota'] == code]['nama_kabupaten_kota'].unique()
+                            nama_daerah_list = df_full[df_full['kode_kabupaten_kota'] == int(code)]['nama_kabupaten_kota'].unique()
                             if len(nama_daerah_list) > 0:
                                 nama_wilayah = nama_daerah_list[0]
                         
                         log_data = new_row.copy()
                         log_data['nama_kabupaten_kota'] = nama_wilayah
                         details = f"Membuat baris baru (wilayah: {nama_wilayah}). Data: {log_data}"
-                        write_log(username, "CREATE", details)
-
-                    if st.session_state.role == "master":
-                        final_df_to_save = edited_df
-                    else:
-                        other_regions_data = df_full[df_full['kode_kabupaten_kota'] != st.session_state.region_code]
-                        final_df_to_save = pd.concat([other_regions_data, edited_df], ignore_index=True)
-
-                    save_data(final_df_to_save, DATA_FILE_PATH)
+                        log_entries.append((username, "CREATE", details))
+                    write_logs(log_entries)
+
+                    # Kolom wilayah nonaktif untuk admin daerah -> isi dari data wilayahnya
+                    region_defaults = {}
+                    if st.session_state.role == "daerah" and not df_display.empty:
+                        region_row = df_display.iloc[0]
+                        region_defaults = {
+                            col: region_row[col]
+                            for col in ['kode_kabupaten_kota', 'nama_kabupaten_kota',
+                                        'kode_provinsi', 'nama_provinsi', 'satuan']
+                        }
+
+                    upserts, deleted_ids = editor_changes_to_records(df_display, editor_state, region_defaults)
+                    save_changes(upserts, deleted_ids)
                     st.success("Perubahan berhasil disimpan!")
-                    st.cache_data.clear() 
                     st.rerun()
 
                 except Exception as e:
@@ -487,19 +553,13 @@ else:
                 else:
                     try:
                         rows_to_delete = edited_df[edited_df["pilih_hapus"] == True]
-                        for index, row_data in rows_to_delete.iterrows():
-                            details = f"Menghapus baris (id: {row_data.get('id', 'N/A')}, wilayah: {row_data.get('nama_kabupaten_kota', 'N/A')}, tahun: {row_data.get('tahun', 'N/A')})"
-                            write_log(username, "DELETE", details)
+                        write_logs(
+                            (username, "DELETE", f"Menghapus baris (id: {row_data.get('id', 'N/A')}, wilayah: {row_data.get('nama_kabupaten_kota', 'N/A')}, tahun: {row_data.get('tahun', 'N/A')})")
+                            for row_data in rows_to_delete.to_dict('records')
+                        )
                         
-                        if st.session_state.role == "master":
-                            final_df_to_save = rows_to_keep
-                        else:
-                            other_regions_data = df_full[df_full['kode_kabupaten_kota'] != st.session_state.region_code]
-                            final_df_to_save = pd.concat([other_regions_data, rows_to_keep], ignore_index=True)
-                        
-                        save_data(final_df_to_save, DATA_FILE_PATH)
+                        save_changes([], rows_to_delete['id'].tolist())
                         st.success("Baris yang dipilih berhasil dihapus!")
-                        st.cache_data.clear() 
                         st.rerun()
 
                     except Exception as e:
@@ -508,23 +568,37 @@ else:
     # --- Tampilan Log (Hanya Master Admin) ---
     if st.session_state.role == "master":
         st.markdown("---")
+        with st.expander("📥 Import Ulang Data dari CSV"):
+            # Database adalah sumber data; CSV hanya seed awal dan tidak
+            # pernah di-import ulang otomatis
+            st.warning(
+                f"Seluruh isi database akan diganti dengan isi `{DATA_FILE_PATH}`. "
+                "Semua perubahan (edit/tambah/hapus) yang tidak ada di CSV akan hilang."
+            )
+            confirm_reimport = st.checkbox("Saya mengerti, timpa database dengan isi CSV", key="confirm_reimport")
+            if st.button("📥 Import Ulang", disabled=not confirm_reimport, key="reimport_csv"):
+                if reimport_data(DATA_FILE_PATH):
+                    write_log(st.session_state.username, "REIMPORT", f"Database di-import ulang dari {DATA_FILE_PATH}.")
+                    st.success("Data berhasil di-import ulang dari CSV.")
+                    st.rerun()
+        
         st.header("📜 Log Aktivitas Admin") # Menggunakan st.header
         
         if st.button("🔄 Muat Ulang Log"):
-            st.cache_data.clear()
+            bump_generation(LOG_GENERATION)
             st.rerun()
-            
-        log_df = load_logs(LOG_FILE_PATH)
         
-        if log_df.empty:
-            st.info("Belum ada aktivitas yang tercatat.")
-        else:
-            # st.dataframe otomatis ter-styling
-            st.dataframe(
-                log_df.sort_values(by="timestamp", ascending=False),
-                use_container_width=True,
-                height=300
-            )
+        get_log_writer().flush()
+        
+        user_options = ["Semua"] + load_log_usernames(get_generation(LOG_GENERATION))
+        selected_user = st.selectbox("Filter Username", user_options, key="log_username")
+        render_log_page(
+            None, None if selected_user == "Semua" else selected_user, "log_all",
+            "Belum ada aktivitas yang tercatat."
+        )
+        
+        st.subheader("Profiling Rerun")
+        render_profiling_panel()
             
     # Footer kustom (Sesuai Dashboard)
     st.markdown("---")
@@ -0,0 +1,368 @@
+"""
+Benchmark Pipeline Dashboard DBD
+load -> validasi/cleaning -> agregasi -> render, di atas data sintetis
+1.000 s/d 10.000.000 baris yang di-scale dari data_dbd.csv
+
+Contoh:
+    python benchmark_dashboard.py
+    python benchmark_dashboard.py --sizes 1000 100000 1000000 --repeat 5
+    python benchmark_dashboard.py --compare benchmark_results/baseline.json
+"""
+
+import os
+import sys
+import json
+import inspect
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from utils_parsing import DBDDataParser, calculate_growth_rate, ingest_csv_chunks
+from utils_storage import parse_case_csv
+from utils_schema import apply_case_schema
+from utils_sql import DBDSQLEngine
+from utils_visualization import DBDVisualizer
+from utils_ai_integration import GeminiDBDAnalyzer, GeminiResponseCache
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_REPEAT = 3
+RESULTS_DIR = "benchmark_results"
+
+# Jumlah kab/kota Indonesia (batas atas salinan wilayah data sintetis)
+MAX_REGIONS = 514
+
+
+def generate_synthetic_data(n_rows: int, base_path: str = "data_dbd.csv", seed: int = 42) -> pd.DataFrame:
+    """
+    Scale data_dbd.csv ke n_rows baris.
+
+    Wilayah asli disalin menjadi beberapa "provinsi" sintetis (maksimal
+    MAX_REGIONS kab/kota), tahun diambil dari rentang data asli, dan kolom
+    `minggu` (1-52) ditambahkan sebagai periode; jumlah kasus diambil dari
+    distribusi Poisson di sekitar rata-rata mingguan wilayah aslinya.
+
+    Args:
+        n_rows: Jumlah baris yang diinginkan
+        base_path: CSV dasar
+        seed: Seed random (hasil reproducible)
+
+    Returns:
+        DataFrame dengan kolom seperti data_dbd.csv + minggu
+    """
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(base_path)
+    regions = base.drop_duplicates('kode_kabupaten_kota')[
+        ['kode_provinsi', 'nama_provinsi', 'kode_kabupaten_kota', 'nama_kabupaten_kota']
+    ].reset_index(drop=True)
+    weekly_mean = (base.groupby('kode_kabupaten_kota')['jumlah_kasus'].mean() / 52).clip(lower=1)
+    years = np.sort(base['tahun'].unique())
+
+    copies = int(np.clip(n_rows // (len(regions) * len(years) * 52) + 1, 1, MAX_REGIONS // len(regions)))
+    region_idx = rng.integers(0, len(regions), n_rows)
+    copy_idx = rng.integers(0, copies, n_rows)
+    base_rows = regions.iloc[region_idx].reset_index(drop=True)
+    suffix = np.char.mod(' %02d', copy_idx)
+
+    return pd.DataFrame({
+        'id': np.arange(1, n_rows + 1),
+        'kode_provinsi': base_rows['kode_provinsi'].to_numpy() + copy_idx,
+        'nama_provinsi': (base_rows['nama_provinsi'].to_numpy().astype(str) + suffix).astype(object),
+        'kode_kabupaten_kota': base_rows['kode_kabupaten_kota'].to_numpy() + copy_idx * 100,
+        'nama_kabupaten_kota': (base_rows['nama_kabupaten_kota'].to_numpy().astype(str) + suffix).astype(object),
+        'jumlah_kasus': rng.poisson(weekly_mean.loc[base_rows['kode_kabupaten_kota']].to_numpy()),
+        'satuan': np.full(n_rows, 'ORANG', dtype=object),
+        'tahun': rng.choice(years, n_rows),
+        'minggu': rng.integers(1, 53, n_rows),
+    })
+
+
+class BenchmarkContext:
+    """
+    Data bersama untuk satu ukuran benchmark
+
+    Attributes:
+        rows: Jumlah baris
+        raw: DataFrame sintetis (string object, seperti read_csv biasa)
+        df: DataFrame dengan skema ringkas (input langkah agregasi/render)
+        csv_path: Lokasi CSV sintetis di folder sementara
+    """
+
+    def __init__(self, rows: int, work_dir: str, seed: int = 42):
+        self.rows = rows
+        self.raw = generate_synthetic_data(rows, seed=seed)
+        self.df = apply_case_schema(self.raw)
+        self.csv_path = os.path.join(work_dir, f"synthetic_{rows}.csv")
+        self.raw.to_csv(self.csv_path, index=False)
+        self.years = sorted(self.df['tahun'].unique().tolist())
+        self.province = str(self.df['nama_provinsi'].iloc[0])
+
+
+# Registry benchmark: nama -> fungsi(ctx)
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext], object]] = {}
+
+
+def benchmark(name: str):
+    """Decorator untuk mendaftarkan fungsi benchmark"""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _load_data_fn():
+    # dashboard.load_data dibungkus span profiler + st.cache_data; yang diukur fungsi aslinya
+    import dashboard
+    return inspect.unwrap(dashboard.load_data)
+
+
+@benchmark("load.parse_case_csv")
+def bench_parse_csv(ctx):
+    return parse_case_csv(ctx.csv_path)
+
+
+@benchmark("load.dashboard_load_data")
+def bench_load_data(ctx):
+    return _load_data_fn()(ctx.csv_path)
+
+
+@benchmark("load.ingest_csv_chunks")
+def bench_ingest(ctx):
+    return ingest_csv_chunks(ctx.csv_path)
+
+
+def _parser(ctx) -> DBDDataParser:
+    parser = DBDDataParser(ctx.csv_path)
+    parser.df = ctx.raw.copy()
+    return parser
+
+
+@benchmark("parser.validate_and_clean")
+def bench_validate_engine(ctx):
+    return _parser(ctx).validate_and_clean()
+
+
+@benchmark("parser.validate_legacy")
+def bench_validate_legacy(ctx):
+    parser = _parser(ctx)
+    parser.validate_structure()
+    parser.validate_data_types()
+    parser.validate_business_rules()
+    return parser.clean_data()
+
+
+@benchmark("aggregate.aggregate_by_province_year")
+def bench_aggregate(ctx):
+    parser = DBDDataParser(ctx.csv_path)
+    parser.df = ctx.df
+    return parser.aggregate_by_province_year()
+
+
+@benchmark("aggregate.calculate_growth_rate")
+def bench_growth(ctx):
+    return calculate_growth_rate(ctx.df, ['nama_provinsi', 'nama_kabupaten_kota'])
+
+
+@benchmark("backend.arrow.aggregate_by_province_year")
+def bench_aggregate_arrow(ctx):
+    parser = DBDDataParser(ctx.csv_path)
+    parser.df = ctx.df
+    return parser.aggregate_by_province_year(backend='arrow')
+
+
+@benchmark("backend.arrow.calculate_growth_rate")
+def bench_growth_arrow(ctx):
+    return calculate_growth_rate(ctx.df, ['nama_provinsi', 'nama_kabupaten_kota'], backend='arrow')
+
+
+@benchmark("sql.yearly_totals")
+def bench_sql_yearly(ctx):
+    return DBDSQLEngine(ctx.csv_path).query('yearly_totals')
+
+
+@benchmark("sql.heatmap")
+def bench_sql_heatmap(ctx):
+    return DBDSQLEngine(ctx.csv_path).query('heatmap', n=15)
+
+
+@benchmark("ai.prepare_data_summary")
+def bench_summary(ctx):
+    analyzer = GeminiDBDAnalyzer(
+        api_key='benchmark', client=SimpleNamespace(),
+        cache=GeminiResponseCache(cache_dir=os.path.join(os.path.dirname(ctx.csv_path), 'gemini'))
+    )
+    return analyzer.prepare_data_summary(ctx.df)
+
+
+# Argumen per method DBDVisualizer.create_* (method baru otomatis ikut
+# di-benchmark; tambahkan argumennya di sini jika wajib)
+VISUALIZER_ARGS: Dict[str, Callable[[BenchmarkContext], dict]] = {
+    'create_comparison_chart': lambda ctx: {'years': ctx.years[-3:]},
+    'create_dashboard_summary': lambda ctx: {'year': ctx.years[-1]},
+}
+
+
+def _register_visualizer_benchmarks():
+    for method_name in sorted(dir(DBDVisualizer)):
+        if not method_name.startswith('create_'):
+            continue
+
+        def run(ctx, method_name=method_name):
+            kwargs = VISUALIZER_ARGS.get(method_name, lambda _: {})(ctx)
+            fig = getattr(DBDVisualizer(ctx.df), method_name)(**kwargs)
+            if isinstance(fig, plt.Figure):
+                plt.close(fig)
+            return fig
+
+        BENCHMARKS[f"render.{method_name}"] = run
+
+
+_register_visualizer_benchmarks()
+
+
+def time_call(fn: Callable, ctx: BenchmarkContext, repeat: int) -> Dict[str, float]:
+    """
+    Jalankan fn(ctx) beberapa kali (setelah satu warmup)
+
+    Returns:
+        Dict best_s, mean_s, median_s
+    """
+    fn(ctx)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(ctx)
+        timings.append(time.perf_counter() - start)
+    return {
+        'best_s': min(timings),
+        'mean_s': float(np.mean(timings)),
+        'median_s': float(np.median(timings)),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(
+    sizes: List[int],
+    repeat: int = DEFAULT_REPEAT,
+    only: Optional[List[str]] = None,
+    seed: int = 42
+) -> Dict:
+    """
+    Jalankan semua benchmark untuk setiap ukuran data
+
+    Args:
+        sizes: Daftar jumlah baris
+        repeat: Jumlah pengulangan per benchmark
+        only: Prefix nama benchmark yang dijalankan (None = semua)
+        seed: Seed data sintetis
+
+    Returns:
+        Dict {meta, results}; results = list {name, rows, best_s, mean_s, median_s, repeat}
+    """
+    names = [name for name in BENCHMARKS if not only or any(name.startswith(prefix) for prefix in only)]
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="dbd_bench_")
+    try:
+        for rows in sizes:
+            ctx = BenchmarkContext(rows, work_dir, seed=seed)
+            for name in names:
+                timing = time_call(BENCHMARKS[name], ctx, repeat)
+                results.append({'name': name, 'rows': rows, 'repeat': repeat, **timing})
+                print(f"{name:<45} {rows:>10,} rows  {timing['best_s'] * 1000:>10.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    meta = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': seed,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = 1.25) -> List[str]:
+    """
+    Bandingkan hasil dengan baseline (best_s per name + rows)
+
+    Args:
+        current: Hasil run_benchmarks
+        baseline: Hasil run sebelumnya (dari file JSON)
+        threshold: Rasio current/baseline yang dianggap regresi
+
+    Returns:
+        List pesan regresi (kosong jika tidak ada)
+    """
+    previous = {(r['name'], r['rows']): r['best_s'] for r in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['name'], result['rows']))
+        if before and result['best_s'] > before * threshold:
+            regressions.append(
+                f"{result['name']} @ {result['rows']:,} rows: "
+                f"{before * 1000:.2f} ms -> {result['best_s'] * 1000:.2f} ms "
+                f"({result['best_s'] / before:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline dashboard DBD")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Jumlah baris data sintetis (mis. 1000 10000 ... 10000000)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--only', nargs='+', help="Prefix nama benchmark (mis. load render.create_heatmap)")
+    parser.add_argument('--output', help=f"File JSON hasil (default: {RESULTS_DIR}/<timestamp>.json)")
+    parser.add_argument('--compare', help="File JSON baseline untuk deteksi regresi")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Rasio waktu terhadap baseline yang dianggap regresi")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_benchmarks(args.sizes, repeat=args.repeat, only=args.only)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nHasil disimpan ke {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare_results(report, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegresi terdeteksi:")
+            for message in regressions:
+                print(f"  - {message}")
+            return 1
+        print("\nTidak ada regresi terhadap baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
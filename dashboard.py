@@ -12,9 +12,22 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import google.generativeai as genai
 import os
+import uuid
 from dotenv import load_dotenv
 import io
 import base64
+from utils_parsing import INGEST_CHUNK_ROWS, calculate_region_growth, ingest_csv_chunks
+from utils_ai_integration import cached_generate, cached_generate_stream, iter_response_text
+from utils_aggregate import DBDAggregateCube, as_cube
+from utils_schema import apply_case_schema
+from utils_profiling import get_profiler, span, timed
+from utils_visualization import DBDVisualizer, build_trend_figure
+from utils_export import get_exporter
+from utils_report import MIME_TYPES, ReportBundle, frame_formats, serialize_frame
+from utils_figure_cache import cached_figure
+from utils_filter import get_filter_engine
+from utils_sql import get_sql_engine
+from utils_storage import file_signature, load_table
 
 # Load environment variables
 load_dotenv()
@@ -415,11 +428,13 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Fungsi untuk load data
+@timed("load_data")
 @st.cache_data
 def load_data(file_path):
     """Load data dari file CSV"""
     try:
-        df = pd.read_csv(file_path)
+        # File lokal: pakai snapshot kolumnar selama CSV tidak berubah
+        df = load_table(file_path)
         # Validasi kolom yang diperlukan
         required_columns = ['kode_provinsi', 'nama_provinsi', 'kode_kabupaten_kota', 
                           'nama_kabupaten_kota', 'jumlah_kasus', 'satuan', 'tahun']
@@ -428,16 +443,29 @@ def load_data(file_path):
             st.error(f"File CSV harus memiliki kolom: {', '.join(required_columns)}")
             return None
         
-        # Konversi tipe data
-        df['jumlah_kasus'] = pd.to_numeric(df['jumlah_kasus'], errors='coerce')
-        df['tahun'] = pd.to_numeric(df['tahun'], errors='coerce')
-        
-        return df
+        # Konversi tipe data (categorical + integer ringkas, lihat utils_schema)
+        return apply_case_schema(df)
     except Exception as e:
         st.error(f"Error saat membaca file: {str(e)}")
         return None
 
+@timed("load_uploaded_data")
+@st.cache_data(max_entries=4)
+def load_uploaded_data(_uploaded_file, file_id):
+    """
+    Load file upload per potongan (validasi + konversi tipe per chunk) agar
+    file besar tidak dibaca utuh ke memori. `file_id` = kunci cache, sehingga
+    isi file tidak perlu di-hash ulang setiap rerun.
+    """
+    try:
+        _uploaded_file.seek(0)
+        return ingest_csv_chunks(_uploaded_file, chunksize=INGEST_CHUNK_ROWS)
+    except Exception as e:
+        st.error(f"Error saat membaca file: {str(e)}")
+        return None, []
+
 # Fungsi untuk analisis data
+@timed("analyze_data")
 def analyze_data(df):
     """Analisis statistik dasar dari data"""
     analysis = {
@@ -450,12 +478,15 @@ def analyze_data(df):
     return analysis
 
 # Fungsi untuk mendapatkan insight dari Gemini AI dengan 4 Analytics
-def get_ai_insights(df, api_key):
-    """Generate AI insights menggunakan Google Gemini dengan 4 jenis analytics"""
+@timed("ai.get_ai_insights")
+def get_ai_insights(df, api_key, stream=False, model=None, growth=None):
+    """
+    Generate AI insights menggunakan Google Gemini dengan 4 jenis analytics.
+    stream=True mengembalikan generator potongan teks; `model` bisa diisi model palsu untuk test.
+    `growth` = Series provinsi -> growth_pct yang sudah dihitung (mis. query SQL 'growth').
+    """
     try:
-        # Configure Gemini API
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model_name = 'gemini-2.5-flash'
         
         # Analisis data yang lebih mendalam
         tahun_list = sorted(df['tahun'].unique())
@@ -470,20 +501,17 @@ def get_ai_insights(df, api_key):
             growth_rate = 0
         
         # Provincial analysis
-        provinsi_stats = df.groupby('nama_provinsi')['jumlah_kasus'].agg(['sum', 'mean', 'std']).round(2)
+        provinsi_stats = df.groupby('nama_provinsi', observed=True)['jumlah_kasus'].agg(['sum', 'mean', 'std']).round(2)
         top_5_provinsi = provinsi_stats.nlargest(5, 'sum')['sum'].to_dict()
         
         # Kabupaten/Kota analysis
-        kabkot_stats = df.groupby(['nama_provinsi', 'nama_kabupaten_kota'])['jumlah_kasus'].sum()
+        kabkot_stats = df.groupby(['nama_provinsi', 'nama_kabupaten_kota'], observed=True)['jumlah_kasus'].sum()
         top_5_kabkot = kabkot_stats.nlargest(5).to_dict()
         
-        # Year-over-year growth by province
-        provinsi_growth = {}
-        for prov in df['nama_provinsi'].unique():
-            prov_data = df[df['nama_provinsi'] == prov].groupby('tahun')['jumlah_kasus'].sum()
-            if len(prov_data) > 1:
-                growth = ((prov_data.iloc[-1] - prov_data.iloc[0]) / prov_data.iloc[0] * 100) if prov_data.iloc[0] > 0 else 0
-                provinsi_growth[prov] = round(growth, 2)
+        # Growth tahun pertama -> terakhir per provinsi (satu groupby untuk semua provinsi)
+        if growth is None:
+            growth = calculate_region_growth(df, 'nama_provinsi')['growth_pct']
+        provinsi_growth = growth.round(2).to_dict()
         
         # Variability analysis
         std_dev_nasional = df.groupby('tahun')['jumlah_kasus'].sum().std()
@@ -668,30 +696,41 @@ PENTING:
 - Gunakan Bahasa Indonesia yang JELAS dan PROFESIONAL
 """
         
-        response = model.generate_content(prompt)
-        return response.text
+        def get_model():
+            # Hanya dipanggil jika (model, prompt) belum ada di cache respons
+            if model is not None:
+                return model
+            genai.configure(api_key=api_key)
+            return genai.GenerativeModel(model_name)
+        
+        if stream:
+            return cached_generate_stream(
+                model_name,
+                prompt,
+                lambda text: iter_response_text(get_model().generate_content(text, stream=True))
+            )
+        return cached_generate(model_name, prompt, lambda text: get_model().generate_content(text).text)
     
     except Exception as e:
-        return f"Error saat menghasilkan AI insights: {str(e)}\n\nPastikan API Key Gemini sudah diset dengan benar."
+        message = f"Error saat menghasilkan AI insights: {str(e)}\n\nPastikan API Key Gemini sudah diset dengan benar."
+        return iter([message]) if stream else message
 
 # Fungsi untuk membuat grafik trend
-def create_trend_chart(df, selected_provinces=None):
-    """Membuat grafik trend kasus DBD per tahun"""
-    if selected_provinces:
-        df_filtered = df[df['nama_provinsi'].isin(selected_provinces)]
-    else:
-        df_filtered = df
-    
-    trend_data = df_filtered.groupby(['tahun', 'nama_provinsi'])['jumlah_kasus'].sum().reset_index()
-    
-    fig = px.bar(
+@timed("create_trend_chart")
+@cached_figure("create_trend_chart")
+def create_trend_chart(data, selected_provinces=None):
+    """Membuat grafik trend kasus DBD per tahun (data: DataFrame atau cube agregat)"""
+    cube = as_cube(data).filter('nama_provinsi', selected_provinces)
+    trend_data = cube.region_year('nama_provinsi')
+    
+    fig = build_trend_figure(
         trend_data,
         x='tahun',
         y='jumlah_kasus',
         color='nama_provinsi',
+        kind='bar',
         title='Trend Kasus DBD per Tahun per Provinsi',
         labels={'jumlah_kasus': 'Jumlah Kasus', 'tahun': 'Tahun', 'nama_provinsi': 'Provinsi'},
-        barmode='group',
         height=500
     )
     
@@ -704,23 +743,12 @@ def create_trend_chart(df, selected_provinces=None):
     return fig
 
 # Fungsi untuk membuat heatmap
-def create_heatmap(df, selected_province=None):
-    """Membuat heatmap kasus DBD per kabupaten/kota"""
-    if selected_province:
-        df_filtered = df[df['nama_provinsi'] == selected_province]
-    else:
-        # Ambil top 10 kabupaten/kota dengan kasus tertinggi
-        top_kabkot = df.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(15).index
-        df_filtered = df[df['nama_kabupaten_kota'].isin(top_kabkot)]
-    
-    # Pivot data untuk heatmap
-    heatmap_data = df_filtered.pivot_table(
-        values='jumlah_kasus',
-        index='nama_kabupaten_kota',
-        columns='tahun',
-        aggfunc='sum',
-        fill_value=0
-    )
+@timed("create_heatmap")
+@cached_figure("create_heatmap")
+def create_heatmap(data, selected_province=None):
+    """Membuat heatmap kasus DBD per kabupaten/kota (data: DataFrame atau cube agregat)"""
+    # Satu provinsi, atau top 15 kabupaten/kota dengan kasus tertinggi; dipivot per tahun
+    heatmap_data = as_cube(data).heatmap_matrix(top_n=15, province=selected_province)
     
     fig = px.imshow(
         heatmap_data,
@@ -735,15 +763,169 @@ def create_heatmap(df, selected_province=None):
     
     return fig
 
+# Fungsi untuk grafik trend nasional
+@timed("create_national_trend_chart")
+@cached_figure("create_national_trend_chart")
+def create_national_trend_chart(data):
+    """Membuat grafik trend nasional per tahun (data: DataFrame atau cube agregat)"""
+    cube = as_cube(data)
+    national_trend = cube.by_year().reset_index()
+    fig_national = px.line(
+        national_trend,
+        x='tahun',
+        y='jumlah_kasus',
+        title='Trend Kasus DBD Nasional',
+        labels={'jumlah_kasus': 'Total Kasus', 'tahun': 'Tahun'},
+        markers=True
+    )
+    fig_national.update_traces(line_color='#667eea', line_width=3)
+    
+    return fig_national
+
+# Fungsi untuk pie chart distribusi kasus
+@timed("create_distribution_pie")
+@cached_figure("create_distribution_pie")
+def create_distribution_pie(data):
+    """Membuat pie chart proporsi kasus per provinsi (data: DataFrame atau cube agregat)"""
+    cube = as_cube(data)
+    province_dist = cube.by_region('nama_provinsi').reset_index()
+    fig_pie = px.pie(
+        province_dist,
+        values='jumlah_kasus',
+        names='nama_provinsi',
+        title='Proporsi Kasus DBD per Provinsi'
+    )
+    
+    return fig_pie
+
+# Fungsi untuk cube agregat
+def duckdb_engine(source_path):
+    """
+    Engine SQL untuk file lokal, hanya jika DuckDB aktif (None untuk data
+    upload atau tanpa DuckDB: fallback pandas engine memuat salinan tabel
+    sendiri, jadi agregasi memakai frame yang sudah dimuat session)
+    """
+    if source_path is None:
+        return None
+    engine = get_sql_engine(source_path)
+    return engine if engine.engine == 'duckdb' else None
+
+@timed("build_aggregate_cube")
+@st.cache_data(max_entries=8)
+def build_aggregate_cube(_df, data_key, filter_key=None, source_path=None):
+    """
+    Cube agregat wilayah x tahun per (versi data, filter); `_df` tidak di-hash.
+    Dengan DuckDB file lokal (`source_path`) diagregasi atas mirror Parquet-nya;
+    selain itu (data upload / tanpa DuckDB) diagregasi dari `_df`.
+    """
+    engine = duckdb_engine(source_path)
+    if engine is not None:
+        return engine.cube(cube_filters(filter_key))
+    return DBDAggregateCube(_df)
+
+def cube_filters(filter_key):
+    """Filter engine SQL untuk filter_key dari cube_filter_key; None = tanpa filter"""
+    if filter_key is None:
+        return None
+    selected_years, selected_provinces, selected_kabkot = filter_key
+    return {
+        'tahun': list(selected_years),
+        'nama_provinsi': list(selected_provinces),
+        'nama_kabupaten_kota': None if selected_kabkot is None else list(selected_kabkot)
+    }
+
+def cube_filter_key(selected_years, selected_provinces, selected_kabkot=None):
+    """Kunci cache cube untuk kombinasi filter (tidak bergantung urutan pilihan)"""
+    return (
+        tuple(sorted(selected_years)),
+        tuple(sorted(selected_provinces)),
+        tuple(sorted(selected_kabkot)) if selected_kabkot is not None else None
+    )
+
 # Fungsi untuk export data
+@timed("export_to_csv")
 def export_to_csv(df):
     """Export dataframe ke CSV"""
-    return df.to_csv(index=False).encode('utf-8')
+    return serialize_frame(df, 'csv')
 
+@timed("export_figure_to_png")
 def export_figure_to_png(fig):
-    """Export plotly figure ke PNG"""
-    img_bytes = fig.to_image(format="png", width=1200, height=800)
-    return img_bytes
+    """Export plotly figure ke PNG (renderer Kaleido bersama + cache PNG)"""
+    return get_exporter().render_png(fig)
+
+# Fungsi untuk report bundle (export lazy)
+def build_report_bundle(cube, df_filtered, summary_df, top_table, bundle_key):
+    """
+    Daftarkan artefak tab Export (tabel CSV/Parquet/XLSX, grafik, AI insights)
+    tanpa membuatnya; bytes baru dibuat saat tombol download diklik dan
+    di-cache per `bundle_key` (versi data + filter).
+    """
+    bundle = ReportBundle(bundle_key)
+    bundle.add_frame('data_dbd_filtered', df_filtered)
+    bundle.add_frame('summary_dbd', summary_df)
+    bundle.add_frame('top_provinsi', top_table)
+    bundle.add_figure('trend_chart', lambda: create_trend_chart(cube))
+    bundle.add_figure('heatmap', lambda: create_heatmap(cube))
+    year = int(df_filtered['tahun'].max())
+    bundle.add_figure(
+        f"dashboard_summary_{year}",
+        lambda: DBDVisualizer(df_filtered).create_dashboard_summary(year),
+        formats=('png',)
+    )
+    if 'ai_insights' in st.session_state:
+        bundle.add_text('ai_insights', st.session_state['ai_insights'])
+    return bundle
+
+# Fungsi untuk export batch grafik (ZIP)
+def submit_figures_export(cube, df_filtered, summary_key):
+    """
+    Kirim trend, heatmap, trend total, pie chart, dan dashboard summary ke
+    background worker export; hasilnya Future berisi bytes ZIP.
+    `summary_key` (versi data + filter) menjadi kunci cache PNG dashboard summary.
+    """
+    year = int(df_filtered['tahun'].max())
+    summary_name = f"dashboard_summary_{year}"
+    figures = {
+        'trend_chart': create_trend_chart(cube),
+        'heatmap': create_heatmap(cube),
+        'trend_nasional': create_national_trend_chart(cube),
+        'distribusi_provinsi': create_distribution_pie(cube),
+        summary_name: lambda: DBDVisualizer(df_filtered).create_dashboard_summary(year),
+    }
+    return get_exporter().submit_zip(figures, {summary_name: ('dashboard_summary', summary_key, year)})
+
+@st.fragment(run_every=1)
+def poll_figures_export():
+    """Cek job export ZIP per detik tanpa rerun seluruh halaman; rerun penuh saat selesai."""
+    _, job = st.session_state.get('export_job', (None, None))
+    if job is None or job.done():
+        st.rerun()
+    st.info("⏳ Grafik sedang dirender di background...")
+
+def render_figures_export(cube, df_filtered, summary_key):
+    """Tombol export semua grafik (ZIP) beserta status job background-nya."""
+    if st.button("🗂️ Generate Semua Grafik (ZIP)", use_container_width=True):
+        st.session_state['export_job'] = (summary_key, submit_figures_export(cube, df_filtered, summary_key))
+    
+    # Job milik filter lain (data/filter sudah berubah) diabaikan
+    job_key, job = st.session_state.get('export_job', (None, None))
+    if job is None or job_key != summary_key:
+        return
+    if not job.done():
+        poll_figures_export()
+        return
+    try:
+        zip_bytes = job.result()
+    except Exception as e:
+        st.warning(f"Gagal generate ZIP grafik. (Error: {e})")
+        return
+    st.download_button(
+        label="⬇️ Download Semua Grafik (ZIP)",
+        data=zip_bytes,
+        file_name=f"grafik_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.zip",
+        mime="application/zip",
+        use_container_width=True
+    )
 
 # Main App
 def main():
@@ -776,11 +958,21 @@ def main():
     
     # Load data
     if uploaded_file is not None:
-        df = load_data(uploaded_file)
+        df, ingest_issues = load_uploaded_data(uploaded_file, uploaded_file.file_id)
+        data_key = uploaded_file.file_id
+        source_path = None
         st.sidebar.success("✅ File berhasil diupload")
+        if ingest_issues:
+            with st.sidebar.expander(f"⚠️ {len(ingest_issues)} catatan validasi"):
+                for issue in ingest_issues[:50]:
+                    st.caption(issue)
+                if len(ingest_issues) > 50:
+                    st.caption(f"... dan {len(ingest_issues) - 50} catatan lain")
     else:
         if os.path.exists('data_dbd_sample.csv'):
-            df = load_data('data_dbd_sample.csv')
+            source_path = 'data_dbd_sample.csv'
+            df = load_data(source_path)
+            data_key = file_signature(source_path)
             st.sidebar.info("📊 Menggunakan data sample")
         else:
             st.sidebar.warning("⚠️ Upload file CSV untuk memulai")
@@ -832,18 +1024,22 @@ def main():
                 selected_provinces = provinces
                 st.rerun()
         with col_pr2:
-            top_3_prov = df.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(3).index.tolist()
+            top_3_prov = build_aggregate_cube(df, data_key, source_path=source_path).top_regions(3, 'nama_provinsi').index.tolist()
             if st.sidebar.button("🔥 Top 3", use_container_width=True, key="top_provinces_btn"):
                 selected_provinces = top_3_prov
                 st.rerun()
     
     # Apply filters
-    df_filtered = df[
-        (df['tahun'].isin(selected_years)) &
-        (df['nama_provinsi'].isin(selected_provinces))
-    ]
+    # Posisi baris hasil filter di-memoize per (versi data, seleksi), jadi rerun
+    # tanpa perubahan filter (ganti tab, tombol AI) tidak menghitung mask lagi
+    filter_engine = get_filter_engine()
+    with span("filter"):
+        df_filtered = filter_engine.apply(
+            df, data_key, {'tahun': selected_years, 'nama_provinsi': selected_provinces}
+        )
     
     # Filter Kabupaten/Kota
+    selected_kabkot = None
     if selected_provinces:
         kabkot_options = sorted(df_filtered['nama_kabupaten_kota'].unique())
         st.sidebar.markdown("**🏙️ Kabupaten/Kota**")
@@ -853,7 +1049,11 @@ def main():
             default=kabkot_options,
             label_visibility="collapsed"
         )
-        df_filtered = df_filtered[df_filtered['nama_kabupaten_kota'].isin(selected_kabkot)]
+        with span("filter"):
+            df_filtered = filter_engine.apply(
+                df, data_key,
+                {'tahun': selected_years, 'nama_provinsi': selected_provinces, 'nama_kabupaten_kota': selected_kabkot}
+            )
         
         if len(kabkot_options) > 1:
             col_kb1, col_kb2 = st.sidebar.columns(2)
@@ -862,11 +1062,18 @@ def main():
                     selected_kabkot = kabkot_options
                     st.rerun()
             with col_kb2:
-                top_5_kabkot = df_filtered.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(5).index.tolist()
+                top_5_kabkot = build_aggregate_cube(
+                    df_filtered, data_key, cube_filter_key(selected_years, selected_provinces, selected_kabkot),
+                    source_path=source_path
+                ).top_regions(5).index.tolist()
                 if st.sidebar.button("🔥 Top 5", use_container_width=True, key="top_kabkot_btn"):
                     selected_kabkot = top_5_kabkot
                     st.rerun()
     
+    # Semua tab membaca agregat dari satu cube (satu groupby per versi data + filter)
+    filter_key = cube_filter_key(selected_years, selected_provinces, selected_kabkot)
+    cube = build_aggregate_cube(df_filtered, data_key, filter_key, source_path=source_path)
+    
     # Data Summary
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 📊 Ringkasan", unsafe_allow_html=True)
@@ -910,10 +1117,7 @@ def main():
             
             # Tabel Summary
             st.subheader("📋 Tabel Summary Data")
-            summary_df = df_filtered.groupby(['nama_provinsi', 'tahun']).agg({
-                'jumlah_kasus': ['sum', 'mean', 'count'],
-                'nama_kabupaten_kota': 'nunique'
-            }).round(2)
+            summary_df = cube.region_year_summary('nama_provinsi').round(2)
             
             summary_df.columns = ['Total Kasus', 'Rata-rata Kasus', 'Jumlah Record', 'Jumlah Kab/Kota']
             summary_df = summary_df.reset_index()
@@ -928,7 +1132,7 @@ def main():
             
             with col1:
                 st.write("**Top 10 Provinsi**")
-                top_provinces = df_filtered.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(10).reset_index()
+                top_provinces = cube.top_regions(10, 'nama_provinsi').reset_index()
                 top_provinces.columns = ['Provinsi', 'Total Kasus']
                 # Add ranking
                 top_provinces.insert(0, 'Rank', range(1, len(top_provinces) + 1))
@@ -936,7 +1140,7 @@ def main():
             
             with col2:
                 st.write("**Top 10 Kabupaten/Kota**")
-                top_kabkot = df_filtered.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(10).reset_index()
+                top_kabkot = cube.top_regions(10).reset_index()
                 top_kabkot.columns = ['Kabupaten/Kota', 'Total Kasus']
                 top_kabkot.insert(0, 'Rank', range(1, len(top_kabkot) + 1))
                 st.dataframe(top_kabkot, use_container_width=True, hide_index=True)
@@ -973,23 +1177,14 @@ def main():
                 default=None,
                 key='trend_provinces'
             )
-            trend_fig = create_trend_chart(df_filtered, trend_provinces if trend_provinces else None)
+            trend_fig = create_trend_chart(cube, trend_provinces if trend_provinces else None)
             st.plotly_chart(trend_fig, use_container_width=True)
             
             st.markdown("---")
             
             # Trend Nasional
             st.subheader("📈 Trend Nasional")
-            national_trend = df_filtered.groupby('tahun')['jumlah_kasus'].sum().reset_index()
-            fig_national = px.line(
-                national_trend,
-                x='tahun',
-                y='jumlah_kasus',
-                title='Trend Kasus DBD Nasional',
-                labels={'jumlah_kasus': 'Total Kasus', 'tahun': 'Tahun'},
-                markers=True
-            )
-            fig_national.update_traces(line_color='#667eea', line_width=3)
+            fig_national = create_national_trend_chart(cube)
             st.plotly_chart(fig_national, use_container_width=True)
             
             st.markdown("---")
@@ -1003,20 +1198,14 @@ def main():
                 key='heatmap_province'
             )
             heatmap_prov = None if heatmap_province == 'Semua (Top 15)' else heatmap_province
-            heatmap_fig = create_heatmap(df_filtered, heatmap_prov)
+            heatmap_fig = create_heatmap(cube, heatmap_prov)
             st.plotly_chart(heatmap_fig, use_container_width=True)
             
             # Distribusi kasus per provinsi - Pie Chart
             st.markdown("---")
             st.subheader("🥧 Distribusi Kasus per Provinsi")
             
-            province_dist = df_filtered.groupby('nama_provinsi')['jumlah_kasus'].sum().reset_index()
-            fig_pie = px.pie(
-                province_dist,
-                values='jumlah_kasus',
-                names='nama_provinsi',
-                title='Proporsi Kasus DBD per Provinsi'
-            )
+            fig_pie = create_distribution_pie(cube)
             st.plotly_chart(fig_pie, use_container_width=True)
         
         # TAB 3: AI Insights & Rekomendasi
@@ -1104,7 +1293,7 @@ def main():
                             🧠 Gemini AI sedang menganalisis data Anda...
                         </p>
                         <p style='color: #666; font-size: 0.9rem; margin-top: 0.5rem;'>
-                            Ini mungkin memakan waktu 30-60 detik
+                            Hasil akan tampil bertahap begitu analisis mulai ditulis
                         </p>
                         <div class="progress-indicator">
                             <div class="progress-dot active"></div>
@@ -1116,12 +1305,43 @@ def main():
                     """, unsafe_allow_html=True)
                     
                     try:
-                        insights = get_ai_insights(df_filtered, api_key)
+                        # Respons di-stream: indikator progress diganti teks begitu chunk pertama tiba
+                        growth = None
+                        engine = duckdb_engine(source_path)
+                        if engine is not None:
+                            growth = engine.query(
+                                'growth', cube_filters(filter_key), level='nama_provinsi'
+                            ).set_index('nama_provinsi')['growth_pct']
+                        insight_chunks = get_ai_insights(df_filtered, api_key, stream=True, growth=growth)
+                        first_chunk = next(insight_chunks, "")
                         
                         progress_placeholder.empty()
                         
-                        # Success message dengan animasi
+                        # Success message dengan animasi (diisi setelah stream selesai)
+                        success_placeholder = st.empty()
+                        
+                        st.markdown('<div class="insight-box">', unsafe_allow_html=True)
+                        st.markdown("## 🎯 AI-Generated Analytics Insights")
                         st.markdown("""
+                        <div style='background: rgba(102, 126, 234, 0.05); padding: 1rem; border-radius: 10px; margin-bottom: 1.5rem;'>
+                            <p style='margin: 0; color: #666; font-size: 0.9rem;'>
+                                💡 <strong>Tips:</strong> Baca semua 4 jenis analytics secara berurutan untuk pemahaman lengkap. 
+                                Focus pada <strong>Prescriptive Analytics</strong> untuk action plan yang bisa langsung diimplementasikan.
+                            </p>
+                        </div>
+                        """, unsafe_allow_html=True)
+                        insights_placeholder = st.empty()
+                        insights_placeholder.markdown(first_chunk + " ▌")
+                        chunks = [first_chunk]
+                        with span("ai.stream"):
+                            for chunk in insight_chunks:
+                                chunks.append(chunk)
+                                insights_placeholder.markdown("".join(chunks) + " ▌")
+                        insights = "".join(chunks)
+                        insights_placeholder.markdown(insights)
+                        st.markdown('</div>', unsafe_allow_html=True)
+                        
+                        success_placeholder.markdown("""
                         <div style='background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); 
                                     padding: 1.5rem; border-radius: 15px; 
                                     border-left: 5px solid #4CAF50; 
@@ -1139,19 +1359,6 @@ def main():
                         </div>
                         """, unsafe_allow_html=True)
                         
-                        st.markdown('<div class="insight-box">', unsafe_allow_html=True)
-                        st.markdown("## 🎯 AI-Generated Analytics Insights")
-                        st.markdown("""
-                        <div style='background: rgba(102, 126, 234, 0.05); padding: 1rem; border-radius: 10px; margin-bottom: 1.5rem;'>
-                            <p style='margin: 0; color: #666; font-size: 0.9rem;'>
-                                💡 <strong>Tips:</strong> Baca semua 4 jenis analytics secara berurutan untuk pemahaman lengkap. 
-                                Focus pada <strong>Prescriptive Analytics</strong> untuk action plan yang bisa langsung diimplementasikan.
-                            </p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        st.markdown(insights)
-                        st.markdown('</div>', unsafe_allow_html=True)
-                        
                         # Save insights to session state
                         st.session_state['ai_insights'] = insights
                         
@@ -1195,7 +1402,7 @@ def main():
             
             with col1:
                 st.write("**📈 Trend Tahunan**")
-                yearly_trend = df_filtered.groupby('tahun')['jumlah_kasus'].sum()
+                yearly_trend = cube.by_year()
                 if len(yearly_trend) > 1:
                     pct_change = ((yearly_trend.iloc[-1] - yearly_trend.iloc[0]) / yearly_trend.iloc[0] * 100)
                     trend_direction = "meningkat" if pct_change > 0 else "menurun"
@@ -1204,7 +1411,7 @@ def main():
             
             with col2:
                 st.write("**🎯 Area Prioritas**")
-                top_3_provinces = df_filtered.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(3)
+                top_3_provinces = cube.top_regions(3, 'nama_provinsi')
                 st.write("**Top 3 Provinsi yang Memerlukan Perhatian:**")
                 for i, (prov, kasus) in enumerate(top_3_provinces.items(), 1):
                     st.write(f"{i}. {prov}: **{kasus:,.0f} kasus**")
@@ -1231,33 +1438,52 @@ def main():
             with col1:
                 st.subheader("📊 Export Data")
                 
+                # Artefak dibuat saat tombol diklik (bukan setiap rerun)
+                bundle = build_report_bundle(cube, df_filtered, summary_df, top_provinces, (data_key, filter_key))
+                fmt = st.radio(
+                    "Format tabel",
+                    options=frame_formats(),
+                    format_func=str.upper,
+                    horizontal=True,
+                    key='export_format'
+                )
+                
                 # Export filtered data
-                csv_data = export_to_csv(df_filtered)
                 st.download_button(
-                    label="⬇️ Download Data Terfilter (CSV)",
-                    data=csv_data,
-                    file_name=f"data_dbd_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    label=f"⬇️ Download Data Terfilter ({fmt.upper()})",
+                    data=bundle.lazy('data_dbd_filtered', fmt),
+                    file_name=f"data_dbd_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                    mime=MIME_TYPES[fmt],
+                    on_click="ignore",
                     use_container_width=True
                 )
                 
                 # Export summary data
-                summary_csv = export_to_csv(summary_df)
                 st.download_button(
-                    label="⬇️ Download Summary Data (CSV)",
-                    data=summary_csv,
-                    file_name=f"summary_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    label=f"⬇️ Download Summary Data ({fmt.upper()})",
+                    data=bundle.lazy('summary_dbd', fmt),
+                    file_name=f"summary_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                    mime=MIME_TYPES[fmt],
+                    on_click="ignore",
                     use_container_width=True
                 )
                 
                 # Export top provinces
-                top_prov_csv = export_to_csv(top_provinces)
                 st.download_button(
-                    label="⬇️ Download Top Provinsi (CSV)",
-                    data=top_prov_csv,
-                    file_name=f"top_provinsi_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    label=f"⬇️ Download Top Provinsi ({fmt.upper()})",
+                    data=bundle.lazy('top_provinsi', fmt),
+                    file_name=f"top_provinsi_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                    mime=MIME_TYPES[fmt],
+                    on_click="ignore",
+                    use_container_width=True
+                )
+                
+                st.download_button(
+                    label="🗃️ Download Report Lengkap (ZIP)",
+                    data=bundle.lazy_archive(),
+                    file_name=f"report_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime=MIME_TYPES['zip'],
+                    on_click="ignore",
                     use_container_width=True
                 )
             
@@ -1269,7 +1495,7 @@ def main():
                 if st.button("📊 Generate Trend Chart PNG", use_container_width=True):
                     with st.spinner("Generating..."):
                         try:
-                            trend_fig = create_trend_chart(df_filtered)
+                            trend_fig = create_trend_chart(cube)
                             img_bytes = export_figure_to_png(trend_fig)
                             st.download_button(
                                 label="⬇️ Download Trend Chart",
@@ -1284,7 +1510,7 @@ def main():
                 if st.button("🔥 Generate Heatmap PNG", use_container_width=True):
                     with st.spinner("Generating..."):
                         try:
-                            heatmap_fig = create_heatmap(df_filtered)
+                            heatmap_fig = create_heatmap(cube)
                             img_bytes = export_figure_to_png(heatmap_fig)
                             st.download_button(
                                 label="⬇️ Download Heatmap",
@@ -1295,18 +1521,20 @@ def main():
                             )
                         except Exception as e:
                             st.error(f"Error: {str(e)}")
+                
+                render_figures_export(cube, df_filtered, (data_key, filter_key))
             
             # Export insights
             if 'ai_insights' in st.session_state:
                 st.markdown("---")
                 st.subheader("🤖 Export AI Insights")
                 
-                insights_text = st.session_state['ai_insights']
                 st.download_button(
                     label="⬇️ Download AI Insights (TXT)",
-                    data=insights_text,
+                    data=bundle.lazy('ai_insights', 'txt'),
                     file_name=f"ai_insights_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.txt",
                     mime="text/plain",
+                    on_click="ignore",
                     use_container_width=True
                 )
     
@@ -1342,5 +1570,12 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+def profile_session_id():
+    """ID session untuk profiler (disimpan di session_state)"""
+    if "profile_session" not in st.session_state:
+        st.session_state.profile_session = uuid.uuid4().hex[:12]
+    return st.session_state.profile_session
+
 if __name__ == "__main__":
-    main()
+    with get_profiler().rerun("dashboard", profile_session_id()):
+        main()
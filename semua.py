@@ -7,10 +7,26 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import google.generativeai as genai
 import os
+import uuid
 from dotenv import load_dotenv
 import io
 import base64
-from datetime import datetime
+from utils_parsing import calculate_region_growth
+from utils_ai_integration import cached_generate, cached_generate_stream, iter_response_text
+from utils_aggregate import DBDAggregateCube, as_cube
+from utils_audit import get_audit_store, get_audit_writer
+from utils_schema import to_editable_frame
+from utils_profiling import get_profiler, span, timed
+from utils_visualization import DBDVisualizer, build_trend_figure
+from utils_export import get_exporter
+from utils_report import MIME_TYPES, ReportBundle, frame_formats, serialize_frame
+from utils_figure_cache import cached_figure, get_figure_cache
+from utils_filter import get_filter_engine
+from utils_sql import get_case_sql_engine
+from utils_storage import (
+    get_case_store, editor_changes_to_records,
+    get_generation, bump_generation, DATA_GENERATION, LOG_GENERATION
+)
 
 # --- Konfigurasi Halaman (Diambil dari Dashboard) ---
 st.set_page_config(
@@ -23,7 +39,10 @@ st.set_page_config(
 
 # --- Path File Global ---
 DATA_FILE_PATH = "data_dbd.csv"
-LOG_FILE_PATH = "admin_log.csv"
+DATA_DB_PATH = "data_dbd.db"  # Penyimpanan utama; CSV hanya sebagai seed
+LOG_FILE_PATH = "admin_log.csv"  # Log lama; di-import sekali ke LOG_DB_PATH
+LOG_DB_PATH = "admin_log.db"
+LOG_PAGE_SIZE = 50
 
 # --- Definisi Pengguna (Gabungan) ---
 KODE_KABUPATEN_KOTA = [
@@ -394,44 +413,103 @@ st.markdown("""
 
 # --- FUNGSI HELPER (Log & Auth) ---
 
-def init_log_file(filepath):
-    """Membuat file log jika belum ada."""
-    if not os.path.exists(filepath):
-        try:
-            log_df = pd.DataFrame(columns=["timestamp", "username", "action", "details"])
-            log_df.to_csv(filepath, index=False)
-        except Exception as e:
-            st.error(f"Gagal membuat file log: {e}")
+def get_log_store():
+    """AuditLogStore bersama; log CSV lama (LOG_FILE_PATH) di-import sekali ke database log."""
+    return get_audit_store(LOG_DB_PATH, seed_csv_path=LOG_FILE_PATH)
+
+def get_log_writer():
+    """AuditLogWriter bersama untuk semua session (setiap flush menaikkan generasi log)."""
+    return get_audit_writer(
+        LOG_DB_PATH,
+        on_flush=lambda count: bump_generation(LOG_GENERATION),
+        store=get_log_store()
+    )
 
 def write_log(username, action, details):
-    """Menulis satu baris log ke file CSV."""
-    try:
-        new_log_entry = pd.DataFrame({
-            "timestamp": [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-            "username": [username],
-            "action": [action],
-            "details": [details]
-        })
-        new_log_entry.to_csv(LOG_FILE_PATH, mode='a', header=False, index=False)
-    except Exception as e:
-        print(f"Error writing log: {e}")
+    """Memasukkan satu baris log ke antrean (ditulis batch oleh background thread)."""
+    get_log_writer().write(username, action, details)
+
+def write_logs(entries):
+    """Memasukkan banyak baris log (username, action, details) sekaligus."""
+    get_log_writer().write_many(entries)
 
-@st.cache_data
-def load_logs(filepath):
-    """Memuat semua log dari file CSV."""
-    if not os.path.exists(filepath):
-        return pd.DataFrame(columns=["timestamp", "username", "action", "details"])
+@st.cache_data(max_entries=16)
+def load_log_page(actions=None, username=None, page=1, page_size=LOG_PAGE_SIZE, log_generation=0):
+    """
+    Memuat satu halaman log (terbaru dulu) dan total baris yang cocok dengan filter.
+    `log_generation` hanya dipakai sebagai kunci cache (naik setiap flush log).
+    """
     try:
-        return pd.read_csv(filepath)
+        store = get_log_store()
+        total = store.count(actions=actions, username=username)
+        log_df = store.query(actions=actions, username=username, limit=page_size, offset=(page - 1) * page_size)
+        return log_df, total
     except Exception as e:
         st.error(f"Gagal memuat log: {e}")
-        return pd.DataFrame(columns=["timestamp", "username", "action", "details"])
+        return pd.DataFrame(columns=["timestamp", "username", "action", "details"]), 0
+
+@st.cache_data(max_entries=4)
+def load_log_usernames(log_generation=0):
+    """Daftar username yang pernah tercatat di log (untuk filter)."""
+    return get_log_store().usernames()
+
+def render_log_page(actions, username, key, empty_message):
+    """Menampilkan satu tabel log dengan pagination (hanya halaman aktif yang di-query)."""
+    page_key = f"{key}_page"
+    log_generation = get_generation(LOG_GENERATION)
+    page = st.session_state.get(page_key, 1)
+    log_df, total = load_log_page(actions, username, page, LOG_PAGE_SIZE, log_generation)
+    
+    total_pages = max(1, -(-total // LOG_PAGE_SIZE))
+    if page > total_pages:
+        # Filter berubah dan halaman aktif tidak ada lagi: kembali ke halaman terakhir
+        page = total_pages
+        st.session_state[page_key] = page
+        log_df, total = load_log_page(actions, username, page, LOG_PAGE_SIZE, log_generation)
+    
+    if total == 0:
+        st.info(empty_message)
+        return
+    
+    st.dataframe(
+        log_df,
+        use_container_width=True,
+        height=300
+    )
+    st.number_input(
+        f"Halaman (dari {total_pages}, total {total:,} log)",
+        min_value=1, max_value=total_pages, step=1, key=page_key
+    )
+
+def profile_session_id():
+    """ID session untuk profiler (disimpan di session_state)."""
+    if "profile_session" not in st.session_state:
+        st.session_state.profile_session = uuid.uuid4().hex[:12]
+    return st.session_state.profile_session
+
+def render_profiling_panel():
+    """Panel durasi per span: rerun terakhir session ini + p50/p95 lintas session (sink JSONL)."""
+    profiler = get_profiler()
+    with st.expander("⏱️ Profiling Rerun (p50/p95 per span)"):
+        if not profiler.enabled:
+            st.info("Profiling dimatikan (DBD_PROFILING=0).")
+            return
+        st.markdown("**Rerun terakhir session ini**")
+        st.dataframe(profiler.last_rerun(profile_session_id()), use_container_width=True, hide_index=True)
+        st.markdown(f"**Semua session** (`{profiler.sink_path}`)")
+        st.dataframe(profiler.summary(), use_container_width=True)
+        stats = get_figure_cache().stats()
+        st.caption(
+            f"Cache figure: {stats['entries']} figure ({stats['bytes'] / 1024:,.0f} KB), "
+            f"hit {stats['hits']}, miss {stats['misses']}"
+        )
+        stats = get_filter_engine().stats()
+        st.caption(f"Cache filter: {stats['selections']} seleksi, hit {stats['hits']}, miss {stats['misses']}")
 
 def check_login(username, password):
     """Memeriksa kredensial pengguna dan mencatat log jika berhasil."""
     user = ADMIN_USERS.get(username)
     if user and user["password"] == password:
-        init_log_file(LOG_FILE_PATH)
         # Semua login yang berhasil melalui fungsi ini adalah Admin
         write_log(username, "LOGIN", f"Admin '{username}' berhasil login.")
         return True, user["role"], user["region_code"]
@@ -444,19 +522,20 @@ def perform_logout():
     st.session_state.role = None
     st.session_state.username = None
     st.session_state.region_code = None
-    st.cache_data.clear()
     st.rerun()
 
 
 # --- FUNGSI HELPER (Data & CRUD) ---
 
-@st.cache_data
-def load_data(file_path):
+@timed("load_data")
+@st.cache_data(max_entries=4)
+def load_data(file_path, data_generation=0):
     """
     Load data dari file CSV (dari skrip dashboard, lebih robust).
     Fungsi ini sekarang digunakan oleh Admin dan Dashboard.
+    `data_generation` hanya dipakai sebagai kunci cache (naik setiap save_changes).
     """
-    if not os.path.exists(file_path):
+    if not os.path.exists(file_path) and not os.path.exists(DATA_DB_PATH):
         st.error(f"File data {file_path} tidak ditemukan!")
         st.info("Pastikan Anda sudah membuat file `data_dbd.csv` di folder yang sama.")
         # Kembalikan DataFrame kosong dengan kolom yang diharapkan
@@ -466,7 +545,11 @@ def load_data(file_path):
         ])
         
     try:
-        df = pd.read_csv(file_path)
+        # CSV hanya seed saat database masih kosong (import ulang lewat admin);
+        # pembacaan memakai snapshot kolumnar per revisi database
+        store = get_case_store(DATA_DB_PATH)
+        store.sync_from_csv(file_path)
+        df = store.load_frame()
         # Validasi kolom yang diperlukan
         required_columns = ['kode_provinsi', 'nama_provinsi', 'kode_kabupaten_kota', 
                             'nama_kabupaten_kota', 'jumlah_kasus', 'satuan', 'tahun']
@@ -475,34 +558,35 @@ def load_data(file_path):
             st.error(f"File CSV harus memiliki kolom: {', '.join(required_columns)}")
             return None
         
-        # Konversi tipe data
-        df['jumlah_kasus'] = pd.to_numeric(df['jumlah_kasus'], errors='coerce')
-        df['tahun'] = pd.to_numeric(df['tahun'], errors='coerce')
-        if 'kode_kabupaten_kota' in df.columns:
-            df['kode_kabupaten_kota'] = df['kode_kabupaten_kota'].astype(str)
-        
         return df
     except Exception as e:
         st.error(f"Error saat membaca file data: {str(e)}")
         return None
 
-def save_data(df, filepath):
-    """Menyimpan DataFrame kembali ke CSV (dari skrip admin)."""
+def save_changes(upserts, deleted_ids):
+    """Menyimpan hanya baris yang berubah ke database (UPSERT/DELETE dalam satu transaksi)."""
     try:
-        if "pilih_hapus" in df.columns:
-            df_to_save = df.drop(columns=["pilih_hapus"])
-        else:
-            df_to_save = df
-            
-        df_to_save.to_csv(filepath, index=False)
+        get_case_store(DATA_DB_PATH).apply_changes(upserts, deleted_ids)
+        bump_generation(DATA_GENERATION)
         return True
     except Exception as e:
         st.error(f"Gagal menyimpan data: {e}")
         return False
 
+def reimport_data(filepath):
+    """Import ulang seluruh data dari CSV (menimpa semua perubahan di database)."""
+    try:
+        get_case_store(DATA_DB_PATH).sync_from_csv(filepath, force=True)
+        bump_generation(DATA_GENERATION)
+        return True
+    except Exception as e:
+        st.error(f"Gagal import ulang data: {e}")
+        return False
+
 
 # --- FUNGSI HELPER (Dashboard Visuals & AI) ---
 # ... (Semua fungsi helper dashboard: analyze_data, get_ai_insights, create_trend_chart, dll. tetap sama) ...
+@timed("analyze_data")
 def analyze_data(df):
     """Analisis statistik dasar dari data (dari skrip dashboard)."""
     analysis = {
@@ -515,11 +599,15 @@ def analyze_data(df):
     return analysis
 
 # --- MODIFIKASI ---: Fungsi AI disesuaikan untuk level Kab/Kota
-def get_ai_insights(df, api_key):
-    """Generate AI insights menggunakan Google Gemini (dari skrip dashboard)."""
+@timed("ai.get_ai_insights")
+def get_ai_insights(df, api_key, stream=False, model=None, growth=None):
+    """
+    Generate AI insights menggunakan Google Gemini (dari skrip dashboard).
+    stream=True mengembalikan generator potongan teks; `model` bisa diisi model palsu untuk test.
+    `growth` = Series kab/kota -> growth_pct yang sudah dihitung (mis. query SQL 'growth').
+    """
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash') # Menggunakan 1.5 Flash
+        model_name = 'gemini-1.5-flash' # Menggunakan 1.5 Flash
         
         # Analisis data yang lebih mendalam
         tahun_list = sorted(df['tahun'].unique())
@@ -534,16 +622,13 @@ def get_ai_insights(df, api_key):
             growth_rate = 0
         
         # Kabupaten/Kota analysis (sebelumnya provinsi)
-        kabkot_stats = df.groupby('nama_kabupaten_kota')['jumlah_kasus'].agg(['sum', 'mean', 'std']).round(2)
+        kabkot_stats = df.groupby('nama_kabupaten_kota', observed=True)['jumlah_kasus'].agg(['sum', 'mean', 'std']).round(2)
         top_5_kabkot = kabkot_stats.nlargest(5, 'sum')['sum'].to_dict()
         
-        # Year-over-year growth by kab/kota (sebelumnya provinsi)
-        kabkot_growth = {}
-        for kabkot in df['nama_kabupaten_kota'].unique():
-            kabkot_data = df[df['nama_kabupaten_kota'] == kabkot].groupby('tahun')['jumlah_kasus'].sum()
-            if len(kabkot_data) > 1:
-                growth = ((kabkot_data.iloc[-1] - kabkot_data.iloc[0]) / kabkot_data.iloc[0] * 100) if kabkot_data.iloc[0] > 0 else 0
-                kabkot_growth[kabkot] = round(growth, 2)
+        # Growth tahun pertama -> terakhir per kab/kota (sebelumnya provinsi), satu groupby
+        if growth is None:
+            growth = calculate_region_growth(df, 'nama_kabupaten_kota')['growth_pct']
+        kabkot_growth = growth.round(2).to_dict()
         
         # Variability analysis
         std_dev_nasional = df.groupby('tahun')['jumlah_kasus'].sum().std()
@@ -597,30 +682,41 @@ PENTING:
 - Gunakan Bahasa Indonesia yang JELAS dan PROFESIONAL
 """
         
-        response = model.generate_content(prompt)
-        return response.text
+        def get_model():
+            # Hanya dipanggil jika (model, prompt) belum ada di cache respons
+            if model is not None:
+                return model
+            genai.configure(api_key=api_key)
+            return genai.GenerativeModel(model_name)
+        
+        if stream:
+            return cached_generate_stream(
+                model_name,
+                prompt,
+                lambda text: iter_response_text(get_model().generate_content(text, stream=True))
+            )
+        return cached_generate(model_name, prompt, lambda text: get_model().generate_content(text).text)
     
     except Exception as e:
-        return f"Error saat menghasilkan AI insights: {str(e)}\n\nPastikan API Key Gemini sudah diset dengan benar."
+        message = f"Error saat menghasilkan AI insights: {str(e)}\n\nPastikan API Key Gemini sudah diset dengan benar."
+        return iter([message]) if stream else message
 
 # --- MODIFIKASI ---: Fungsi diubah untuk level Kab/Kota
-def create_trend_chart(df, selected_kabkots=None):
-    """Membuat grafik trend kasus DBD per tahun per kab/kota."""
-    if selected_kabkots:
-        df_filtered = df[df['nama_kabupaten_kota'].isin(selected_kabkots)]
-    else:
-        df_filtered = df
-    
-    trend_data = df_filtered.groupby(['tahun', 'nama_kabupaten_kota'])['jumlah_kasus'].sum().reset_index()
-    
-    fig = px.bar(
+@timed("create_trend_chart")
+@cached_figure("create_trend_chart")
+def create_trend_chart(data, selected_kabkots=None):
+    """Membuat grafik trend kasus DBD per tahun per kab/kota (data: DataFrame atau cube agregat)."""
+    cube = as_cube(data).filter('nama_kabupaten_kota', selected_kabkots)
+    trend_data = cube.region_year('nama_kabupaten_kota')
+    
+    fig = build_trend_figure(
         trend_data,
         x='tahun',
         y='jumlah_kasus',
         color='nama_kabupaten_kota', # Diubah dari nama_provinsi
+        kind='bar',
         title='Trend Kasus DBD per Tahun per Kabupaten/Kota',
         labels={'jumlah_kasus': 'Jumlah Kasus', 'tahun': 'Tahun', 'nama_kabupaten_kota': 'Kabupaten/Kota'}, # Diubah
-        barmode='group',
         height=500
     )
     
@@ -634,21 +730,13 @@ def create_trend_chart(df, selected_kabkots=None):
     return fig
 
 # --- MODIFIKASI ---: Fungsi disederhanakan, filter provinsi tidak perlu lagi
-def create_heatmap(df):
-    """Membuat heatmap kasus DBD per kabupaten/kota."""
+@timed("create_heatmap")
+@cached_figure("create_heatmap")
+def create_heatmap(data):
+    """Membuat heatmap kasus DBD per kabupaten/kota (data: DataFrame atau cube agregat)."""
     
-    # Ambil top 15 kabupaten/kota dengan kasus tertinggi dari data yang sudah difilter
-    top_kabkot = df.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(15).index
-    df_filtered = df[df['nama_kabupaten_kota'].isin(top_kabkot)]
-    
-    # Pivot data untuk heatmap
-    heatmap_data = df_filtered.pivot_table(
-        values='jumlah_kasus',
-        index='nama_kabupaten_kota',
-        columns='tahun',
-        aggfunc='sum',
-        fill_value=0
-    )
+    # Top 15 kabupaten/kota dengan kasus tertinggi dari data yang sudah difilter, dipivot per tahun
+    heatmap_data = as_cube(data).heatmap_matrix(top_n=15)
     
     fig = px.imshow(
         heatmap_data,
@@ -663,14 +751,150 @@ def create_heatmap(df):
     
     return fig
 
+@timed("create_national_trend_chart")
+@cached_figure("create_national_trend_chart")
+def create_national_trend_chart(data):
+    """Membuat grafik trend total per tahun (data: DataFrame atau cube agregat)"""
+    cube = as_cube(data)
+    national_trend = cube.by_year().reset_index()
+    fig_national = px.line(
+        national_trend,
+        x='tahun',
+        y='jumlah_kasus',
+        title='Trend Kasus DBD Jawa Barat', # Judul diubah
+        labels={'jumlah_kasus': 'Total Kasus', 'tahun': 'Tahun'},
+        markers=True
+    )
+    fig_national.update_traces(line_color='#667eea', line_width=3)
+    
+    return fig_national
+
+@timed("create_distribution_pie")
+@cached_figure("create_distribution_pie")
+def create_distribution_pie(data):
+    """Membuat pie chart proporsi kasus per kabupaten/kota (data: DataFrame atau cube agregat)"""
+    cube = as_cube(data)
+    kabkot_dist = cube.by_region('nama_kabupaten_kota').reset_index()
+    fig_pie = px.pie(
+        kabkot_dist,
+        values='jumlah_kasus',
+        names='nama_kabupaten_kota', # Diubah dari nama_provinsi
+        title='Proporsi Kasus DBD per Kabupaten/Kota' # Judul diubah
+    )
+    
+    return fig_pie
+
+def cube_filters(filter_key):
+    """Filter engine SQL untuk filter_key (tahun, kab/kota); None = tanpa filter."""
+    if filter_key is None:
+        return None
+    selected_years, selected_kabkots = filter_key
+    return {'tahun': list(selected_years), 'nama_kabupaten_kota': list(selected_kabkots)}
+
+def duckdb_engine():
+    """
+    Engine SQL database kasus, hanya jika DuckDB aktif. Fallback pandas
+    engine memuat salinan tabel sendiri, jadi tanpa DuckDB agregasi memakai
+    frame yang sudah dimuat session (None).
+    """
+    engine = get_case_sql_engine(DATA_DB_PATH)
+    return engine if engine.engine == 'duckdb' else None
+
+@timed("build_aggregate_cube")
+@st.cache_data(max_entries=8)
+def build_aggregate_cube(_df, data_generation, filter_key=None):
+    """
+    Cube agregat wilayah x tahun, dihitung sekali per (versi data, filter).
+    Dengan DuckDB agregasi dijalankan atas mirror Parquet database kasus
+    (mengikuti revisi database); tanpa DuckDB dari `_df` (frame hasil filter).
+    `_df` tidak di-hash; kunci cache adalah data_generation + filter_key.
+    """
+    engine = duckdb_engine()
+    if engine is not None:
+        return engine.cube(cube_filters(filter_key))
+    return DBDAggregateCube(_df)
+
+@timed("export_to_csv")
 def export_to_csv(df):
     """Export dataframe ke CSV (dari skrip dashboard)."""
-    return df.to_csv(index=False).encode('utf-8')
+    return serialize_frame(df, 'csv')
 
+@timed("export_figure_to_png")
 def export_figure_to_png(fig):
-    """Export plotly figure ke PNG (dari skrip dashboard)."""
-    img_bytes = fig.to_image(format="png", width=1200, height=800)
-    return img_bytes
+    """Export plotly figure ke PNG lewat renderer Kaleido bersama + cache PNG (dari skrip dashboard)."""
+    return get_exporter().render_png(fig)
+
+def build_report_bundle(cube, df_filtered, summary_df, top_table, bundle_key):
+    """
+    Daftarkan artefak tab Export (tabel CSV/Parquet/XLSX, grafik, AI insights)
+    tanpa membuatnya; bytes baru dibuat saat tombol download diklik dan
+    di-cache per `bundle_key` (versi data + filter).
+    """
+    bundle = ReportBundle(bundle_key)
+    bundle.add_frame('data_dbd_filtered', df_filtered)
+    bundle.add_frame('summary_dbd', summary_df)
+    bundle.add_frame('top_kabkot', top_table)
+    bundle.add_figure('trend_chart', lambda: create_trend_chart(cube))
+    bundle.add_figure('heatmap', lambda: create_heatmap(cube))
+    year = int(df_filtered['tahun'].max())
+    bundle.add_figure(
+        f"dashboard_summary_{year}",
+        lambda: DBDVisualizer(df_filtered).create_dashboard_summary(year),
+        formats=('png',)
+    )
+    if 'ai_insights' in st.session_state:
+        bundle.add_text('ai_insights', st.session_state['ai_insights'])
+    return bundle
+
+def submit_figures_export(cube, df_filtered, summary_key):
+    """
+    Kirim trend, heatmap, trend total, pie chart, dan dashboard summary ke
+    background worker export; hasilnya Future berisi bytes ZIP.
+    `summary_key` (versi data + filter) menjadi kunci cache PNG dashboard summary.
+    """
+    year = int(df_filtered['tahun'].max())
+    summary_name = f"dashboard_summary_{year}"
+    figures = {
+        'trend_chart': create_trend_chart(cube),
+        'heatmap': create_heatmap(cube),
+        'trend_total_jabar': create_national_trend_chart(cube),
+        'distribusi_kabkot': create_distribution_pie(cube),
+        summary_name: lambda: DBDVisualizer(df_filtered).create_dashboard_summary(year),
+    }
+    return get_exporter().submit_zip(figures, {summary_name: ('dashboard_summary', summary_key, year)})
+
+@st.fragment(run_every=1)
+def poll_figures_export():
+    """Cek job export ZIP per detik tanpa rerun seluruh halaman; rerun penuh saat selesai."""
+    _, job = st.session_state.get('export_job', (None, None))
+    if job is None or job.done():
+        st.rerun()
+    st.info("⏳ Grafik sedang dirender di background...")
+
+def render_figures_export(cube, df_filtered, summary_key):
+    """Tombol export semua grafik (ZIP) beserta status job background-nya."""
+    if st.button("🗂️ Generate Semua Grafik (ZIP)", use_container_width=True):
+        st.session_state['export_job'] = (summary_key, submit_figures_export(cube, df_filtered, summary_key))
+    
+    # Job milik filter lain (data/filter sudah berubah) diabaikan
+    job_key, job = st.session_state.get('export_job', (None, None))
+    if job is None or job_key != summary_key:
+        return
+    if not job.done():
+        poll_figures_export()
+        return
+    try:
+        zip_bytes = job.result()
+    except Exception as e:
+        st.warning(f"Gagal generate ZIP grafik. (Error: {e})")
+        return
+    st.download_button(
+        label="⬇️ Download Semua Grafik (ZIP)",
+        data=zip_bytes,
+        file_name=f"grafik_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.zip",
+        mime="application/zip",
+        use_container_width=True
+    )
 
 
 # --- FUNGSI RENDER HALAMAN ---
@@ -699,7 +923,8 @@ def render_dashboard():
     
     st.sidebar.markdown("### 📁 Sumber Data", unsafe_allow_html=True)
     
-    df = load_data(DATA_FILE_PATH)
+    data_generation = get_generation(DATA_GENERATION)
+    df = load_data(DATA_FILE_PATH, data_generation)
     
     if df is None or df.empty:
         st.sidebar.error("❌ Data tidak ditemukan atau kosong.")
@@ -751,16 +976,23 @@ def render_dashboard():
                 selected_kabkots = kabkots
                 st.rerun()
         with col_pr2:
-            top_3_kabkot = df.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(3).index.tolist()
+            top_3_kabkot = build_aggregate_cube(df, data_generation).top_regions(3).index.tolist()
             if st.sidebar.button("🔥 Top 3", use_container_width=True, key="top_kabkots_btn"):
                 selected_kabkots = top_3_kabkot
                 st.rerun()
     
     # Apply filters
-    df_filtered = df[
-        (df['tahun'].isin(selected_years)) &
-        (df['nama_kabupaten_kota'].isin(selected_kabkots)) # Diubah dari nama_provinsi
-    ]
+    # Posisi baris hasil filter di-memoize per (versi data, seleksi), jadi rerun
+    # tanpa perubahan filter (ganti tab, tombol AI) tidak menghitung mask lagi
+    with span("filter"):
+        df_filtered = get_filter_engine().apply(
+            df, (DATA_FILE_PATH, data_generation),
+            {'tahun': selected_years, 'nama_kabupaten_kota': selected_kabkots} # Diubah dari nama_provinsi
+        )
+    
+    # Semua tab membaca agregat dari satu cube (satu groupby per versi data + filter)
+    filter_key = (tuple(sorted(selected_years)), tuple(sorted(selected_kabkots)))
+    cube = build_aggregate_cube(df_filtered, data_generation, filter_key)
     
     # --- MODIFIKASI ---: Filter Kab/Kota sekunder dihapus karena sudah jadi filter primer
     
@@ -806,9 +1038,7 @@ def render_dashboard():
             # Tabel Summary
             st.subheader("📋 Tabel Summary Data")
             # --- MODIFIKASI ---: Groupby diubah ke kab/kota
-            summary_df = df_filtered.groupby(['nama_kabupaten_kota', 'tahun']).agg({
-                'jumlah_kasus': ['sum', 'mean', 'count'],
-            }).round(2)
+            summary_df = cube.region_year_summary('nama_kabupaten_kota')[['sum', 'mean', 'count']].round(2)
             
             summary_df.columns = ['Total Kasus', 'Rata-rata Kasus', 'Jumlah Record']
             summary_df = summary_df.reset_index()
@@ -821,7 +1051,7 @@ def render_dashboard():
             st.subheader("🏆 Ranking Wilayah")
             
             st.write("**Top 10 Kabupaten/Kota**")
-            top_kabkots_table = df_filtered.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(10).reset_index()
+            top_kabkots_table = cube.top_regions(10).reset_index()
             top_kabkots_table.columns = ['Kabupaten/Kota', 'Total Kasus']
             top_kabkots_table.insert(0, 'Rank', range(1, len(top_kabkots_table) + 1))
             st.dataframe(top_kabkots_table, use_container_width=True, hide_index=True)
@@ -834,7 +1064,7 @@ def render_dashboard():
             # --- MODIFIKASI ---: Trend Chart diubah ke level kab/kota
             st.subheader("📊 Trend Kasus DBD per Tahun")
             # Langsung buat chart tanpa filter
-            trend_fig = create_trend_chart(df_filtered, None)
+            trend_fig = create_trend_chart(cube, None)
             st.plotly_chart(trend_fig, use_container_width=True)
 
             
@@ -842,16 +1072,7 @@ def render_dashboard():
             
             # --- MODIFIKASI ---: Judul Trend diubah
             st.subheader("📈 Trend Total Jawa Barat")
-            national_trend = df_filtered.groupby('tahun')['jumlah_kasus'].sum().reset_index()
-            fig_national = px.line(
-                national_trend,
-                x='tahun',
-                y='jumlah_kasus',
-                title='Trend Kasus DBD Jawa Barat', # Judul diubah
-                labels={'jumlah_kasus': 'Total Kasus', 'tahun': 'Tahun'},
-                markers=True
-            )
-            fig_national.update_traces(line_color='#667eea', line_width=3)
+            fig_national = create_national_trend_chart(cube)
             st.plotly_chart(fig_national, use_container_width=True)
             
             st.markdown("---")
@@ -859,20 +1080,14 @@ def render_dashboard():
             # --- MODIFIKASI ---: Heatmap disederhanakan
             st.subheader("🔥 Heatmap Kasus DBD")
             st.info("Heatmap menampilkan 15 kabupaten/kota dengan kasus tertinggi dalam data yang terfilter.")
-            heatmap_fig = create_heatmap(df_filtered) # Tidak perlu parameter
+            heatmap_fig = create_heatmap(cube) # Tidak perlu parameter
             st.plotly_chart(heatmap_fig, use_container_width=True)
             
             # --- MODIFIKASI ---: Pie chart diubah ke level kab/kota
             st.markdown("---")
             st.subheader("🥧 Distribusi Kasus per Kabupaten/Kota")
             
-            kabkot_dist = df_filtered.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().reset_index()
-            fig_pie = px.pie(
-                kabkot_dist,
-                values='jumlah_kasus',
-                names='nama_kabupaten_kota', # Diubah dari nama_provinsi
-                title='Proporsi Kasus DBD per Kabupaten/Kota' # Judul diubah
-            )
+            fig_pie = create_distribution_pie(cube)
             st.plotly_chart(fig_pie, use_container_width=True)
         
         # TAB 3: AI Insights & Rekomendasi
@@ -941,11 +1156,17 @@ def render_dashboard():
                     ... (Error message tidak berubah) ...
                     """)
                 else:
-                    with st.spinner("🧠 Gemini AI sedang menganalisis data Anda... (Ini mungkin memakan waktu 30-60 detik)"):
+                    with st.spinner("🧠 Gemini AI sedang menganalisis data Anda... (hasil tampil bertahap)"):
                         try:
-                            insights = get_ai_insights(df_filtered, api_key)
-                            
-                            st.success("✅ Analisis Selesai! Scroll ke bawah untuk melihat hasil.")
+                            # Respons di-stream dan ditulis ke placeholder per chunk
+                            growth = None
+                            engine = duckdb_engine()
+                            if engine is not None:
+                                growth = engine.query(
+                                    'growth', cube_filters(filter_key)
+                                ).set_index('nama_kabupaten_kota')['growth_pct']
+                            insight_chunks = get_ai_insights(df_filtered, api_key, stream=True, growth=growth)
+                            success_placeholder = st.empty()
                             
                             st.markdown('<div class="insight-box">', unsafe_allow_html=True)
                             st.markdown("## 🎯 AI-Generated Analytics Insights")
@@ -957,9 +1178,18 @@ def render_dashboard():
                                 </p>
                             </div>
                             """, unsafe_allow_html=True)
-                            st.markdown(insights)
+                            insights_placeholder = st.empty()
+                            chunks = []
+                            with span("ai.stream"):
+                                for chunk in insight_chunks:
+                                    chunks.append(chunk)
+                                    insights_placeholder.markdown("".join(chunks) + " ▌")
+                            insights = "".join(chunks)
+                            insights_placeholder.markdown(insights)
                             st.markdown('</div>', unsafe_allow_html=True)
                             
+                            success_placeholder.success("✅ Analisis Selesai! Scroll ke bawah untuk melihat hasil.")
+                            
                             st.session_state['ai_insights'] = insights
                             
                         except Exception as e:
@@ -983,7 +1213,7 @@ def render_dashboard():
             
             with col1:
                 st.write("**📈 Trend Tahunan (Jawa Barat)**")
-                yearly_trend = df_filtered.groupby('tahun')['jumlah_kasus'].sum()
+                yearly_trend = cube.by_year()
                 if len(yearly_trend) > 1:
                     pct_change = ((yearly_trend.iloc[-1] - yearly_trend.iloc[0]) / yearly_trend.iloc[0] * 100)
                     trend_direction = "meningkat" if pct_change > 0 else "menurun"
@@ -993,7 +1223,7 @@ def render_dashboard():
             # --- MODIFIKASI ---: Area prioritas diubah ke kab/kota
             with col2:
                 st.write("**🎯 Area Prioritas**")
-                top_3_kabkots = df_filtered.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(3)
+                top_3_kabkots = cube.top_regions(3)
                 st.write("**Top 3 Kabupaten/Kota yang Memerlukan Perhatian:**")
                 for i, (kabkot, kasus) in enumerate(top_3_kabkots.items(), 1):
                     st.write(f"{i}. {kabkot}: **{kasus:,.0f} kasus**")
@@ -1019,31 +1249,50 @@ def render_dashboard():
             with col1:
                 st.subheader("📊 Export Data")
                 
-                csv_data = export_to_csv(df_filtered)
+                # Artefak dibuat saat tombol diklik (bukan setiap rerun)
+                bundle = build_report_bundle(cube, df_filtered, summary_df, top_kabkots_table, (data_generation, filter_key))
+                fmt = st.radio(
+                    "Format tabel",
+                    options=frame_formats(),
+                    format_func=str.upper,
+                    horizontal=True,
+                    key='export_format'
+                )
+                
                 st.download_button(
-                    label="⬇️ Download Data Terfilter (CSV)",
-                    data=csv_data,
-                    file_name=f"data_dbd_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    label=f"⬇️ Download Data Terfilter ({fmt.upper()})",
+                    data=bundle.lazy('data_dbd_filtered', fmt),
+                    file_name=f"data_dbd_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                    mime=MIME_TYPES[fmt],
+                    on_click="ignore",
                     use_container_width=True
                 )
                 
-                summary_csv = export_to_csv(summary_df)
                 st.download_button(
-                    label="⬇️ Download Summary Data (CSV)",
-                    data=summary_csv,
-                    file_name=f"summary_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    label=f"⬇️ Download Summary Data ({fmt.upper()})",
+                    data=bundle.lazy('summary_dbd', fmt),
+                    file_name=f"summary_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                    mime=MIME_TYPES[fmt],
+                    on_click="ignore",
                     use_container_width=True
                 )
                 
                 # --- MODIFIKASI ---: Export top provinsi diubah ke kab/kota
-                top_kabkot_csv = export_to_csv(top_kabkots_table)
                 st.download_button(
-                    label="⬇️ Download Top Kab/Kota (CSV)",
-                    data=top_kabkot_csv,
-                    file_name=f"top_kabkot_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
+                    label=f"⬇️ Download Top Kab/Kota ({fmt.upper()})",
+                    data=bundle.lazy('top_kabkot', fmt),
+                    file_name=f"top_kabkot_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                    mime=MIME_TYPES[fmt],
+                    on_click="ignore",
+                    use_container_width=True
+                )
+                
+                st.download_button(
+                    label="🗃️ Download Report Lengkap (ZIP)",
+                    data=bundle.lazy_archive(),
+                    file_name=f"report_dbd_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime=MIME_TYPES['zip'],
+                    on_click="ignore",
                     use_container_width=True
                 )
             
@@ -1055,7 +1304,7 @@ def render_dashboard():
                 try:
                     if st.button("📊 Generate Trend Chart PNG", use_container_width=True):
                         with st.spinner("Generating..."):
-                            trend_fig_export = create_trend_chart(df_filtered)
+                            trend_fig_export = create_trend_chart(cube)
                             img_bytes = export_figure_to_png(trend_fig_export)
                             st.download_button(
                                 label="⬇️ Download Trend Chart",
@@ -1066,7 +1315,7 @@ def render_dashboard():
                     
                     if st.button("🔥 Generate Heatmap PNG", use_container_width=True):
                         with st.spinner("Generating..."):
-                            heatmap_fig_export = create_heatmap(df_filtered)
+                            heatmap_fig_export = create_heatmap(cube)
                             img_bytes = export_figure_to_png(heatmap_fig_export)
                             st.download_button(
                                 label="⬇️ Download Heatmap",
@@ -1076,17 +1325,19 @@ def render_dashboard():
                             )
                 except Exception as e:
                     st.warning(f"Gagal generate PNG. Pastikan library 'kaleido' terinstall. (Error: {e})")
+                
+                render_figures_export(cube, df_filtered, (data_generation, filter_key))
             
             if 'ai_insights' in st.session_state:
                 st.markdown("---")
                 st.subheader("🤖 Export AI Insights")
                 
-                insights_text = st.session_state['ai_insights']
                 st.download_button(
                     label="⬇️ Download AI Insights (TXT)",
-                    data=insights_text,
+                    data=bundle.lazy('ai_insights', 'txt'),
                     file_name=f"ai_insights_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.txt",
                     mime="text/plain",
+                    on_click="ignore",
                     use_container_width=True
                 )
     
@@ -1116,8 +1367,6 @@ def render_admin_panel():
     (Logika "Simpan" telah diperbaiki untuk menangani 'daerah' admin)
     """
     
-    init_log_file(LOG_FILE_PATH)
-
     with st.sidebar:
         st.markdown("""
         <div style='text-align: center; padding: 1.5rem 0; margin-bottom: 1.5rem; border-bottom: 1px solid rgba(255,255,255,0.2);'>
@@ -1138,7 +1387,7 @@ def render_admin_panel():
     st.markdown('<h1 class="main-header">📊 Dashboard Admin Kasus DBD Jawa Barat</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">Manajemen Data Kasus Demam Berdarah Dengue</p>', unsafe_allow_html=True)
 
-    df_full = load_data(DATA_FILE_PATH) 
+    df_full = load_data(DATA_FILE_PATH, get_generation(DATA_GENERATION))
     
     if df_full is None:
         st.error("Gagal memuat data utama. Panel Admin tidak dapat ditampilkan.")
@@ -1157,18 +1406,21 @@ def render_admin_panel():
             df_display = df_full.copy()
         else: # role == "daerah"
             region_code = st.session_state.region_code
-            nama_daerah_series = df_full[df_full['kode_kabupaten_kota'] == region_code]['nama_kabupaten_kota']
+            nama_daerah_series = df_full[df_full['kode_kabupaten_kota'] == int(region_code)]['nama_kabupaten_kota']
             nama_daerah = nama_daerah_series.iloc[0] if not nama_daerah_series.empty else f"Kode {region_code}"
             
             st.header(f"Data untuk Wilayah: {nama_daerah}")
             
-            df_display = df_full[df_full['kode_kabupaten_kota'] == region_code].copy()
+            df_display = df_full[df_full['kode_kabupaten_kota'] == int(region_code)].copy()
             
             if df_display.empty:
                 st.warning("Belum ada data untuk wilayah Anda.")
 
     st.header("Kelola Data (CRUD)")
 
+    # Kolom categorical -> string agar nilai baru bisa diketik di editor
+    df_display = to_editable_frame(df_display)
+
     if not df_display.empty:
         df_display.insert(0, "pilih_hapus", False)
     else:
@@ -1180,6 +1432,8 @@ def render_admin_panel():
             "Pilih Hapus", 
             help="Centang untuk menghapus baris. Klik 'Hapus Baris Terpilih' di bawah."
         ),
+        # id adalah primary key database; baris baru mendapat id otomatis
+        "id": st.column_config.NumberColumn(disabled=True),
     }
 
     if st.session_state.role == "daerah":
@@ -1210,25 +1464,28 @@ def render_admin_panel():
             
             # --- START PERBAIKAN ---
             
-            # 1. Ambil dataframe terbaru dari data_editor
-            df_from_editor = edited_df.copy()
-            
             try:
+                # 1. Ambil perubahan dari data_editor (hanya baris yang berubah)
+                editor_state = st.session_state.data_editor
+                
                 # 2. Log perubahan (logika ini opsional tapi bagus untuk ada)
-                edited_changes = st.session_state.data_editor.get("edited_rows", {})
-                added_changes = st.session_state.data_editor.get("added_rows", [])
+                edited_changes = editor_state.get("edited_rows", {})
+                added_changes = editor_state.get("added_rows", [])
 
+                log_entries = []
                 for row_index, changes in edited_changes.items():
                     if row_index < len(df_display): # Pastikan index valid
                         original_row = df_display.iloc[row_index]
                         details = f"Memperbarui baris (id: {original_row.get('id', 'N/A')}, wilayah: {original_row.get('nama_kabupaten_kota', 'N/A')}). Perubahan: {changes}"
-                        write_log(username, "UPDATE", details)
+                        log_entries.append((username, "UPDATE", details))
 
                 for new_row_data in added_changes:
                         details = f"Mencoba membuat baris baru. Data mentah: {new_row_data}"
-                        write_log(username, "CREATE_ATTEMPT", details)
+                        log_entries.append((username, "CREATE_ATTEMPT", details))
+                write_logs(log_entries)
                 
-                # 3. FIX: Isi data yang nonaktif untuk admin daerah
+                # 3. FIX: Isi data yang nonaktif untuk admin daerah (baris baru)
+                region_defaults = {}
                 if st.session_state.role == "daerah":
                     region_code = st.session_state.region_code
                     
@@ -1240,7 +1497,7 @@ def render_admin_panel():
                         satuan_default = df_display['satuan'].iloc[0]
                     elif not df_full.empty:
                         # Jika admin daerah belum punya data, coba cari infonya dari df_full
-                        region_info = df_full[df_full['kode_kabupaten_kota'] == region_code]
+                        region_info = df_full[df_full['kode_kabupaten_kota'] == int(region_code)]
                         if not region_info.empty:
                             nama_daerah = region_info['nama_kabupaten_kota'].iloc[0]
                             nama_prov = region_info['nama_provinsi'].iloc[0]
@@ -1249,36 +1506,31 @@ def render_admin_panel():
                         else: # Jika kode tidak ada di df_full, pakai default
                             nama_daerah = f"Wilayah {region_code}"
                             nama_prov = "JAWA BARAT"
-                            kode_prov = "32"
+                            kode_prov = 32
                             satuan_default = "KASUS"
                     else:
                         # Jika df_full juga kosong (awal), hardcode
                         nama_daerah = f"Wilayah {region_code}"
                         nama_prov = "JAWA BARAT"
-                        kode_prov = "32"
+                        kode_prov = 32
                         satuan_default = "KASUS"
 
-                    # Isi nilai NaN/None di kolom nonaktif HANYA untuk baris baru
-                    # st.data_editor akan mengisi NaN untuk kolom nonaktif saat baris baru dibuat
-                    df_from_editor['kode_kabupaten_kota'] = df_from_editor['kode_kabupaten_kota'].fillna(region_code)
-                    df_from_editor['nama_kabupaten_kota'] = df_from_editor['nama_kabupaten_kota'].fillna(nama_daerah)
-                    df_from_editor['kode_provinsi'] = df_from_editor['kode_provinsi'].fillna(kode_prov)
-                    df_from_editor['nama_provinsi'] = df_from_editor['nama_provinsi'].fillna(nama_prov)
-                    df_from_editor['satuan'] = df_from_editor['satuan'].fillna(satuan_default)
-
-                # 4. Gabungkan kembali dengan data wilayah lain
-                if st.session_state.role == "master":
-                    final_df_to_save = df_from_editor
-                else:
-                    # Ambil data wilayah lain dari df_full (data SEBELUM diedit)
-                    other_regions_data = df_full[df_full['kode_kabupaten_kota'] != st.session_state.region_code]
-                    # Gabungkan data wilayah lain + data baru dari editor
-                    final_df_to_save = pd.concat([other_regions_data, df_from_editor], ignore_index=True)
+                    # Kolom nonaktif pada baris baru dikirim kosong oleh st.data_editor
+                    region_defaults = {
+                        'kode_kabupaten_kota': int(region_code),
+                        'nama_kabupaten_kota': nama_daerah,
+                        'kode_provinsi': kode_prov,
+                        'nama_provinsi': nama_prov,
+                        'satuan': satuan_default,
+                    }
+
+                # 4. Ubah state editor menjadi UPSERT/DELETE per baris
+                # (data wilayah lain tidak perlu disentuh sama sekali)
+                upserts, deleted_ids = editor_changes_to_records(df_display, editor_state, region_defaults)
 
-                # 5. Simpan ke file
-                save_data(final_df_to_save, DATA_FILE_PATH)
+                # 5. Simpan ke database
+                save_changes(upserts, deleted_ids)
                 st.success("Perubahan berhasil disimpan!")
-                st.cache_data.clear() 
                 st.rerun()
 
             except Exception as e:
@@ -1298,19 +1550,13 @@ def render_admin_panel():
             else:
                 try:
                     rows_to_delete = edited_df[edited_df["pilih_hapus"] == True]
-                    for index, row_data in rows_to_delete.iterrows():
-                        details = f"Menghapus baris (id: {row_data.get('id', 'N/A')}, wilayah: {row_data.get('nama_kabupaten_kota', 'N/A')}, tahun: {row_data.get('tahun', 'N/A')})"
-                        write_log(username, "DELETE", details)
+                    write_logs(
+                        (username, "DELETE", f"Menghapus baris (id: {row_data.get('id', 'N/A')}, wilayah: {row_data.get('nama_kabupaten_kota', 'N/A')}, tahun: {row_data.get('tahun', 'N/A')})")
+                        for row_data in rows_to_delete.to_dict('records')
+                    )
                     
-                    if st.session_state.role == "master":
-                        final_df_to_save = rows_to_keep
-                    else:
-                        other_regions_data = df_full[df_full['kode_kabupaten_kota'] != st.session_state.region_code]
-                        final_df_to_save = pd.concat([other_regions_data, rows_to_keep], ignore_index=True)
-                    
-                    save_data(final_df_to_save, DATA_FILE_PATH)
+                    save_changes([], rows_to_delete['id'].tolist())
                     st.success("Baris yang dipilih berhasil dihapus!")
-                    st.cache_data.clear() 
                     st.rerun()
 
                 except Exception as e:
@@ -1319,48 +1565,59 @@ def render_admin_panel():
     # --- START MODIFIKASI (SESUAI PERMINTAAN) ---
     if st.session_state.role == "master":
         st.markdown("---")
+        with st.expander("📥 Import Ulang Data dari CSV"):
+            # Database adalah sumber data; CSV hanya seed awal dan tidak
+            # pernah di-import ulang otomatis
+            st.warning(
+                f"Seluruh isi database akan diganti dengan isi `{DATA_FILE_PATH}`. "
+                "Semua perubahan (edit/tambah/hapus) yang tidak ada di CSV akan hilang."
+            )
+            confirm_reimport = st.checkbox("Saya mengerti, timpa database dengan isi CSV", key="confirm_reimport")
+            if st.button("📥 Import Ulang", disabled=not confirm_reimport, key="reimport_csv"):
+                if reimport_data(DATA_FILE_PATH):
+                    write_log(st.session_state.username, "REIMPORT", f"Database di-import ulang dari {DATA_FILE_PATH}.")
+                    st.success("Data berhasil di-import ulang dari CSV.")
+                    st.rerun()
+        
         st.header("📜 Log Aktivitas Admin")
         
         if st.button("🔄 Muat Ulang Log"):
-            st.cache_data.clear()
+            # Paksa baca ulang log saja (mis. jika file diubah dari luar aplikasi)
+            bump_generation(LOG_GENERATION)
             st.rerun()
-            
-        log_df = load_logs(LOG_FILE_PATH)
         
-        if log_df.empty:
-            st.info("Belum ada aktivitas yang tercatat.")
-        else:
-            # Definisikan kategori aksi
-            data_actions = ["UPDATE", "CREATE_ATTEMPT", "DELETE"]
-            auth_actions = ["LOGIN", "LOGOUT"]
-            
-            # Filter DataFrame berdasarkan kategori
-            data_log_df = log_df[log_df['action'].isin(data_actions)].sort_values(by="timestamp", ascending=False)
-            auth_log_df = log_df[log_df['action'].isin(auth_actions)].sort_values(by="timestamp", ascending=False)
-            
-            # 1. Tampilkan Log Aktivitas Perubahan Data
-            st.subheader("1. Log Aktivitas Perubahan Data (CRUD)")
-            if data_log_df.empty:
-                st.info("Belum ada aktivitas perubahan data (tambah, edit, hapus) yang tercatat.")
-            else:
-                st.dataframe(
-                    data_log_df,
-                    use_container_width=True,
-                    height=300
-                )
-            
-            st.markdown("<br>", unsafe_allow_html=True) # Memberi jarak
-            
-            # 2. Tampilkan Log Aktivitas Login Admin
-            st.subheader("2. Log Aktivitas Login & Logout")
-            if auth_log_df.empty:
-                st.info("Belum ada aktivitas login atau logout yang tercatat.")
-            else:
-                st.dataframe(
-                    auth_log_df,
-                    use_container_width=True,
-                    height=300
-                )
+        # Tulis antrean log yang belum di-flush agar aktivitas terbaru ikut tampil
+        get_log_writer().flush()
+        
+        # Filter username memakai index (username, timestamp) di database log
+        user_options = ["Semua"] + load_log_usernames(get_generation(LOG_GENERATION))
+        selected_user = st.selectbox("Filter Username", user_options, key="log_username")
+        log_username = None if selected_user == "Semua" else selected_user
+        
+        # Definisikan kategori aksi
+        data_actions = ("UPDATE", "CREATE_ATTEMPT", "DELETE", "REIMPORT")
+        auth_actions = ("LOGIN", "LOGOUT")
+        
+        # 1. Tampilkan Log Aktivitas Perubahan Data
+        st.subheader("1. Log Aktivitas Perubahan Data (CRUD)")
+        render_log_page(
+            data_actions, log_username, "log_data",
+            "Belum ada aktivitas perubahan data (tambah, edit, hapus) yang tercatat."
+        )
+        
+        st.markdown("<br>", unsafe_allow_html=True) # Memberi jarak
+        
+        # 2. Tampilkan Log Aktivitas Login Admin
+        st.subheader("2. Log Aktivitas Login & Logout")
+        render_log_page(
+            auth_actions, log_username, "log_auth",
+            "Belum ada aktivitas login atau logout yang tercatat."
+        )
+        
+        # 3. Profiling hot path rerun (semua.py / dashboard.py)
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.subheader("3. Profiling Rerun")
+        render_profiling_panel()
     # --- END MODIFIKASI ---
     
     st.markdown("---")
@@ -1407,7 +1664,6 @@ def main():
                         st.session_state.role = role
                         st.session_state.username = username
                         st.session_state.region_code = region_code
-                        st.cache_data.clear() 
                         st.rerun()
                     else:
                         st.error("Username atau Password salah!")
@@ -1420,7 +1676,6 @@ def main():
             
             if st.button("Masuk sebagai Guest", use_container_width=True, type="secondary"):
                 # Logika untuk login sebagai guest
-                init_log_file(LOG_FILE_PATH)
                 write_log("guest", "LOGIN", "Pengguna 'guest' berhasil login.")
                 
                 st.session_state.logged_in = True
@@ -1428,7 +1683,6 @@ def main():
                 st.session_state.username = "guest"
                 st.session_state.region_code = None
                 
-                st.cache_data.clear()
                 st.rerun()
 
     else:
@@ -1445,4 +1699,5 @@ def main():
 if __name__ == "__main__":
     # Pastikan file .env dimuat jika ada
     load_dotenv() 
-    main()
\ No newline at end of file
+    with get_profiler().rerun("semua", profile_session_id()):
+        main()
\ No newline at end of file
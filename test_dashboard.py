@@ -124,7 +124,7 @@ def test_parsing_utils():
     print_header("TEST 4: Parsing Utils")
     
     try:
-        from utils_parsing import DBDDataParser, quick_load_and_validate
+        from utils_parsing import DBDDataParser, quick_load_and_validate, calculate_region_growth
         
         parser = DBDDataParser('data_dbd_sample.csv')
         df = parser.load_csv()
@@ -149,6 +149,16 @@ def test_parsing_utils():
         else:
             print_warning(f"Validation warnings: {errors2}")
         
+        # Test growth per wilayah (vectorized) terhadap perhitungan per wilayah
+        growth = calculate_region_growth(df, 'nama_provinsi')
+        for prov, row in growth.iterrows():
+            prov_data = df[df['nama_provinsi'] == prov].groupby('tahun')['jumlah_kasus'].sum()
+            expected = (prov_data.iloc[-1] - prov_data.iloc[0]) / prov_data.iloc[0] * 100 if prov_data.iloc[0] > 0 else 0
+            if abs(row['growth_pct'] - expected) > 1e-9:
+                print_error(f"Growth {prov} salah: {row['growth_pct']} != {expected}")
+                return False
+        print_success(f"calculate_region_growth works: {len(growth)} provinsi")
+        
         return True
     
     except Exception as e:
@@ -270,6 +280,1398 @@ def test_dashboard_components():
         print_error(f"Dashboard component error: {str(e)}")
         return False
 
+def test_storage_snapshot():
+    """Test snapshot kolumnar utils_storage.py"""
+    print_header("TEST 8: Storage Snapshot")
+    
+    try:
+        import shutil
+        import tempfile
+        from utils_storage import load_table, snapshot_path_for
+        
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            csv_path = os.path.join(tmp_dir, 'data.csv')
+            shutil.copy('data_dbd_sample.csv', csv_path)
+            
+            df_first = load_table(csv_path)
+            if not os.path.exists(snapshot_path_for(csv_path)):
+                print_error("Snapshot tidak dibuat")
+                return False
+            print_success(f"Snapshot dibuat: {len(df_first)} rows")
+            
+            df_second = load_table(csv_path)
+            if not df_second.equals(df_first):
+                print_error("Isi snapshot berbeda dengan CSV")
+                return False
+            print_success("Snapshot dibaca ulang dengan isi identik")
+            
+            # Tambah satu baris -> ukuran/mtime berubah -> snapshot harus dibangun ulang
+            with open(csv_path, 'a', encoding='utf-8') as f:
+                f.write("11,Aceh,1101,Kab. Simeulue,70,Kasus,2024\n")
+            df_third = load_table(csv_path)
+            if len(df_third) != len(df_first) + 1:
+                print_error("Snapshot tidak diperbarui setelah CSV berubah")
+                return False
+            print_success("Snapshot diperbarui setelah CSV berubah")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Storage snapshot error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_case_store():
+    """Test penyimpanan per-baris DBDCaseStore"""
+    print_header("TEST 9: Case Store (SQLite)")
+    
+    try:
+        import shutil
+        import tempfile
+        from utils_storage import DBDCaseStore, editor_changes_to_records
+        
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = DBDCaseStore(os.path.join(tmp_dir, 'data.db'))
+            store.sync_from_csv('data_dbd.csv')
+            df = store.load_frame()
+            print_success(f"Database di-seed dari CSV: {len(df)} rows")
+            
+            if store.sync_from_csv('data_dbd.csv'):
+                print_error("CSV yang sama di-import ulang")
+                return False
+            
+            df_display = df.head(3).copy()
+            df_display.insert(0, "pilih_hapus", False)
+            editor_state = {
+                "edited_rows": {0: {"jumlah_kasus": 12345}},
+                "added_rows": [{"jumlah_kasus": 7, "tahun": 2030}],
+                "deleted_rows": [2]
+            }
+            defaults = {'kode_kabupaten_kota': 3202, 'nama_kabupaten_kota': 'KABUPATEN SUKABUMI'}
+            upserts, deleted_ids = editor_changes_to_records(df_display, editor_state, defaults)
+            store.apply_changes(upserts, deleted_ids)
+            
+            df_after = store.load_frame()
+            edited_id = df_display.iloc[0]['id']
+            deleted_id = df_display.iloc[2]['id']
+            if df_after.loc[df_after['id'] == edited_id, 'jumlah_kasus'].iloc[0] != 12345:
+                print_error("UPDATE tidak tersimpan")
+                return False
+            if (df_after['id'] == deleted_id).any():
+                print_error("DELETE tidak tersimpan")
+                return False
+            new_rows = df_after[df_after['tahun'] == 2030]
+            if len(new_rows) != 1 or new_rows['kode_kabupaten_kota'].iloc[0] != 3202:
+                print_error("INSERT baris baru tidak tersimpan dengan benar")
+                return False
+            print_success("UPSERT/DELETE per baris tersimpan")
+            
+            # CSV berubah (mis. git pull / touch) tidak boleh menghapus perubahan admin
+            csv_path = os.path.join(tmp_dir, 'data_dbd.csv')
+            shutil.copy('data_dbd.csv', csv_path)
+            os.utime(csv_path, ns=(0, 0))
+            if store.sync_from_csv(csv_path) or not store.load_frame().equals(df_after):
+                print_error("CSV yang berubah meng-import ulang database berisi perubahan admin")
+                return False
+            if not store.sync_from_csv(csv_path, force=True) or len(store.load_frame()) != len(df):
+                print_error("Import ulang eksplisit gagal")
+                return False
+            print_success("CSV berubah tidak menimpa database; import ulang hanya lewat force=True")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Case store error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_audit_writer():
+    """Test penulisan audit log ber-buffer"""
+    print_header("TEST 10: Audit Log Writer")
+    
+    try:
+        import shutil
+        import tempfile
+        from utils_audit import AuditLogWriter
+        
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            log_path = os.path.join(tmp_dir, 'admin_log.csv')
+            flushed = []
+            writer = AuditLogWriter(log_path, flush_interval=60, on_flush=flushed.append)
+            writer.write('masteradmin', 'LOGIN', 'Login berhasil')
+            writer.write_many(('admin3202', 'DELETE', f'Menghapus baris (id: {i})') for i in range(100))
+            
+            if os.path.exists(log_path):
+                print_error("Log ditulis sebelum flush")
+                return False
+            
+            if writer.flush() != 101 or flushed != [101]:
+                print_error("Flush tidak menulis seluruh antrean dalam satu batch")
+                return False
+            
+            writer.write('masteradmin', 'LOGOUT', 'Logout, detail "dengan koma, kutip"')
+            writer.close()
+            
+            log_df = pd.read_csv(log_path)
+            if len(log_df) != 102 or list(log_df.columns) != ['timestamp', 'username', 'action', 'details']:
+                print_error("Isi file log tidak sesuai")
+                return False
+            if log_df['details'].iloc[-1] != 'Logout, detail "dengan koma, kutip"':
+                print_error("Quoting CSV rusak")
+                return False
+            print_success(f"Audit log batch tersimpan: {len(log_df)} rows")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Audit writer error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_audit_store():
+    """Test penyimpanan audit log ber-index"""
+    print_header("TEST 11: Audit Log Store")
+    
+    try:
+        import shutil
+        import tempfile
+        from datetime import date
+        from utils_audit import AuditLogStore, AuditLogWriter
+        
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = AuditLogStore(os.path.join(tmp_dir, 'admin_log.db'))
+            imported = store.import_csv('admin_log.csv')
+            if store.import_csv('admin_log.csv') != 0:
+                print_error("Log CSV di-import lebih dari sekali")
+                return False
+            print_success(f"Log CSV di-import sekali: {imported} rows")
+            
+            store.append([
+                (f"2026-01-{day:02d} 08:00:00", 'admin3202', 'UPDATE', f'edit {day}') for day in range(1, 31)
+            ])
+            writer = AuditLogWriter(os.path.join(tmp_dir, 'admin_log.db'), flush_interval=60, store=store)
+            writer.write('admin3202', 'LOGOUT', 'logout')
+            writer.close()
+            
+            if store.count() != imported + 31:
+                print_error("Jumlah log tidak sesuai")
+                return False
+            
+            latest = store.recent(1)
+            if latest['action'].iloc[0] != 'LOGOUT':
+                print_error("recent() tidak mengembalikan log terbaru")
+                return False
+            
+            page_2 = store.query(actions=['UPDATE'], username='admin3202', limit=10, offset=10)
+            if len(page_2) != 10 or page_2['details'].iloc[0] != 'edit 20':
+                print_error("Pagination per user/aksi salah")
+                return False
+            
+            in_range = store.count(start=date(2026, 1, 10), end=date(2026, 1, 12))
+            if in_range != 3:
+                print_error(f"Query rentang waktu salah: {in_range}")
+                return False
+            print_success("Query N terbaru, per user/aksi, dan rentang waktu OK")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Audit store error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_aggregate_cube():
+    """Test cube agregat wilayah x tahun"""
+    print_header("TEST 12: Aggregate Cube")
+    
+    try:
+        from utils_aggregate import DBDAggregateCube, as_cube
+        
+        df = pd.read_csv('data_dbd_sample.csv')
+        cube = DBDAggregateCube(df)
+        print_success(f"Cube dibuat: {len(cube.cells)} cells dari {len(df)} rows")
+        
+        if not cube.by_year().equals(df.groupby('tahun')['jumlah_kasus'].sum().rename('jumlah_kasus')):
+            print_error("Rollup per tahun berbeda dari groupby langsung")
+            return False
+        
+        expected_top = df.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(3)
+        if cube.top_regions(3, 'nama_provinsi').tolist() != expected_top.tolist():
+            print_error("Top provinsi berbeda dari groupby langsung")
+            return False
+        
+        summary = cube.region_year_summary('nama_provinsi')
+        expected = df.groupby(['nama_provinsi', 'tahun'])['jumlah_kasus'].agg(['sum', 'mean', 'count'])
+        if not (summary[['sum', 'mean', 'count']].round(2).values == expected.round(2).values).all():
+            print_error("Summary wilayah x tahun berbeda")
+            return False
+        print_success("Rollup tahun, top wilayah, dan summary sesuai")
+        
+        province = df['nama_provinsi'].iloc[0]
+        filtered = cube.filter('nama_provinsi', [province])
+        if filtered.by_year().sum() != df.loc[df['nama_provinsi'] == province, 'jumlah_kasus'].sum():
+            print_error("Filter cube per provinsi salah")
+            return False
+        if as_cube(cube) is not cube:
+            print_error("as_cube membangun ulang cube")
+            return False
+        print_success(f"Heatmap matrix: {cube.heatmap_matrix(15).shape}")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Aggregate cube error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_response_cache():
+    """Test cache respons Gemini di disk"""
+    print_header("TEST 13: Gemini Response Cache")
+    
+    try:
+        import shutil
+        import tempfile
+        from utils_ai_integration import GeminiResponseCache, cached_generate
+        
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            cache = GeminiResponseCache(cache_dir=tmp_dir, max_entries=2)
+            calls = []
+            
+            def fake_generate(prompt):
+                calls.append(prompt)
+                return f"respons untuk {prompt}"
+            
+            first = cached_generate('gemini-test', 'prompt A', fake_generate, cache)
+            second = cached_generate('gemini-test', 'prompt A', fake_generate, cache)
+            if first != second or len(calls) != 1:
+                print_error("Prompt identik memanggil API lagi")
+                return False
+            
+            cached_generate('gemini-lain', 'prompt A', fake_generate, cache)
+            if len(calls) != 2:
+                print_error("Model berbeda memakai entri cache yang sama")
+                return False
+            print_success("Cache hit untuk (model, prompt) identik")
+            
+            cached_generate('gemini-test', 'prompt B', fake_generate, cache)
+            if len([n for n in os.listdir(tmp_dir) if n.endswith('.json')]) != 2:
+                print_error("Eviction LRU tidak membatasi jumlah entri")
+                return False
+            
+            def failing_generate(prompt):
+                raise RuntimeError("quota habis")
+            
+            try:
+                cached_generate('gemini-test', 'prompt C', failing_generate, cache)
+            except RuntimeError:
+                pass
+            if cache.get('gemini-test', 'prompt C') is not None:
+                print_error("Error ikut di-cache")
+                return False
+            
+            expired = GeminiResponseCache(cache_dir=tmp_dir, ttl_seconds=-1)
+            if expired.get('gemini-test', 'prompt B') is not None:
+                print_error("Entri kadaluarsa masih dikembalikan")
+                return False
+            print_success("Eviction LRU, TTL, dan error tidak di-cache OK")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Response cache error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+class FakeGeminiModel:
+    """Model palsu dengan interface generate_content seperti genai.GenerativeModel"""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+    
+    def generate_content(self, prompt, stream=False):
+        from types import SimpleNamespace
+        self.calls += 1
+        if stream:
+            return iter([SimpleNamespace(text=chunk) for chunk in self.chunks])
+        return SimpleNamespace(text="".join(self.chunks))
+
+def test_streaming_insights():
+    """Test streaming respons analyzer dengan model palsu"""
+    print_header("TEST 14: Streaming Insights")
+    
+    try:
+        import shutil
+        import tempfile
+        from utils_ai_integration import GeminiDBDAnalyzer, GeminiResponseCache
+        
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            df = pd.read_csv('data_dbd_sample.csv')
+            fake = FakeGeminiModel(["## Descriptive", " Analytics", "\nKasus meningkat."])
+            analyzer = GeminiDBDAnalyzer(
+                api_key='test', model='fake-model', cache=GeminiResponseCache(cache_dir=tmp_dir), client=fake
+            )
+            
+            chunks = list(analyzer.generate_executive_report(df, stream=True))
+            if chunks != fake.chunks:
+                print_error(f"Chunk stream tidak sesuai: {chunks}")
+                return False
+            if analyzer.conversation_history[-1]['response'] != "".join(fake.chunks):
+                print_error("History tidak berisi respons lengkap")
+                return False
+            print_success(f"Stream menghasilkan {len(chunks)} chunk")
+            
+            cached = analyzer.generate_executive_report(df)
+            if cached != "".join(fake.chunks) or fake.calls != 1:
+                print_error("Respons stream tidak di-cache untuk mode biasa")
+                return False
+            print_success("Respons stream tersimpan di cache")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Streaming error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_batch_analysis():
+    """Test batch analisis paralel dengan backoff rate limit"""
+    print_header("TEST 15: Batch Analysis")
+    
+    try:
+        import time
+        import shutil
+        import tempfile
+        import threading
+        from types import SimpleNamespace
+        from google.api_core.exceptions import ResourceExhausted
+        from utils_ai_integration import GeminiDBDAnalyzer, GeminiResponseCache
+        
+        class SlowRateLimitedModel:
+            """Model palsu: lambat, dan request pertama terkena rate limit"""
+            
+            def __init__(self):
+                self.lock = threading.Lock()
+                self.calls = 0
+            
+            def generate_content(self, prompt, stream=False):
+                with self.lock:
+                    self.calls += 1
+                    first_call = self.calls == 1
+                if first_call:
+                    raise ResourceExhausted("429 quota exceeded")
+                time.sleep(0.2)
+                return SimpleNamespace(text=f"analisis {len(prompt)}")
+        
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            df = pd.read_csv('data_dbd_sample.csv')
+            model = SlowRateLimitedModel()
+            analyzer = GeminiDBDAnalyzer(
+                api_key='test', model='fake-model', cache=GeminiResponseCache(cache_dir=tmp_dir),
+                client=model, backoff_base=0.01
+            )
+            kabkots = df.loc[df['nama_provinsi'] == 'DKI Jakarta', 'nama_kabupaten_kota'].unique().tolist()
+            
+            start = time.perf_counter()
+            results = dict(analyzer.analyze_areas_batch(df, 'DKI Jakarta', max_workers=len(kabkots)))
+            elapsed = time.perf_counter() - start
+            
+            if set(results) != set(kabkots) or any(r.startswith('Error') for r in results.values()):
+                print_error(f"Hasil batch tidak lengkap: {results}")
+                return False
+            if len(analyzer.conversation_history) != len(kabkots):
+                print_error("History batch tidak lengkap")
+                return False
+            if elapsed > 0.2 * len(kabkots):
+                print_error(f"Batch tidak berjalan paralel: {elapsed:.2f}s")
+                return False
+            print_success(f"{len(kabkots)} analisis wilayah selesai paralel dalam {elapsed:.2f}s (termasuk retry 429)")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Batch analysis error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_case_schema():
+    """Test skema dtype ringkas untuk tabel kasus"""
+    print_header("TEST 16: Case Schema")
+    
+    try:
+        from utils_schema import CATEGORY_COLUMNS, apply_case_schema, to_editable_frame
+        
+        raw = pd.read_csv('data_dbd_sample.csv')
+        df = apply_case_schema(raw)
+        
+        for col in CATEGORY_COLUMNS:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                print_error(f"Kolom {col} bukan categorical")
+                return False
+        expected = {'tahun': 'int16', 'jumlah_kasus': 'Int32', 'kode_provinsi': 'int16', 'kode_kabupaten_kota': 'int32'}
+        for col, dtype in expected.items():
+            if str(df[col].dtype) != dtype:
+                print_error(f"Kolom {col} bertipe {df[col].dtype}, seharusnya {dtype}")
+                return False
+        print_success("Kolom nama/satuan categorical, tahun/kode/jumlah_kasus integer ringkas")
+        
+        raw_bytes = raw.memory_usage(deep=True).sum()
+        schema_bytes = df.memory_usage(deep=True).sum()
+        if schema_bytes >= raw_bytes:
+            print_error("Skema ringkas tidak mengurangi memori")
+            return False
+        print_success(f"Memori: {raw_bytes:,} -> {schema_bytes:,} bytes")
+        
+        by_region = df.groupby('nama_provinsi', observed=True)['jumlah_kasus'].sum()
+        if by_region.tolist() != raw.groupby('nama_provinsi')['jumlah_kasus'].sum().tolist():
+            print_error("Groupby categorical berbeda dari groupby string")
+            return False
+        
+        with_null = apply_case_schema(pd.DataFrame({'tahun': [2020, None], 'jumlah_kasus': ['5', 'x']}))
+        if str(with_null['tahun'].dtype) != 'Int16' or with_null['jumlah_kasus'].isna().sum() != 1:
+            print_error("Nilai kosong/tidak valid tidak ditangani nullable dtype")
+            return False
+        
+        editable = to_editable_frame(df)
+        if any(isinstance(dtype, pd.CategoricalDtype) for dtype in editable.dtypes):
+            print_error("to_editable_frame masih menyisakan kolom categorical")
+            return False
+        print_success("Nullable dtype dan frame editor sesuai")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Case schema error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_chunked_ingest():
+    """Test ingest CSV per potongan dengan validasi per baris"""
+    print_header("TEST 17: Chunked Ingest")
+    
+    try:
+        import io
+        from utils_parsing import ingest_csv_chunks
+        
+        raw = pd.read_csv('data_dbd_sample.csv')
+        df, issues = ingest_csv_chunks('data_dbd_sample.csv', chunksize=10)
+        if len(df) != len(raw) or issues:
+            print_error(f"Ingest data valid gagal: {len(df)} rows, {issues}")
+            return False
+        if not isinstance(df['nama_kabupaten_kota'].dtype, pd.CategoricalDtype):
+            print_error("Potongan tidak digabung sebagai categorical")
+            return False
+        if df['jumlah_kasus'].sum() != raw['jumlah_kasus'].sum():
+            print_error("Total kasus berbeda setelah ingest per potongan")
+            return False
+        print_success(f"{len(df)} rows di-ingest per 10 baris, skema tetap categorical")
+        
+        bad = raw.astype({'jumlah_kasus': object})
+        bad.loc[3, 'jumlah_kasus'] = 'abc'
+        bad.loc[25, 'tahun'] = 1990
+        df_bad, issues = ingest_csv_chunks(io.StringIO(bad.to_csv(index=False)), chunksize=10)
+        expected = ['Baris 5: kolom jumlah_kasus bukan angka', 'Baris 27: tahun di luar range 2000-2100']
+        if issues != expected:
+            print_error(f"Catatan validasi tidak sesuai: {issues}")
+            return False
+        print_success(f"Catatan validasi per baris: {issues}")
+        
+        try:
+            ingest_csv_chunks(io.StringIO(raw.drop(columns=['tahun']).to_csv(index=False)))
+            print_error("Kolom wajib yang hilang tidak terdeteksi")
+            return False
+        except ValueError:
+            print_success("Kolom wajib yang hilang ditolak")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Chunked ingest error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_validation_engine():
+    """Test engine validasi satu pass"""
+    print_header("TEST 18: Validation Engine")
+    
+    try:
+        from utils_parsing import DBDDataParser
+        from utils_validation import DBDValidationEngine
+        
+        raw = pd.read_csv('data_dbd_sample.csv').astype({'jumlah_kasus': object})
+        raw.loc[3, 'jumlah_kasus'] = 'abc'
+        raw.loc[5, 'jumlah_kasus'] = -4
+        raw = pd.concat([raw, raw.iloc[[1, 2]]], ignore_index=True)
+        
+        df_clean, report = DBDValidationEngine().run(raw)
+        rules = {issue['rule']: issue for issue in report.issues}
+        if set(rules) != {'duplicate_rows', 'not_numeric_jumlah_kasus', 'negative_cases'}:
+            print_error(f"Rule yang terdeteksi tidak sesuai: {list(rules)}")
+            return False
+        if rules['duplicate_rows']['rows'] != [len(raw) - 2, len(raw) - 1] or rules['negative_cases']['severity'] != 'warning':
+            print_error("Contoh baris / severity di laporan salah")
+            return False
+        if report.is_valid:
+            print_error("Data dengan error dianggap valid")
+            return False
+        print_success(f"Laporan: {[(i['rule'], i['count'], i['rows']) for i in report.issues]}")
+        
+        parser = DBDDataParser(file_path=None)
+        parser.df = raw.copy()
+        legacy = parser.clean_data()
+        if not df_clean.reset_index(drop=True).astype(str).equals(legacy.reset_index(drop=True).astype(str)):
+            print_error("Frame bersih berbeda dari clean_data")
+            return False
+        print_success(f"Frame bersih sama dengan clean_data ({len(df_clean)} rows)")
+        
+        _, missing = DBDValidationEngine().run(raw.drop(columns=['tahun']))
+        if missing.issues[0]['rule'] != 'missing_columns':
+            print_error("Kolom wajib yang hilang tidak dilaporkan")
+            return False
+        print_success("Kolom wajib yang hilang dilaporkan")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Validation engine error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_duplicate_detection():
+    """Test deteksi duplikat berbasis natural key"""
+    print_header("TEST 19: Duplicate Detection")
+    
+    try:
+        from utils_parsing import DBDDataParser
+        from utils_validation import find_duplicates, natural_key
+        
+        raw = pd.read_csv('data_dbd.csv')
+        exact_copy = raw.iloc[[0]].assign(id=raw['id'].max() + 1)
+        conflict = raw.iloc[[1]].assign(id=raw['id'].max() + 2, jumlah_kasus=raw['jumlah_kasus'].iloc[1] + 10)
+        df = pd.concat([raw, exact_copy, conflict], ignore_index=True)
+        
+        if natural_key(df) != ['kode_kabupaten_kota', 'tahun']:
+            print_error(f"Natural key salah: {natural_key(df)}")
+            return False
+        report = find_duplicates(df)
+        if report.exact.nonzero()[0].tolist() != [len(raw)] or report.conflicting.nonzero()[0].tolist() != [len(raw) + 1]:
+            print_error("Duplikat identik / konflik tidak terdeteksi dengan benar")
+            return False
+        print_success("Duplikat identik (beda id) dan konflik key dipisahkan")
+        
+        # Collision hash (semua baris ber-hash sama) tidak boleh membuat
+        # record berbeda dianggap duplikat
+        import numpy as np
+        import utils_validation
+        original_hash = utils_validation.pd.util.hash_pandas_object
+        utils_validation.pd.util.hash_pandas_object = lambda obj, index=False: pd.Series(np.zeros(len(obj), dtype='uint64'))
+        try:
+            collided = find_duplicates(df)
+        finally:
+            utils_validation.pd.util.hash_pandas_object = original_hash
+        if not (np.array_equal(collided.exact, report.exact) and np.array_equal(collided.conflicting, report.conflicting)):
+            print_error("Collision hash membuat record berbeda dianggap duplikat")
+            return False
+        print_success("Kandidat hash sama dikonfirmasi dengan perbandingan nilai")
+        
+        parser = DBDDataParser(file_path=None)
+        parser.df = df
+        is_valid, errors = parser.validate_structure()
+        _, warnings = parser.validate_business_rules()
+        if is_valid or len(errors) != 1 or not any('isi berbeda' in warning for warning in warnings):
+            print_error(f"Duplikat identik harus error dan konflik key warning: {errors} / {warnings}")
+            return False
+        if parser.find_duplicates() is not parser.find_duplicates():
+            print_error("Hasil hash duplikat tidak di-cache")
+            return False
+        df_clean = parser.clean_data()
+        if len(df_clean) != len(df) - 1:
+            print_error("clean_data tidak membuang duplikat identik")
+            return False
+        print_success(f"validate_structure + clean_data berbagi satu hash pass ({len(df)} -> {len(df_clean)} rows)")
+        
+        # Koreksi data (key sama, id baru, isi berbeda) hanya warning: file tetap valid
+        import shutil
+        import tempfile
+        from utils_parsing import quick_load_and_validate
+        work_dir = tempfile.mkdtemp()
+        try:
+            csv_path = os.path.join(work_dir, 'data_dbd.csv')
+            pd.concat([raw, conflict], ignore_index=True).to_csv(csv_path, index=False)
+            df_loaded, is_valid, messages = quick_load_and_validate(csv_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if not is_valid or df_loaded is None or len(df_loaded) != len(raw) + 1:
+            print_error(f"File dengan konflik key seharusnya tetap valid: {messages}")
+            return False
+        corrected = DBDDataParser(file_path=None)
+        corrected.df = pd.concat([raw, conflict], ignore_index=True)
+        conflict_key = f"{conflict['kode_kabupaten_kota'].iloc[0]}/{conflict['tahun'].iloc[0]}"
+        if not any(conflict_key in warning for warning in corrected.validate_and_clean().warnings):
+            print_error("Warning konflik key tidak menyebut contoh key")
+            return False
+        print_success(f"Konflik key dilaporkan sebagai warning ({conflict_key}), load tetap valid")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Duplicate detection error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_benchmark_harness():
+    """Test harness benchmark pipeline (ukuran kecil)"""
+    print_header("TEST 20: Benchmark Harness")
+    
+    try:
+        from benchmark_dashboard import BENCHMARKS, compare_results, generate_synthetic_data, run_benchmarks
+        
+        df = generate_synthetic_data(5000)
+        if len(df) != 5000 or not set(['kode_kabupaten_kota', 'tahun', 'minggu']).issubset(df.columns):
+            print_error("Data sintetis tidak sesuai")
+            return False
+        if not df.equals(generate_synthetic_data(5000)):
+            print_error("Data sintetis tidak reproducible")
+            return False
+        print_success(f"Data sintetis: {len(df):,} rows, {df['nama_kabupaten_kota'].nunique()} kab/kota")
+        
+        render = [name for name in BENCHMARKS if name.startswith('render.')]
+        if 'render.create_heatmap' not in render or 'ai.prepare_data_summary' not in BENCHMARKS:
+            print_error("Benchmark render/summary tidak terdaftar")
+            return False
+        
+        report = run_benchmarks([1000], repeat=1, only=['aggregate', 'ai'])
+        names = {result['name'] for result in report['results']}
+        if names != {'aggregate.aggregate_by_province_year', 'aggregate.calculate_growth_rate', 'ai.prepare_data_summary'}:
+            print_error(f"Hasil benchmark tidak lengkap: {names}")
+            return False
+        print_success(f"{len(BENCHMARKS)} benchmark terdaftar ({len(render)} render)")
+        
+        baseline = {'results': [dict(result, best_s=result['best_s'] / 10) for result in report['results']]}
+        if len(compare_results(report, baseline)) != len(report['results']) or compare_results(report, report):
+            print_error("Deteksi regresi terhadap baseline salah")
+            return False
+        print_success("Deteksi regresi terhadap baseline berjalan")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Benchmark harness error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_profiling():
+    """Test profiling span per rerun (sink JSONL sementara)"""
+    print_header("TEST 21: Profiling")
+    
+    try:
+        import tempfile
+        from utils_profiling import Profiler
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = Profiler(sink_path=os.path.join(tmp, 'profile.jsonl'))
+            
+            @profiler.timed('load_data')
+            def load():
+                with profiler.span('parse'):
+                    return 1
+            
+            for _ in range(3):
+                with profiler.rerun('test', 'session-a'):
+                    load()
+                    with profiler.span('filter'):
+                        pass
+            
+            last = profiler.last_rerun('session-a')
+            if list(last['span']) != ['parse', 'load_data', 'filter', 'rerun']:
+                print_error(f"Span rerun terakhir salah: {list(last['span'])}")
+                return False
+            parents = dict(zip(last['span'], last['parent']))
+            if parents['parse'] != 'load_data' or parents['load_data'] != 'rerun':
+                print_error(f"Parent span salah: {parents}")
+                return False
+            print_success(f"Span bersarang tercatat: {len(last)} span per rerun")
+            
+            records = profiler.read_sink()
+            if len(records) != 12 or records['rerun'].nunique() != 3:
+                print_error(f"Sink JSONL tidak lengkap: {len(records)} record")
+                return False
+            print_success(f"Sink JSONL: {len(records)} record dari {records['rerun'].nunique()} rerun")
+            
+            summary = profiler.summary(app='test')
+            if summary.loc['load_data', 'count'] != 3 or not (summary['p95_ms'] >= summary['p50_ms']).all():
+                print_error("Ringkasan p50/p95 salah")
+                return False
+            print_success("Ringkasan p50/p95 per span benar")
+            
+            # Span di luar rerun dan profiler nonaktif tidak mencatat apa pun
+            with profiler.span('luar'):
+                pass
+            disabled = Profiler(sink_path=os.path.join(tmp, 'off.jsonl'), enabled=False)
+            with disabled.rerun('test', 'session-b'):
+                with disabled.span('load_data'):
+                    pass
+            if len(profiler.read_sink()) != 12 or os.path.exists(disabled.sink_path):
+                print_error("Span di luar rerun / profiler nonaktif ikut tercatat")
+                return False
+            print_success("Span di luar rerun dan profiler nonaktif diabaikan")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Profiling error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_trend_figure_budget():
+    """Test trend skala nasional: cap trace, WebGL, dan budget payload"""
+    print_header("TEST 22: Trend Figure Budget")
+    
+    try:
+        from benchmark_dashboard import generate_synthetic_data
+        from utils_schema import apply_case_schema
+        from utils_visualization import (
+            OTHERS_LABEL, build_trend_figure, cap_trend_series,
+            decimate_trend_series, figure_payload_bytes
+        )
+        
+        df = apply_case_schema(generate_synthetic_data(100000))
+        trend = df.groupby(['tahun', 'nama_kabupaten_kota'], observed=True)['jumlah_kasus'].sum().reset_index()
+        n_regions = trend['nama_kabupaten_kota'].nunique()
+        
+        capped = cap_trend_series(trend, 'tahun', 'jumlah_kasus', 'nama_kabupaten_kota', max_traces=10)
+        if capped['nama_kabupaten_kota'].nunique() != 11 or capped['jumlah_kasus'].sum() != trend['jumlah_kasus'].sum():
+            print_error("Cap trace tidak mempertahankan total kasus")
+            return False
+        print_success(f"{n_regions} kab/kota -> 10 + {OTHERS_LABEL} (total kasus sama)")
+        
+        fig = build_trend_figure(trend, 'tahun', 'jumlah_kasus', 'nama_kabupaten_kota', max_traces=10)
+        if len(fig.data) != 11 or fig.data[0].type != 'scattergl' or fig.data[-1].name != OTHERS_LABEL:
+            print_error(f"Figure skala besar tidak di-cap/WebGL: {len(fig.data)} trace {fig.data[0].type}")
+            return False
+        print_success(f"Figure besar: {len(fig.data)} trace Scattergl, {figure_payload_bytes(fig):,} byte")
+        
+        budget = figure_payload_bytes(build_trend_figure(trend, 'tahun', 'jumlah_kasus', 'nama_kabupaten_kota', max_traces=3))
+        fig = build_trend_figure(trend, 'tahun', 'jumlah_kasus', 'nama_kabupaten_kota', byte_budget=budget)
+        if figure_payload_bytes(fig) > budget or fig.data[-1].name != OTHERS_LABEL:
+            print_error("Payload figure melebihi budget")
+            return False
+        print_success(f"Budget {budget:,} byte dipatuhi ({len(fig.data)} trace)")
+        
+        small = trend[trend['nama_kabupaten_kota'].isin(trend['nama_kabupaten_kota'].unique()[:3])]
+        fig = build_trend_figure(small, 'tahun', 'jumlah_kasus', 'nama_kabupaten_kota')
+        if fig.data[0].type != 'bar' or len(fig.data) != 3:
+            print_error("Figure kecil seharusnya tetap bar tanpa cap")
+            return False
+        print_success("Figure kecil tetap grouped bar")
+        
+        # Data bawaan (26 kab/kota, semua terpilih) jauh di bawah budget:
+        # grafik default tetap grouped bar biasa tanpa "Lainnya"
+        import plotly.express as px
+        from utils_aggregate import DBDAggregateCube
+        default_trend = DBDAggregateCube(pd.read_csv('data_dbd.csv')).region_year('nama_kabupaten_kota')
+        fig = build_trend_figure(default_trend, 'tahun', 'jumlah_kasus', 'nama_kabupaten_kota', title='Trend')
+        expected = px.bar(default_trend, x='tahun', y='jumlah_kasus', color='nama_kabupaten_kota', barmode='group', title='Trend', height=500)
+        if fig.to_dict() != expected.to_dict():
+            print_error(f"Grafik default data_dbd.csv berubah: {len(fig.data)} trace {fig.data[0].type}, judul {fig.layout.title.text!r}")
+            return False
+        print_success(f"Grafik default data_dbd.csv tidak berubah ({len(fig.data)} trace bar)")
+        
+        weekly = df.assign(minggu=df['minggu'].astype(int) + (df['tahun'].astype(int) - 2015) * 52)
+        weekly = weekly.groupby(['minggu', 'nama_provinsi'], observed=True)['jumlah_kasus'].sum().reset_index()
+        decimated = decimate_trend_series(weekly, 'minggu', 'jumlah_kasus', 'nama_provinsi', max_points=50)
+        if decimated['minggu'].nunique() > 50 or decimated['jumlah_kasus'].sum() != weekly['jumlah_kasus'].sum():
+            print_error("Decimation sumbu-x salah")
+            return False
+        print_success(f"Decimation: {weekly['minggu'].nunique()} -> {decimated['minggu'].nunique()} titik")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Trend figure error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_figure_cache():
+    """Test cache figure plotly (fingerprint agregat + LRU)"""
+    print_header("TEST 23: Figure Cache")
+    
+    try:
+        import json
+        import plotly.express as px
+        from utils_aggregate import DBDAggregateCube
+        from utils_figure_cache import FigureCache
+        
+        df = pd.read_csv('data_dbd.csv')
+        cache = FigureCache(max_entries=2)
+        calls = []
+        
+        @cache.memoize('trend')
+        def trend(cube, level='nama_kabupaten_kota'):
+            calls.append(level)
+            return px.line(cube.region_year(level), x='tahun', y='jumlah_kasus', color=level)
+        
+        first = trend(DBDAggregateCube(df))
+        second = trend(DBDAggregateCube(df))
+        if len(calls) != 1 or json.loads(first.to_json()) != json.loads(second.to_json()) or first is second:
+            print_error("Cube dengan isi sama seharusnya memakai figure dari cache")
+            return False
+        print_success("Rerun dengan data sama tidak membangun ulang figure")
+        
+        trend(DBDAggregateCube(df), level='nama_provinsi')
+        trend(DBDAggregateCube(df[df['tahun'] != df['tahun'].max()]))
+        if len(calls) != 3:
+            print_error("Parameter/data berbeda seharusnya membangun figure baru")
+            return False
+        print_success("Parameter dan data berbeda menghasilkan kunci berbeda")
+        
+        trend(DBDAggregateCube(df))
+        stats = cache.stats()
+        if len(calls) != 4 or stats['entries'] != 2:
+            print_error(f"Eviction LRU salah: {stats}")
+            return False
+        print_success(f"LRU: {stats['entries']} entri, hit {stats['hits']}, miss {stats['misses']}")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Figure cache error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_figure_export():
+    """Test export batch grafik (ZIP, cache PNG, background worker)"""
+    print_header("TEST 24: Figure Export")
+    
+    try:
+        import io
+        import zipfile
+        import plotly.express as px
+        import utils_export
+        from utils_export import FigureExporter
+        from utils_visualization import DBDVisualizer
+        
+        df = pd.read_csv('data_dbd.csv')
+        exporter = FigureExporter()
+        renders = []
+        
+        # Renderer Plotly diganti agar test tidak butuh Kaleido/Chrome
+        def fake_render(fig):
+            renders.append(fig.layout.title.text)
+            return b'\x89PNG' + fig.layout.title.text.encode('utf-8')
+        exporter._plotly_to_png = fake_render
+        
+        trend = px.line(df.groupby('tahun')['jumlah_kasus'].sum().reset_index(), x='tahun', y='jumlah_kasus', title='trend')
+        first = exporter.render_png(trend)
+        second = exporter.render_png(px.line(df.groupby('tahun')['jumlah_kasus'].sum().reset_index(), x='tahun', y='jumlah_kasus', title='trend'))
+        if first != second or len(renders) != 1:
+            print_error("Figure identik seharusnya memakai PNG dari cache")
+            return False
+        print_success("PNG di-cache berdasarkan hash figure")
+        
+        builds = []
+        def summary():
+            builds.append(1)
+            return DBDVisualizer(df).create_dashboard_summary(year=int(df['tahun'].max()))
+        
+        figures = {'trend_chart': trend, 'dashboard_summary': summary}
+        kaleido_available = utils_export.KALEIDO_AVAILABLE
+        utils_export.KALEIDO_AVAILABLE = True
+        try:
+            job = exporter.submit_zip(figures, {'dashboard_summary': ('summary', 1)})
+            archive = zipfile.ZipFile(io.BytesIO(job.result(timeout=60)))
+            exporter.export_zip(figures, {'dashboard_summary': ('summary', 1)})
+        finally:
+            utils_export.KALEIDO_AVAILABLE = kaleido_available
+            exporter.close()
+        
+        if archive.namelist() != ['trend_chart.png', 'dashboard_summary.png']:
+            print_error(f"Isi ZIP salah: {archive.namelist()}")
+            return False
+        if not archive.read('dashboard_summary.png').startswith(b'\x89PNG') or len(builds) != 1:
+            print_error("Dashboard summary tidak di-render/di-cache dengan benar")
+            return False
+        print_success(f"ZIP dari background worker: {archive.namelist()}, summary dibangun {len(builds)}x")
+        
+        # Figure Matplotlib untuk export dibangun tanpa pyplot (aman di worker thread)
+        import matplotlib.pyplot as plt
+        open_figures = plt.get_fignums()
+        summary_fig = summary()
+        if plt.get_fignums() != open_figures or summary_fig.canvas.get_default_filetype() != 'png':
+            print_error("Dashboard summary seharusnya tidak terdaftar di pyplot")
+            return False
+        print_success("Dashboard summary memakai canvas Agg sendiri (tanpa pyplot)")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Figure export error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_report_bundle():
+    """Test report bundle lazy (artefak dibuat saat diminta, cache per key)"""
+    print_header("TEST 25: Report Bundle")
+    
+    try:
+        import io
+        import zipfile
+        from utils_report import ArtifactCache, ReportBundle
+        
+        df = pd.read_csv('data_dbd.csv')
+        cache = ArtifactCache()
+        builds = []
+        
+        def filtered():
+            builds.append('data')
+            return df[df['tahun'] == df['tahun'].max()]
+        
+        bundle = ReportBundle(('v1', 'filter'), cache=cache)
+        bundle.add_frame('data_dbd_filtered', filtered, formats=('csv', 'parquet'))
+        bundle.add_text('ai_insights', 'Insight DBD')
+        if builds or len(cache):
+            print_error("Artefak seharusnya belum dibuat saat didaftarkan")
+            return False
+        print_success(f"{len(bundle.artifacts())} artefak terdaftar tanpa serialisasi")
+        
+        parquet = bundle.build('data_dbd_filtered', 'parquet')
+        if len(pd.read_parquet(io.BytesIO(parquet))) != len(filtered()):
+            print_error("Isi Parquet salah")
+            return False
+        builds.clear()
+        
+        bundle.build('data_dbd_filtered', 'parquet')
+        same_key = ReportBundle(('v1', 'filter'), cache=cache)
+        same_key.add_frame('data_dbd_filtered', filtered, formats=('csv', 'parquet'))
+        same_key.build('data_dbd_filtered', 'parquet')
+        if builds:
+            print_error("Artefak dengan key sama seharusnya diambil dari cache")
+            return False
+        print_success("Artefak di-cache per key input")
+        
+        archive = zipfile.ZipFile(io.BytesIO(bundle.lazy_archive()()))
+        if sorted(archive.namelist()) != ['ai_insights.txt', 'data_dbd_filtered.csv', 'data_dbd_filtered.parquet']:
+            print_error(f"Isi arsip salah: {archive.namelist()}")
+            return False
+        if archive.read('ai_insights.txt').decode('utf-8') != 'Insight DBD':
+            print_error("Teks AI di arsip salah")
+            return False
+        print_success(f"Arsip ZIP: {sorted(archive.namelist())}")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Report bundle error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_filter_engine():
+    """Test filter engine (seleksi kanonik, memoization, tanpa salinan)"""
+    print_header("TEST 26: Filter Engine")
+    
+    try:
+        from utils_filter import DBDFilterEngine, canonical_selection
+        from utils_schema import apply_case_schema
+        
+        df = apply_case_schema(pd.read_csv('data_dbd.csv'))
+        years = sorted(df['tahun'].unique().tolist())
+        regions = sorted(df['nama_kabupaten_kota'].unique().tolist())
+        engine = DBDFilterEngine(max_entries=2)
+        
+        if canonical_selection({'tahun': [2020, 2019]}) != canonical_selection({'tahun': (2019, 2020, 2019)}):
+            print_error("Seleksi kanonik harus mengabaikan urutan/duplikat")
+            return False
+        
+        selection = {'tahun': years[-2:], 'nama_kabupaten_kota': regions[:5]}
+        filtered = engine.apply(df, 1, selection)
+        expected = df[df['tahun'].isin(years[-2:]) & df['nama_kabupaten_kota'].isin(regions[:5])]
+        if not filtered.equals(expected):
+            print_error("Hasil filter berbeda dari isin berantai")
+            return False
+        print_success(f"Hasil filter sama dengan isin berantai ({len(filtered)} rows)")
+        
+        again = engine.apply(df, 1, {'nama_kabupaten_kota': regions[:5][::-1], 'tahun': years[-2:][::-1]})
+        if again is not filtered or engine.stats()['hits'] != 1:
+            print_error("Seleksi yang sama seharusnya diambil dari cache")
+            return False
+        print_success("Seleksi sama (urutan berbeda) memakai hasil cache")
+        
+        if engine.apply(df, 1, {'tahun': years, 'nama_kabupaten_kota': None}) is not df:
+            print_error("Seleksi semua baris seharusnya mengembalikan frame asli")
+            return False
+        if len(engine.apply(df, 2, selection)) != len(filtered) or engine.stats()['selections'] != 2:
+            print_error("Versi data baru seharusnya dihitung ulang dan LRU dibatasi")
+            return False
+        print_success(f"Versi data & LRU: {engine.stats()}")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Filter engine error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_row_index():
+    """Test index posisi baris (AND/OR) dan pemakaiannya di parser"""
+    print_header("TEST 27: Row Index")
+    
+    try:
+        import numpy as np
+        from utils_filter import DBDRowIndex, intersect_positions, union_positions
+        from utils_parsing import DBDDataParser
+        
+        parser = DBDDataParser('data_dbd.csv')
+        df = parser.load_csv()
+        index = parser.row_index()
+        if parser.row_index() is not index:
+            print_error("Index seharusnya dibangun sekali per DataFrame")
+            return False
+        
+        year = int(df['tahun'].max())
+        province = str(df['nama_provinsi'].iloc[0])
+        if not parser.get_data_by_year(year).equals(df[df['tahun'] == year]):
+            print_error("get_data_by_year berbeda dari filter ==")
+            return False
+        if not parser.get_data_by_province(province).equals(df[df['nama_provinsi'] == province]):
+            print_error("get_data_by_province berbeda dari filter ==")
+            return False
+        print_success(f"Index {index.columns} cocok dengan filter ==")
+        
+        codes = df['kode_kabupaten_kota'].unique()[:3].tolist()
+        years = sorted(df['tahun'].unique().tolist())[-2:]
+        expected = np.flatnonzero((df['kode_kabupaten_kota'].isin(codes) & df['tahun'].isin(years)).to_numpy())
+        if not np.array_equal(index.select({'kode_kabupaten_kota': codes, 'tahun': years}), expected):
+            print_error("Seleksi AND/OR salah")
+            return False
+        if len(index.select({'tahun': 1900})) != 0:
+            print_error("Nilai yang tidak ada seharusnya menghasilkan seleksi kosong")
+            return False
+        print_success(f"Seleksi kab/kota x tahun: {len(expected)} rows")
+        
+        a, b = np.array([1, 4, 7, 9]), np.array([2, 4, 9, 12])
+        if intersect_positions(a, b).tolist() != [4, 9] or union_positions(np.array([1, 5]), np.array([3])).tolist() != [1, 3, 5]:
+            print_error("Irisan/gabungan posisi salah")
+            return False
+        
+        dense = DBDRowIndex(df).select({'tahun': sorted(df['tahun'].unique().tolist())})
+        if len(dense) != len(df):
+            print_error("Seleksi padat (bitmap) salah")
+            return False
+        print_success("Komposisi sparse (irisan) dan dense (bitmap) benar")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Row index error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_lazy_query():
+    """Test query lazy (where/filter/select/groupby -> collect)"""
+    print_header("TEST 28: Lazy Query")
+    
+    try:
+        from utils_parsing import DBDDataParser
+        from utils_query import DBDQuery
+        
+        parser = DBDDataParser('data_dbd.csv')
+        df = parser.load_csv()
+        year = int(df['tahun'].max())
+        province = str(df['nama_provinsi'].iloc[0])
+        
+        base = parser.query()
+        query = base.where(tahun=year, nama_provinsi=province)
+        if base.count() != len(df) or query.count() != int(((df['tahun'] == year) & (df['nama_provinsi'] == province)).sum()):
+            print_error("Query seharusnya immutable dan count sesuai filter")
+            return False
+        
+        result = (
+            query.groupby('nama_kabupaten_kota')
+            .agg(total=('jumlah_kasus', 'sum'), records=('jumlah_kasus', 'count'))
+            .collect()
+        )
+        expected = (
+            df[(df['tahun'] == year) & (df['nama_provinsi'] == province)]
+            .groupby('nama_kabupaten_kota', observed=True)
+            .agg(total=('jumlah_kasus', 'sum'), records=('jumlah_kasus', 'count'))
+            .reset_index()
+        )
+        if not result.equals(expected):
+            print_error("Agregasi query berbeda dari pandas eager")
+            return False
+        print_success(f"where + groupby.agg: {len(result)} kab/kota, sama dengan pandas")
+        
+        chained = (
+            DBDQuery(df)
+            .where(tahun=[year, year - 1])
+            .where(tahun=year)
+            .filter(lambda d: d['jumlah_kasus'] > 0)
+            .select(['nama_kabupaten_kota', 'jumlah_kasus'])
+            .sort('jumlah_kasus', ascending=False)
+            .collect()
+        )
+        eager = df[(df['tahun'] == year) & (df['jumlah_kasus'] > 0)][['nama_kabupaten_kota', 'jumlah_kasus']]
+        if not chained.equals(eager.sort_values('jumlah_kasus', ascending=False)):
+            print_error("Rantai where/filter/select/sort salah")
+            return False
+        print_success("Rantai where/filter/select/sort benar (tanpa index)")
+        
+        # select sebelum groupby = proyeksi sumber; select setelah agg = kolom hasil
+        selected = parser.query().select(['tahun', 'jumlah_kasus']).groupby('tahun').agg(total=('jumlah_kasus', 'sum'))
+        expected = df.groupby('tahun')['jumlah_kasus'].sum().rename('total').reset_index()
+        if not selected.collect().equals(expected) or selected.select(['total']).collect().columns.tolist() != ['total']:
+            print_error("Rantai select -> groupby -> agg salah")
+            return False
+        print_success("Rantai select -> groupby -> agg benar")
+        
+        total_before = int(df['jumlah_kasus'].sum())
+        collected = base.collect()
+        collected['jumlah_kasus'] = 0
+        if int(df['jumlah_kasus'].sum()) != total_before:
+            print_error("Mengubah hasil collect() mengubah data parser")
+            return False
+        print_success("Hasil collect() tidak berbagi perubahan dengan data sumber")
+        
+        try:
+            query.groupby('tahun').agg(total=('jumlah_kasus', 'sum')).where(tahun=year)
+            print_error("where setelah groupby seharusnya ditolak")
+            return False
+        except ValueError:
+            pass
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Lazy query error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_aggregation_backend():
+    """Test paritas backend agregasi pandas vs Arrow"""
+    print_header("TEST 29: Aggregation Backend")
+    
+    try:
+        import math
+        import numpy as np
+        from benchmark_dashboard import generate_synthetic_data
+        from utils_backend import get_backend
+        from utils_parsing import DBDDataParser, calculate_growth_rate
+        from utils_schema import apply_case_schema
+        
+        parser = DBDDataParser('data_dbd.csv')
+        parser.load_csv()
+        if not parser.aggregate_by_province_year(backend='arrow').equals(parser.aggregate_by_province_year(backend='pandas')):
+            print_error("aggregate_by_province_year Arrow berbeda dari pandas")
+            return False
+        print_success("Parser: aggregate_by_province_year identik di kedua backend")
+        
+        # Data sintetis dengan kasus kosong, nol, kab/kota kosong, urutan acak
+        df = apply_case_schema(generate_synthetic_data(20000))
+        df.loc[df.sample(frac=0.05, random_state=1).index, 'jumlah_kasus'] = pd.NA
+        df.loc[df.sample(frac=0.05, random_state=2).index, 'jumlah_kasus'] = 0
+        df.loc[df.sample(frac=0.01, random_state=3).index, 'nama_kabupaten_kota'] = np.nan
+        df = df.sample(frac=1, random_state=4)
+        
+        pandas_backend, arrow_backend = get_backend('pandas'), get_backend('arrow')
+        if not arrow_backend.aggregate_by_province_year(df).equals(pandas_backend.aggregate_by_province_year(df)):
+            print_error("Agregasi provinsi x tahun tidak identik")
+            return False
+        for cols in (['nama_provinsi', 'nama_kabupaten_kota'], ['kode_kabupaten_kota']):
+            expected = calculate_growth_rate(df, cols, backend='pandas')
+            if not calculate_growth_rate(df, cols, backend='arrow').equals(expected):
+                print_error(f"Growth rate per {cols} tidak identik")
+                return False
+        print_success(f"Agregasi dan growth rate identik ({len(df):,} rows dengan NA/nol)")
+        
+        # Nilai dan tipe skalar sama, untuk jumlah_kasus Int32 (skema), int64 (CSV mentah), dan float
+        for frame in (df, pd.read_csv('data_dbd.csv'), df.astype({'jumlah_kasus': 'float64'})):
+            expected = pandas_backend.summary_statistics(frame)
+            actual = arrow_backend.summary_statistics(frame)
+            for key, value in expected.items():
+                # Standar deviasi: algoritma berbeda, selisih hanya di digit terakhir
+                same = math.isclose(value, actual[key], rel_tol=1e-12) if key == 'std_dev_kasus' else value == actual[key]
+                if not same:
+                    print_error(f"Statistik {key} berbeda: {value} vs {actual[key]}")
+                    return False
+                types = [type(item) for item in (value if isinstance(value, tuple) else (value,))]
+                actual_types = [type(item) for item in (actual[key] if isinstance(actual[key], tuple) else (actual[key],))]
+                if types != actual_types:
+                    print_error(f"Tipe statistik {key} berbeda: {types} vs {actual_types}")
+                    return False
+        print_success("Statistik summary sama (nilai dan tipe)")
+        
+        try:
+            get_backend('spark')
+            print_error("Backend tidak dikenal seharusnya ditolak")
+            return False
+        except ValueError:
+            pass
+        
+        # Backend yang belum lengkap gagal saat dibuat, bukan saat dipanggil
+        from utils_backend import AggregationBackend, PandasBackend
+        class IncompleteBackend(AggregationBackend):
+            aggregate_by_province_year = PandasBackend.aggregate_by_province_year
+        try:
+            IncompleteBackend()
+            print_error("Backend tanpa growth_rate/summary_statistics seharusnya tidak bisa dibuat")
+            return False
+        except TypeError:
+            pass
+        print_success("Backend tidak dikenal / belum lengkap ditolak")
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"Aggregation backend error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_sql_query_layer():
+    """Test query bernama (DuckDB / fallback pandas) dan mirror Parquet"""
+    print_header("TEST 30: SQL Query Layer")
+    
+    try:
+        import shutil
+        import tempfile
+        import pyarrow.parquet as pq
+        from utils_aggregate import DBDAggregateCube
+        from utils_parsing import calculate_region_growth
+        from utils_sql import DUCKDB_AVAILABLE, DBDSQLEngine, ensure_parquet_mirror, get_case_sql_engine
+        from utils_storage import get_case_store, parse_case_csv
+        
+        work_dir = tempfile.mkdtemp()
+        try:
+            csv_path = os.path.join(work_dir, 'data_dbd.csv')
+            shutil.copy('data_dbd.csv', csv_path)
+            df = parse_case_csv(csv_path)
+            cube = DBDAggregateCube(df)
+            
+            mirror_path = ensure_parquet_mirror(csv_path)
+            mtime = os.path.getmtime(mirror_path)
+            if pq.read_table(mirror_path).num_rows != len(df) or ensure_parquet_mirror(csv_path) != mirror_path or os.path.getmtime(mirror_path) != mtime:
+                print_error("Mirror Parquet tidak lengkap atau ditulis ulang tanpa perubahan sumber")
+                return False
+            print_success(f"Mirror Parquet: {len(df)} rows, dipakai ulang selama CSV tidak berubah")
+            
+            engine = DBDSQLEngine(csv_path, use_duckdb=False)
+            yearly = engine.query('yearly_totals')
+            if yearly.set_index('tahun')['jumlah_kasus'].to_dict() != cube.by_year().to_dict():
+                print_error("yearly_totals berbeda dari cube")
+                return False
+            top = engine.query('top_regions', n=5)
+            if top['jumlah_kasus'].tolist() != cube.top_regions(5).tolist():
+                print_error("top_regions berbeda dari cube")
+                return False
+            if not engine.query('heatmap', n=10).equals(cube.heatmap_matrix(10)):
+                print_error("heatmap berbeda dari cube")
+                return False
+            growth = engine.query('growth', level='nama_provinsi')
+            expected = calculate_region_growth(df, 'nama_provinsi')
+            if growth['growth_pct'].tolist() != expected['growth_pct'].tolist():
+                print_error("growth berbeda dari calculate_region_growth")
+                return False
+            year = int(df['tahun'].max())
+            if engine.query('region_year', filters={'tahun': year})['tahun'].unique().tolist() != [year]:
+                print_error("Filter tahun tidak diterapkan")
+                return False
+            # Multiselect dikosongkan -> hasil kosong, bukan error
+            if any(len(engine.query(name, filters={'tahun': []})) for name in ('yearly_totals', 'top_regions', 'heatmap', 'growth')):
+                print_error("Seleksi kosong seharusnya menghasilkan frame kosong")
+                return False
+            print_success(f"Query bernama ({engine.engine}) sama dengan cube/pandas")
+            
+            for name, kwargs in (('drop_table', {}), ('yearly_totals', {'filters': {'1=1; --': 1}}), ('top_regions', {'level': 'satuan'})):
+                try:
+                    engine.query(name, **kwargs)
+                    print_error(f"Input tidak valid seharusnya ditolak: {name} {kwargs}")
+                    return False
+                except ValueError:
+                    pass
+            
+            if DUCKDB_AVAILABLE:
+                duck = DBDSQLEngine(csv_path, use_duckdb=True)
+                kabkots = df['nama_kabupaten_kota'].dropna().unique()[:2].tolist()
+                for filters in (None, {'tahun': []}, {'tahun': year, 'nama_kabupaten_kota': kabkots}):
+                    for name in ('cells', 'yearly_totals', 'top_regions', 'region_year', 'growth'):
+                        pd.testing.assert_frame_equal(duck.query(name, filters), engine.query(name, filters), check_dtype=False)
+                    pd.testing.assert_frame_equal(
+                        duck.query('heatmap', filters), engine.query('heatmap', filters),
+                        check_dtype=False, check_names=False, check_index_type=False, check_column_type=False
+                    )
+                print_success("DuckDB dan fallback pandas menghasilkan data yang sama")
+            else:
+                print_warning("DuckDB tidak terinstall, hanya fallback pandas yang diuji")
+            
+            # Engine database kasus: mirror mengikuti revisi, perubahan admin langsung terlihat
+            store = get_case_store(os.path.join(work_dir, 'data_dbd.db'))
+            store.sync_from_csv(csv_path)
+            store_engine = get_case_sql_engine(store.db_path)
+            if store_engine.cube().by_year().to_dict() != cube.by_year().to_dict():
+                print_error("Cube dari engine database berbeda dari cube pandas")
+                return False
+            record = store.read_frame().iloc[0]
+            edited = {column: (value.item() if hasattr(value, 'item') else value) for column, value in record.items()}
+            edited['jumlah_kasus'] += 1000
+            store.apply_changes([edited])
+            totals = store_engine.query('yearly_totals', filters={'tahun': edited['tahun']})
+            if totals['jumlah_kasus'].tolist() != [cube.by_year()[edited['tahun']] + 1000]:
+                print_error(f"Engine database tidak melihat perubahan admin: {totals}")
+                return False
+            print_success(f"Engine database ({store_engine.engine}) mengikuti revisi store")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        return True
+    
+    except Exception as e:
+        print_error(f"SQL query layer error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def run_all_tests():
     """Run semua tests"""
     print(f"\n{Colors.BOLD}{Colors.BLUE}")
@@ -285,7 +1687,30 @@ def run_all_tests():
         'Parsing Utils': test_parsing_utils(),
         'Visualization Utils': test_visualization_utils(),
         'AI Integration': test_ai_integration(),
-        'Dashboard Components': test_dashboard_components()
+        'Dashboard Components': test_dashboard_components(),
+        'Storage Snapshot': test_storage_snapshot(),
+        'Case Store': test_case_store(),
+        'Audit Writer': test_audit_writer(),
+        'Audit Store': test_audit_store(),
+        'Aggregate Cube': test_aggregate_cube(),
+        'Response Cache': test_response_cache(),
+        'Streaming Insights': test_streaming_insights(),
+        'Batch Analysis': test_batch_analysis(),
+        'Case Schema': test_case_schema(),
+        'Chunked Ingest': test_chunked_ingest(),
+        'Validation Engine': test_validation_engine(),
+        'Duplicate Detection': test_duplicate_detection(),
+        'Benchmark Harness': test_benchmark_harness(),
+        'Profiling': test_profiling(),
+        'Trend Figure Budget': test_trend_figure_budget(),
+        'Figure Cache': test_figure_cache(),
+        'Figure Export': test_figure_export(),
+        'Report Bundle': test_report_bundle(),
+        'Filter Engine': test_filter_engine(),
+        'Row Index': test_row_index(),
+        'Lazy Query': test_lazy_query(),
+        'Aggregation Backend': test_aggregation_backend(),
+        'SQL Query Layer': test_sql_query_layer()
     }
     
     # Summary
@@ -0,0 +1,193 @@
+"""
+Utility Functions untuk Agregasi Data DBD
+Cube agregat wilayah x tahun: satu groupby atas data mentah, semua
+ringkasan lain (per tahun, per wilayah, top N, heatmap) di-rollup dari cube
+"""
+
+import hashlib
+
+import pandas as pd
+from typing import Dict, Optional, Sequence, Union
+
+
+class DBDAggregateCube:
+    """
+    Class cube agregat kasus DBD.
+
+    Data mentah hanya di-groupby sekali ke tingkat
+    (nama_provinsi, nama_kabupaten_kota, tahun); rollup ke tingkat provinsi,
+    kab/kota, atau tahun dihitung dari cell cube (jumlahnya jauh lebih kecil
+    dari jumlah baris) dan di-memoize di dalam objek.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Bangun cube dari DataFrame kasus
+
+        Args:
+            df: DataFrame dengan kolom nama_provinsi, nama_kabupaten_kota,
+                tahun, jumlah_kasus
+        """
+        self.cells = (
+            df.groupby(['nama_provinsi', 'nama_kabupaten_kota', 'tahun'], observed=True)['jumlah_kasus']
+            .agg(['sum', 'count'])
+            .reset_index()
+        )
+        # jumlah_kasus Int32 (utils_schema): total di-upcast ke int64 agar
+        # rollup tidak overflow dan grafik menerima array numpy biasa
+        if pd.api.types.is_integer_dtype(self.cells['sum']):
+            self.cells['sum'] = self.cells['sum'].astype('int64')
+        self._memo: Dict[tuple, object] = {}
+
+    @classmethod
+    def from_cells(cls, cells: pd.DataFrame) -> 'DBDAggregateCube':
+        """Membuat cube langsung dari cell yang sudah teragregasi"""
+        cube = cls.__new__(cls)
+        cube.cells = cells.reset_index(drop=True)
+        cube._memo = {}
+        return cube
+
+    @property
+    def empty(self) -> bool:
+        return self.cells.empty
+
+    def fingerprint(self) -> str:
+        """
+        Fingerprint isi cube (hash cell), dipakai sebagai kunci cache figure
+
+        Returns:
+            Hex digest sha256
+        """
+        if 'fingerprint' not in self._memo:
+            hashed = pd.util.hash_pandas_object(self.cells, index=False).to_numpy()
+            self._memo['fingerprint'] = hashlib.sha256(hashed.tobytes()).hexdigest()
+        return self._memo['fingerprint']
+
+    def _rollup(self, keys: Sequence[str]) -> pd.DataFrame:
+        memo_key = ('rollup', tuple(keys))
+        if memo_key not in self._memo:
+            self._memo[memo_key] = self.cells.groupby(list(keys), observed=True)[['sum', 'count']].sum()
+        return self._memo[memo_key]
+
+    def filter(self, level: str, regions: Optional[Sequence[str]]) -> 'DBDAggregateCube':
+        """
+        Cube baru yang hanya berisi wilayah tertentu
+
+        Args:
+            level: Kolom wilayah (nama_provinsi / nama_kabupaten_kota)
+            regions: Daftar wilayah (None/kosong = semua)
+
+        Returns:
+            DBDAggregateCube
+        """
+        if not regions:
+            return self
+        return DBDAggregateCube.from_cells(self.cells[self.cells[level].isin(regions)])
+
+    def by_year(self) -> pd.Series:
+        """
+        Total kasus per tahun
+
+        Returns:
+            Series tahun -> jumlah_kasus (terurut per tahun)
+        """
+        return self._rollup(['tahun'])['sum'].rename('jumlah_kasus')
+
+    def by_region(self, level: str = 'nama_kabupaten_kota') -> pd.Series:
+        """
+        Total kasus per wilayah
+
+        Args:
+            level: Kolom wilayah
+
+        Returns:
+            Series wilayah -> jumlah_kasus
+        """
+        return self._rollup([level])['sum'].rename('jumlah_kasus')
+
+    def top_regions(self, n: int, level: str = 'nama_kabupaten_kota') -> pd.Series:
+        """
+        N wilayah dengan total kasus tertinggi
+
+        Args:
+            n: Jumlah wilayah
+            level: Kolom wilayah
+
+        Returns:
+            Series wilayah -> jumlah_kasus (terurut menurun)
+        """
+        return self.by_region(level).nlargest(n)
+
+    def region_year(self, level: str = 'nama_kabupaten_kota') -> pd.DataFrame:
+        """
+        Total kasus per (tahun, wilayah) dalam format long untuk grafik trend
+
+        Args:
+            level: Kolom wilayah
+
+        Returns:
+            DataFrame dengan kolom tahun, <level>, jumlah_kasus
+        """
+        data = self._rollup(['tahun', level])['sum'].rename('jumlah_kasus')
+        return data.reset_index()
+
+    def region_year_summary(self, level: str = 'nama_kabupaten_kota') -> pd.DataFrame:
+        """
+        Ringkasan per (wilayah, tahun): total, rata-rata per record, jumlah record,
+        dan jumlah kab/kota
+
+        Args:
+            level: Kolom wilayah
+
+        Returns:
+            DataFrame dengan index (<level>, tahun) dan kolom
+            sum, mean, count, kabkot_count
+        """
+        memo_key = ('summary', level)
+        if memo_key not in self._memo:
+            grouped = self.cells.groupby([level, 'tahun'], observed=True)
+            summary = grouped[['sum', 'count']].sum()
+            summary['mean'] = summary['sum'] / summary['count']
+            summary['kabkot_count'] = grouped['nama_kabupaten_kota'].nunique()
+            self._memo[memo_key] = summary[['sum', 'mean', 'count', 'kabkot_count']]
+        return self._memo[memo_key]
+
+    def heatmap_matrix(self, top_n: Optional[int] = 15, province: Optional[str] = None) -> pd.DataFrame:
+        """
+        Matriks kab/kota x tahun untuk heatmap
+
+        Args:
+            top_n: Ambil N kab/kota dengan kasus tertinggi (dipakai jika province None)
+            province: Batasi ke satu provinsi
+
+        Returns:
+            DataFrame pivot (index kab/kota, kolom tahun, nilai jumlah kasus)
+        """
+        if province:
+            cells = self.cells[self.cells['nama_provinsi'] == province]
+        else:
+            top = self.top_regions(top_n, 'nama_kabupaten_kota').index
+            cells = self.cells[self.cells['nama_kabupaten_kota'].isin(top)]
+        return cells.pivot_table(
+            values='sum',
+            index='nama_kabupaten_kota',
+            columns='tahun',
+            aggfunc='sum',
+            fill_value=0,
+            observed=True
+        )
+
+
+def as_cube(data: Union[pd.DataFrame, DBDAggregateCube]) -> DBDAggregateCube:
+    """
+    Menerima DataFrame atau cube dan selalu mengembalikan cube
+
+    Args:
+        data: DataFrame kasus atau DBDAggregateCube
+
+    Returns:
+        DBDAggregateCube
+    """
+    if isinstance(data, DBDAggregateCube):
+        return data
+    return DBDAggregateCube(data)
@@ -6,28 +6,498 @@ Untuk Business Intelligence dan Analisis Data DBD
 import pandas as pd
 import google.generativeai as genai
 import json
-from typing import Dict, List, Optional, Tuple
+import time
+import random
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
 import os
 from datetime import datetime
 
+from utils_parsing import calculate_region_growth
+from utils_filter import row_index_for
+from utils_query import DBDQuery
+from utils_storage import CACHE_DIR_NAME
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    RATE_LIMIT_ERRORS: Tuple[type, ...] = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+except ImportError:
+    RATE_LIMIT_ERRORS = ()
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_DIR = os.path.join(CACHE_DIR_NAME, "gemini")
+
+
+class GeminiResponseCache:
+    """
+    Cache respons Gemini di disk, di-address oleh hash (model, prompt).
+
+    Satu file JSON per entri; mtime file dipakai sebagai waktu akses
+    terakhir sehingga eviction LRU cukup mengurutkan file berdasarkan mtime.
+    Entri yang lebih tua dari `ttl_seconds` dianggap miss.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = RESPONSE_CACHE_DIR,
+        ttl_seconds: float = 24 * 3600,
+        max_entries: int = 256,
+        max_bytes: int = 50 * 1024 * 1024
+    ):
+        """
+        Inisialisasi cache
+
+        Args:
+            cache_dir: Direktori penyimpanan cache
+            ttl_seconds: Umur maksimum entri (detik)
+            max_entries: Jumlah entri maksimum sebelum eviction
+            max_bytes: Total ukuran file maksimum sebelum eviction
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        """
+        Kunci cache: sha256 dari nama model dan teks prompt
+
+        Args:
+            model_name: Nama model Gemini
+            prompt: Teks prompt
+
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(model_name.encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(prompt.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, model_name: str, prompt: str) -> Optional[str]:
+        """
+        Ambil respons dari cache
+
+        Returns:
+            Teks respons, atau None jika miss/kadaluarsa
+        """
+        path = self._path(self.make_key(model_name, prompt))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get('created', 0) > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            # Tandai sebagai baru diakses (urutan LRU)
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get('text')
+
+    def set(self, model_name: str, prompt: str, text: str) -> None:
+        """
+        Simpan respons ke cache lalu lakukan eviction jika melebihi batas
+
+        Args:
+            model_name: Nama model Gemini
+            prompt: Teks prompt
+            text: Teks respons
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(self.make_key(model_name, prompt))
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': model_name, 'created': time.time(), 'text': text}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+            entries.sort()
+            total_bytes = sum(size for _, size, _ in entries)
+            while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+                _, size, name = entries.pop(0)
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+                total_bytes -= size
+
+    def clear(self) -> None:
+        """Hapus semua entri cache"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+_response_cache: Optional[GeminiResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> GeminiResponseCache:
+    """
+    Mendapatkan GeminiResponseCache bersama (satu per proses)
+
+    Returns:
+        GeminiResponseCache
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = GeminiResponseCache()
+        return _response_cache
+
+
+def cached_generate(
+    model_name: str,
+    prompt: str,
+    generate_fn: Callable[[str], str],
+    cache: Optional[GeminiResponseCache] = None
+) -> str:
+    """
+    Generate teks lewat cache: `generate_fn` hanya dipanggil jika cache miss.
+    Exception dari `generate_fn` diteruskan dan tidak pernah di-cache.
+
+    Args:
+        model_name: Nama model Gemini (bagian dari kunci cache)
+        prompt: Teks prompt
+        generate_fn: Fungsi yang memanggil API, menerima prompt dan mengembalikan teks
+        cache: Cache yang dipakai (default: cache bersama)
+
+    Returns:
+        Teks respons
+    """
+    cache = cache or get_response_cache()
+    text = cache.get(model_name, prompt)
+    if text is not None:
+        return text
+
+    text = generate_fn(prompt)
+    try:
+        cache.set(model_name, prompt, text)
+    except OSError as e:
+        logger.warning(f"Gagal menyimpan cache respons Gemini: {str(e)}")
+    return text
+
+
+def iter_response_text(response: Iterable) -> Iterator[str]:
+    """
+    Ambil teks dari setiap chunk respons streaming Gemini
+
+    Args:
+        response: Hasil generate_content(..., stream=True)
+
+    Returns:
+        Iterator potongan teks (chunk tanpa teks dilewati)
+    """
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunk tanpa part teks (mis. hanya finish_reason)
+            continue
+        if text:
+            yield text
+
+
+def cached_generate_stream(
+    model_name: str,
+    prompt: str,
+    stream_fn: Callable[[str], Iterable[str]],
+    cache: Optional[GeminiResponseCache] = None
+) -> Iterator[str]:
+    """
+    Versi streaming dari cached_generate: cache hit dikirim sebagai satu chunk,
+    cache miss diteruskan per chunk dan teks lengkap di-cache setelah stream selesai.
+
+    Args:
+        model_name: Nama model Gemini (bagian dari kunci cache)
+        prompt: Teks prompt
+        stream_fn: Fungsi yang memanggil API streaming dan menghasilkan potongan teks
+        cache: Cache yang dipakai (default: cache bersama)
+
+    Returns:
+        Iterator potongan teks
+    """
+    cache = cache or get_response_cache()
+    text = cache.get(model_name, prompt)
+    if text is not None:
+        yield text
+        return
+
+    chunks = []
+    for chunk in stream_fn(prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    try:
+        cache.set(model_name, prompt, "".join(chunks))
+    except OSError as e:
+        logger.warning(f"Gagal menyimpan cache respons Gemini: {str(e)}")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Cek apakah error berasal dari rate limit / quota Gemini (HTTP 429)
+
+    Args:
+        error: Exception dari pemanggilan API
+
+    Returns:
+        True jika error layak di-retry dengan backoff
+    """
+    if RATE_LIMIT_ERRORS and isinstance(error, RATE_LIMIT_ERRORS):
+        return True
+    message = str(error)
+    return '429' in message or 'RESOURCE_EXHAUSTED' in message or 'quota' in message.lower()
+
 
 class GeminiDBDAnalyzer:
     """
     Class untuk analisis data DBD menggunakan Google Gemini AI
     """
     
-    def __init__(self, api_key: str, model: str = "gemini-2.5-flash"):
+    # Method yang boleh dijalankan lewat run_batch
+    BATCH_METHODS = (
+        'generate_comprehensive_insights',
+        'generate_mitigation_recommendations',
+        'analyze_specific_area',
+        'compare_time_periods',
+        'generate_executive_report'
+    )
+    
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-2.5-flash",
+        cache: Optional[GeminiResponseCache] = None,
+        client=None,
+        max_retries: int = 4,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0
+    ):
         """
         Inisialisasi analyzer dengan API key
         
         Args:
             api_key: Google Gemini API key
             model: Model Gemini yang digunakan
+            cache: Cache respons (default: cache bersama di disk)
+            client: Objek model dengan method generate_content(prompt, stream=...)
+                    (default: genai.GenerativeModel; bisa diganti model palsu untuk test)
+            max_retries: Jumlah retry maksimum saat terkena rate limit
+            backoff_base: Jeda awal backoff (detik), berlipat dua setiap retry
+            backoff_max: Jeda backoff maksimum (detik)
         """
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model)
+        if client is None:
+            genai.configure(api_key=api_key)
+            client = genai.GenerativeModel(model)
+        self.model = client
         self.conversation_history = []
         self.model_name = model
+        self.cache = cache or get_response_cache()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._history_lock = threading.Lock()
+    
+    def _call_model(self, prompt: str) -> str:
+        """
+        Panggil generate_content dengan exponential backoff (+ jitter) saat rate limit
+        
+        Args:
+            prompt: Teks prompt
+            
+        Returns:
+            Teks respons
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.model.generate_content(prompt).text
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay *= 0.5 + random.random() / 2
+                logger.warning(f"Rate limit Gemini, retry {attempt + 1}/{self.max_retries} dalam {delay:.1f} detik")
+                time.sleep(delay)
+    
+    def _generate(self, prompt: str) -> str:
+        """
+        Panggil Gemini lewat cache respons (prompt identik tidak memanggil API lagi)
+        
+        Args:
+            prompt: Teks prompt
+            
+        Returns:
+            Teks respons
+        """
+        return cached_generate(
+            self.model_name,
+            prompt,
+            self._call_model,
+            self.cache
+        )
+    
+    def _generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Panggil Gemini dengan stream=True lewat cache respons
+        
+        Args:
+            prompt: Teks prompt
+            
+        Returns:
+            Iterator potongan teks
+        """
+        return cached_generate_stream(
+            self.model_name,
+            prompt,
+            lambda text: iter_response_text(self.model.generate_content(text, stream=True)),
+            self.cache
+        )
+    
+    def _respond(
+        self,
+        prompt: str,
+        history: Dict,
+        error_prefix: str,
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
+        """
+        Jalankan prompt, catat ke conversation_history, dan ubah error menjadi teks
+        
+        Args:
+            prompt: Teks prompt
+            history: Field tambahan untuk entri history (type, scope, ...)
+            error_prefix: Awalan pesan jika terjadi error
+            stream: True untuk mengembalikan generator potongan teks
+            
+        Returns:
+            Teks respons, atau iterator potongan teks jika stream=True
+        """
+        if stream:
+            return self._respond_stream(prompt, history, error_prefix)
+        
+        try:
+            text = self._generate(prompt)
+            self._record(history, text)
+            return text
+        
+        except Exception as e:
+            return f"{error_prefix}: {str(e)}"
+    
+    def _respond_stream(self, prompt: str, history: Dict, error_prefix: str) -> Iterator[str]:
+        chunks = []
+        try:
+            for chunk in self._generate_stream(prompt):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            yield f"\n\n{error_prefix}: {str(e)}"
+            return
+        self._record(history, "".join(chunks))
+    
+    def _record(self, history: Dict, response: str) -> None:
+        # Save to history (bisa dipanggil dari beberapa thread run_batch)
+        with self._history_lock:
+            self.conversation_history.append({
+                'timestamp': datetime.now().isoformat(),
+                **history,
+                'response': response
+            })
+    
+    def run_batch(
+        self,
+        jobs: Dict[Hashable, Tuple[str, Dict[str, Any]]],
+        max_workers: int = 4
+    ) -> Iterator[Tuple[Hashable, str]]:
+        """
+        Jalankan beberapa analisis secara paralel dengan thread pool terbatas
+        
+        Args:
+            jobs: Dict {kunci: (nama_method, kwargs)}, mis.
+                  {'bogor': ('analyze_specific_area', {'df': df, 'province': 'JAWA BARAT', 'kabkot': 'KABUPATEN BOGOR'})}
+            max_workers: Jumlah request Gemini yang berjalan bersamaan
+            
+        Returns:
+            Iterator (kunci, hasil) sesuai urutan selesai
+        """
+        for method_name, _ in jobs.values():
+            if method_name not in self.BATCH_METHODS:
+                raise ValueError(f"Method tidak didukung untuk batch: {method_name}")
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-batch") as pool:
+            futures = {
+                pool.submit(getattr(self, method_name), **kwargs): key
+                for key, (method_name, kwargs) in jobs.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = f"Error saat batch {key}: {str(e)}"
+                yield key, result
+    
+    def analyze_areas_batch(
+        self,
+        df: pd.DataFrame,
+        province: str,
+        kabkots: Optional[List[str]] = None,
+        max_workers: int = 4
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Analisis semua (atau sebagian) kabupaten/kota dalam satu provinsi secara paralel
+        
+        Args:
+            df: DataFrame dengan data DBD
+            province: Nama provinsi
+            kabkots: Daftar kabupaten/kota (default: semua di provinsi tersebut)
+            max_workers: Jumlah request Gemini yang berjalan bersamaan
+            
+        Returns:
+            Iterator (nama kab/kota, analisis) sesuai urutan selesai
+        """
+        if kabkots is None:
+            kabkots = df.loc[df['nama_provinsi'] == province, 'nama_kabupaten_kota'].dropna().unique().tolist()
+        jobs = {
+            kabkot: ('analyze_specific_area', {'df': df, 'province': province, 'kabkot': kabkot})
+            for kabkot in kabkots
+        }
+        return self.run_batch(jobs, max_workers=max_workers)
     
     def prepare_data_summary(self, df: pd.DataFrame) -> Dict:
         """
@@ -49,10 +519,10 @@ class GeminiDBDAnalyzer:
         trend_tahunan = {int(k): int(v) for k, v in trend_tahunan.items()}
         
         # Geographic analysis
-        top_provinsi = df.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(10).to_dict()
+        top_provinsi = df.groupby('nama_provinsi', observed=True)['jumlah_kasus'].sum().nlargest(10).to_dict()
         top_provinsi = {k: int(v) for k, v in top_provinsi.items()}
         
-        top_kabkot = df.groupby(['nama_provinsi', 'nama_kabupaten_kota'])['jumlah_kasus'].sum().nlargest(10)
+        top_kabkot = df.groupby(['nama_provinsi', 'nama_kabupaten_kota'], observed=True)['jumlah_kasus'].sum().nlargest(10)
         top_kabkot_dict = {f"{k[0]} - {k[1]}": int(v) for k, v in top_kabkot.items()}
         
         # Growth rate analysis
@@ -65,16 +535,11 @@ class GeminiDBDAnalyzer:
         else:
             growth_rate = 0
         
-        # Province-level growth
-        provinsi_growth = {}
-        for prov in df['nama_provinsi'].unique():
-            prov_data = df[df['nama_provinsi'] == prov].groupby('tahun')['jumlah_kasus'].sum()
-            if len(prov_data) > 1:
-                pct_change = ((prov_data.iloc[-1] - prov_data.iloc[0]) / prov_data.iloc[0] * 100) if prov_data.iloc[0] > 0 else 0
-                provinsi_growth[prov] = float(pct_change)
+        # Province-level growth (vectorized, satu groupby untuk semua provinsi)
+        provinsi_growth = calculate_region_growth(df, 'nama_provinsi')['growth_pct']
         
         # Top growing provinces
-        top_growing = dict(sorted(provinsi_growth.items(), key=lambda x: x[1], reverse=True)[:5])
+        top_growing = provinsi_growth.sort_values(ascending=False, kind='stable').head(5).to_dict()
         
         summary = {
             'statistik_dasar': {
@@ -96,17 +561,19 @@ class GeminiDBDAnalyzer:
     def generate_comprehensive_insights(
         self,
         df: pd.DataFrame,
-        focus_areas: Optional[List[str]] = None
-    ) -> str:
+        focus_areas: Optional[List[str]] = None,
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Generate comprehensive insights dari data DBD
         
         Args:
             df: DataFrame dengan data DBD
             focus_areas: Area fokus analisis (opsional)
+            stream: True untuk menerima respons per potongan teks (generator)
             
         Returns:
-            String berisi insights dari Claude AI
+            String berisi insights dari Claude AI (generator jika stream=True)
         """
         summary = self.prepare_data_summary(df)
         
@@ -161,37 +628,29 @@ Poin-poin penting yang harus diketahui stakeholder.
 Gunakan data konkret, berikan angka spesifik, dan pastikan rekomendasi praktis dan implementable.
 """
         
-        try:
-            response = self.model.generate_content(prompt)
-            insights = response.text
-            
-            # Save to history
-            self.conversation_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'type': 'comprehensive_insights',
-                'prompt': prompt,
-                'response': insights
-            })
-            
-            return insights
-        
-        except Exception as e:
-            return f"Error saat generate insights: {str(e)}"
+        return self._respond(
+            prompt,
+            {'type': 'comprehensive_insights', 'prompt': prompt},
+            "Error saat generate insights",
+            stream
+        )
     
     def generate_mitigation_recommendations(
         self,
         df: pd.DataFrame,
-        target_province: Optional[str] = None
-    ) -> str:
+        target_province: Optional[str] = None,
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Generate rekomendasi mitigasi spesifik
         
         Args:
             df: DataFrame dengan data DBD
             target_province: Provinsi target (None untuk nasional)
+            stream: True untuk menerima respons per potongan teks (generator)
             
         Returns:
-            String berisi rekomendasi
+            String berisi rekomendasi (generator jika stream=True)
         """
         if target_province:
             df_filtered = df[df['nama_provinsi'] == target_province]
@@ -245,28 +704,20 @@ Buatkan rekomendasi dalam format berikut:
 Berikan rekomendasi yang spesifik, terukur, achievable, relevant, dan time-bound (SMART).
 """
         
-        try:
-            response = self.model.generate_content(prompt)
-            recommendations = response.text
-            
-            self.conversation_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'type': 'mitigation_recommendations',
-                'scope': scope,
-                'response': recommendations
-            })
-            
-            return recommendations
-        
-        except Exception as e:
-            return f"Error saat generate rekomendasi: {str(e)}"
+        return self._respond(
+            prompt,
+            {'type': 'mitigation_recommendations', 'scope': scope},
+            "Error saat generate rekomendasi",
+            stream
+        )
     
     def analyze_specific_area(
         self,
         df: pd.DataFrame,
         province: str,
-        kabkot: Optional[str] = None
-    ) -> str:
+        kabkot: Optional[str] = None,
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Analisis mendalam untuk wilayah spesifik
         
@@ -274,22 +725,23 @@ Berikan rekomendasi yang spesifik, terukur, achievable, relevant, dan time-bound
             df: DataFrame dengan data DBD
             province: Nama provinsi
             kabkot: Nama kabupaten/kota (opsional)
+            stream: True untuk menerima respons per potongan teks (generator)
             
         Returns:
-            String berisi analisis
+            String berisi analisis (generator jika stream=True)
         """
+        # Index posisi baris dibangun sekali per DataFrame (dipakai ulang
+        # oleh analyze_areas_batch untuk banyak wilayah)
         if kabkot:
-            df_area = df[
-                (df['nama_provinsi'] == province) &
-                (df['nama_kabupaten_kota'] == kabkot)
-            ]
+            df_area = row_index_for(df).take(df, {'nama_provinsi': province, 'nama_kabupaten_kota': kabkot})
             area_name = f"{kabkot}, {province}"
         else:
-            df_area = df[df['nama_provinsi'] == province]
+            df_area = row_index_for(df).take(df, {'nama_provinsi': province})
             area_name = province
         
         if df_area.empty:
-            return f"Data tidak ditemukan untuk {area_name}"
+            message = f"Data tidak ditemukan untuk {area_name}"
+            return iter([message]) if stream else message
         
         # Analisis area
         trend = df_area.groupby('tahun')['jumlah_kasus'].sum().to_dict()
@@ -343,28 +795,20 @@ Pembelajaran yang bisa diambil atau diterapkan
 Berikan analisis yang kontekstual dan actionable.
 """
         
-        try:
-            response = self.model.generate_content(prompt)
-            analysis = response.text
-            
-            self.conversation_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'type': 'area_analysis',
-                'area': area_name,
-                'response': analysis
-            })
-            
-            return analysis
-        
-        except Exception as e:
-            return f"Error saat analisis: {str(e)}"
+        return self._respond(
+            prompt,
+            {'type': 'area_analysis', 'area': area_name},
+            "Error saat analisis",
+            stream
+        )
     
     def compare_time_periods(
         self,
         df: pd.DataFrame,
         year1: int,
-        year2: int
-    ) -> str:
+        year2: int,
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Bandingkan dua periode waktu
         
@@ -372,25 +816,27 @@ Berikan analisis yang kontekstual dan actionable.
             df: DataFrame dengan data DBD
             year1: Tahun pertama
             year2: Tahun kedua
+            stream: True untuk menerima respons per potongan teks (generator)
             
         Returns:
-            String berisi perbandingan
+            String berisi perbandingan (generator jika stream=True)
         """
-        df_year1 = df[df['tahun'] == year1]
-        df_year2 = df[df['tahun'] == year2]
-        
-        data_comparison = {
-            'tahun_1': {
-                'tahun': year1,
-                'total_kasus': int(df_year1['jumlah_kasus'].sum()),
-                'top_5_provinsi': df_year1.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(5).to_dict()
-            },
-            'tahun_2': {
-                'tahun': year2,
-                'total_kasus': int(df_year2['jumlah_kasus'].sum()),
-                'top_5_provinsi': df_year2.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(5).to_dict()
+        # Satu query per tahun: hanya kolom provinsi + kasus yang diambil
+        query = DBDQuery(df, index=row_index_for(df))
+        data_comparison = {}
+        for label, year in (('tahun_1', year1), ('tahun_2', year2)):
+            per_province = (
+                query.where(tahun=year)
+                .groupby('nama_provinsi')
+                .agg(jumlah_kasus=('jumlah_kasus', 'sum'))
+                .collect()
+                .set_index('nama_provinsi')['jumlah_kasus']
+            )
+            data_comparison[label] = {
+                'tahun': year,
+                'total_kasus': int(per_province.sum()),
+                'top_5_provinsi': per_province.nlargest(5).to_dict()
             }
-        }
         
         # Calculate changes
         pct_change = ((data_comparison['tahun_2']['total_kasus'] - 
@@ -434,36 +880,29 @@ Berdasarkan perbandingan ini, apa yang harus dilakukan ke depan?
 Berikan insight yang data-driven dan actionable.
 """
         
-        try:
-            response = self.model.generate_content(prompt)
-            comparison = response.text
-            
-            self.conversation_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'type': 'time_comparison',
-                'years': f"{year1} vs {year2}",
-                'response': comparison
-            })
-            
-            return comparison
-        
-        except Exception as e:
-            return f"Error saat perbandingan: {str(e)}"
+        return self._respond(
+            prompt,
+            {'type': 'time_comparison', 'years': f"{year1} vs {year2}"},
+            "Error saat perbandingan",
+            stream
+        )
     
     def generate_executive_report(
         self,
         df: pd.DataFrame,
-        target_audience: str = "Direktur Jenderal Pencegahan dan Pengendalian Penyakit"
-    ) -> str:
+        target_audience: str = "Direktur Jenderal Pencegahan dan Pengendalian Penyakit",
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Generate executive report untuk stakeholder
         
         Args:
             df: DataFrame dengan data DBD
             target_audience: Target pembaca report
+            stream: True untuk menerima respons per potongan teks (generator)
             
         Returns:
-            String berisi executive report
+            String berisi executive report (generator jika stream=True)
         """
         summary = self.prepare_data_summary(df)
         
@@ -529,21 +968,12 @@ Key takeaways untuk decision making.
 Buat report yang concise, data-driven, dan actionable. Hindari jargon teknis yang tidak perlu.
 """
         
-        try:
-            response = self.model.generate_content(prompt)
-            report = response.text
-            
-            self.conversation_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'type': 'executive_report',
-                'audience': target_audience,
-                'response': report
-            })
-            
-            return report
-        
-        except Exception as e:
-            return f"Error saat generate report: {str(e)}"
+        return self._respond(
+            prompt,
+            {'type': 'executive_report', 'audience': target_audience},
+            "Error saat generate report",
+            stream
+        )
     
     def save_conversation_history(self, file_path: str = "ai_analysis_history.json"):
         """
@@ -582,51 +1012,32 @@ if __name__ == "__main__":
     print("\nInisialisasi Gemini AI Analyzer...")
     analyzer = GeminiDBDAnalyzer(api_key=api_key)
     
-    # Contoh 1: Comprehensive Insights
-    print("\n" + "=" * 70)
-    print("CONTOH 1: COMPREHENSIVE INSIGHTS")
-    print("=" * 70)
-    
-    insights = analyzer.generate_comprehensive_insights(
-        df_clean,
-        focus_areas=['Tren Peningkatan', 'Hotspot Area']
-    )
-    print(insights)
-    
-    # Contoh 2: Mitigation Recommendations
-    print("\n" + "=" * 70)
-    print("CONTOH 2: REKOMENDASI MITIGASI")
-    print("=" * 70)
-    
-    recommendations = analyzer.generate_mitigation_recommendations(df_clean)
-    print(recommendations)
-    
-    # Contoh 3: Area-specific Analysis
-    print("\n" + "=" * 70)
-    print("CONTOH 3: ANALISIS WILAYAH SPESIFIK")
-    print("=" * 70)
-    
-    area_analysis = analyzer.analyze_specific_area(
-        df_clean,
-        province='DKI Jakarta'
-    )
-    print(area_analysis)
-    
-    # Contoh 4: Time Period Comparison
-    print("\n" + "=" * 70)
-    print("CONTOH 4: PERBANDINGAN PERIODE")
-    print("=" * 70)
+    # Contoh 1-5 dijalankan paralel; hasil dicetak sesuai urutan selesai
+    jobs = {
+        "CONTOH 1: COMPREHENSIVE INSIGHTS": (
+            'generate_comprehensive_insights',
+            {'df': df_clean, 'focus_areas': ['Tren Peningkatan', 'Hotspot Area']}
+        ),
+        "CONTOH 2: REKOMENDASI MITIGASI": ('generate_mitigation_recommendations', {'df': df_clean}),
+        "CONTOH 3: ANALISIS WILAYAH SPESIFIK": ('analyze_specific_area', {'df': df_clean, 'province': 'DKI Jakarta'}),
+        "CONTOH 4: PERBANDINGAN PERIODE": ('compare_time_periods', {'df': df_clean, 'year1': 2020, 'year2': 2023}),
+        "CONTOH 5: EXECUTIVE REPORT": ('generate_executive_report', {'df': df_clean}),
+    }
     
-    comparison = analyzer.compare_time_periods(df_clean, 2020, 2023)
-    print(comparison)
+    for title, result in analyzer.run_batch(jobs, max_workers=5):
+        print("\n" + "=" * 70)
+        print(title)
+        print("=" * 70)
+        print(result)
     
-    # Contoh 5: Executive Report
+    # Contoh 6: Analisis seluruh kab/kota satu provinsi sekaligus
     print("\n" + "=" * 70)
-    print("CONTOH 5: EXECUTIVE REPORT")
+    print("CONTOH 6: ANALISIS SEMUA KAB/KOTA (BATCH)")
     print("=" * 70)
     
-    exec_report = analyzer.generate_executive_report(df_clean)
-    print(exec_report)
+    for kabkot, area_analysis in analyzer.analyze_areas_batch(df_clean, province='Jawa Barat'):
+        print(f"\n--- {kabkot} ---")
+        print(area_analysis)
     
     # Save history
     print("\n" + "=" * 70)
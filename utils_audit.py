@@ -0,0 +1,417 @@
+"""
+Utility Functions untuk Audit Log Admin
+Penulis log ber-buffer (antrean in-process, flush batch di background thread)
+dan penyimpanan log append-only ber-index dengan query per halaman
+"""
+
+import os
+import csv
+import time
+import queue
+import atexit
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+LOG_COLUMNS = ["timestamp", "username", "action", "details"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+TimeBound = Union[str, date, datetime, None]
+
+
+def _format_bound(value: TimeBound, end_of_day: bool = False) -> Optional[str]:
+    """Normalisasi batas waktu ke format string timestamp log (urutan leksikal = urutan waktu)"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return f"{value.isoformat()} {'23:59:59' if end_of_day else '00:00:00'}"
+
+
+class AuditLogStore:
+    """
+    Penyimpanan audit log append-only di SQLite.
+
+    Baris hanya ditambahkan (tidak pernah di-update), dan index pada
+    `timestamp`, `(action, timestamp)`, serta `(username, timestamp)`
+    membuat query "N terbaru", rentang waktu, dan per user/aksi hanya
+    membaca satu halaman index, bukan seluruh riwayat log.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Inisialisasi store dan buat schema jika belum ada
+
+        Args:
+            db_path: Path file database SQLite
+        """
+        self.db_path = db_path
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_schema(self) -> None:
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS audit_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    username TEXT,
+                    action TEXT,
+                    details TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_log_timestamp
+                    ON audit_log (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_log_action_timestamp
+                    ON audit_log (action, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_log_username_timestamp
+                    ON audit_log (username, timestamp);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def import_csv(self, csv_path: str) -> int:
+        """
+        Import log CSV lama satu kali (dicatat di tabel meta)
+
+        Args:
+            csv_path: Path file log CSV
+
+        Returns:
+            Jumlah baris yang di-import (0 jika sudah pernah/CSV tidak ada)
+        """
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'csv_imported'").fetchone():
+                return 0
+            rows = []
+            if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
+                with open(csv_path, newline='', encoding='utf-8') as f:
+                    reader = csv.reader(f)
+                    header = next(reader, None)
+                    if header == LOG_COLUMNS:
+                        rows = [tuple(row) for row in reader if len(row) == len(LOG_COLUMNS)]
+            # Urutkan agar seq mengikuti urutan waktu seperti entri baru
+            rows.sort(key=lambda row: row[0])
+            conn.executemany(
+                "INSERT INTO audit_log (timestamp, username, action, details) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('csv_imported', ?)", (os.path.abspath(csv_path),)
+            )
+            return len(rows)
+
+    def append(self, rows: Sequence[Tuple[str, str, str, str]]) -> int:
+        """
+        Menambahkan banyak baris log dalam satu transaksi
+
+        Args:
+            rows: Tuple (timestamp, username, action, details)
+
+        Returns:
+            Jumlah baris yang ditambahkan
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO audit_log (timestamp, username, action, details) VALUES (?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    @staticmethod
+    def _where(
+        actions: Optional[Sequence[str]],
+        username: Optional[str],
+        start: TimeBound,
+        end: TimeBound
+    ) -> Tuple[str, list]:
+        clauses, params = [], []
+        if actions:
+            clauses.append(f"action IN ({', '.join('?' * len(actions))})")
+            params.extend(actions)
+        if username:
+            clauses.append("username = ?")
+            params.append(username)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_format_bound(start))
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(_format_bound(end, end_of_day=True))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(
+        self,
+        actions: Optional[Sequence[str]] = None,
+        username: Optional[str] = None,
+        start: TimeBound = None,
+        end: TimeBound = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> pd.DataFrame:
+        """
+        Mengambil satu halaman log, terbaru lebih dulu
+
+        Args:
+            actions: Filter jenis aksi (None = semua)
+            username: Filter username (None = semua)
+            start: Batas awal waktu (inklusif)
+            end: Batas akhir waktu (inklusif; tanggal = sampai akhir hari)
+            limit: Jumlah baris per halaman
+            offset: Jumlah baris yang dilewati
+
+        Returns:
+            DataFrame dengan kolom LOG_COLUMNS
+        """
+        where, params = self._where(actions, username, start, end)
+        sql = (
+            f"SELECT timestamp, username, action, details FROM audit_log{where} "
+            "ORDER BY timestamp DESC, seq DESC LIMIT ? OFFSET ?"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + [int(limit), int(offset)]).fetchall()
+        return pd.DataFrame(rows, columns=LOG_COLUMNS)
+
+    def recent(self, limit: int = 100) -> pd.DataFrame:
+        """
+        Mengambil N log terbaru
+
+        Args:
+            limit: Jumlah baris
+
+        Returns:
+            DataFrame dengan kolom LOG_COLUMNS
+        """
+        return self.query(limit=limit)
+
+    def count(
+        self,
+        actions: Optional[Sequence[str]] = None,
+        username: Optional[str] = None,
+        start: TimeBound = None,
+        end: TimeBound = None
+    ) -> int:
+        """
+        Menghitung jumlah log yang cocok dengan filter (untuk pagination)
+
+        Returns:
+            Jumlah baris
+        """
+        where, params = self._where(actions, username, start, end)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM audit_log{where}", params).fetchone()[0]
+
+    def usernames(self) -> List[str]:
+        """
+        Daftar username yang pernah tercatat
+
+        Returns:
+            List username terurut
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT username FROM audit_log WHERE username IS NOT NULL ORDER BY username"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class AuditLogWriter:
+    """
+    Class untuk menulis audit log secara batch.
+
+    Setiap event hanya dimasukkan ke antrean; background thread menulis
+    semua event yang terkumpul dalam satu kali append (satu transaksi jika
+    memakai AuditLogStore, atau satu write ke file CSV dengan fsync paling
+    sering sekali per `fsync_interval` detik).
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        flush_interval: float = 1.0,
+        fsync_interval: float = 5.0,
+        on_flush: Optional[Callable[[int], None]] = None,
+        store: Optional[AuditLogStore] = None
+    ):
+        """
+        Inisialisasi writer dan jalankan background thread
+
+        Args:
+            file_path: Path file log CSV (tidak dipakai jika `store` diberikan)
+            flush_interval: Jeda maksimum (detik) sebelum antrean ditulis
+            fsync_interval: Jeda minimum (detik) antar fsync
+            on_flush: Callback setelah flush, menerima jumlah baris yang ditulis
+            store: AuditLogStore tujuan penulisan
+        """
+        self.file_path = file_path
+        self.store = store
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.on_flush = on_flush
+
+        self._queue: "queue.Queue[Tuple[str, str, str, str]]" = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._last_fsync = 0.0
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"AuditLogWriter({os.path.basename(file_path)})", daemon=True
+        )
+        self._thread.start()
+
+    @staticmethod
+    def _timestamp() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def write(self, username: str, action: str, details: str) -> None:
+        """
+        Menambahkan satu event ke antrean
+
+        Args:
+            username: Username pelaku
+            action: Jenis aksi (LOGIN, UPDATE, DELETE, ...)
+            details: Keterangan aksi
+        """
+        self._queue.put((self._timestamp(), username, action, details))
+
+    def write_many(self, entries: Iterable[Tuple[str, str, str]]) -> None:
+        """
+        Menambahkan banyak event sekaligus (timestamp yang sama)
+
+        Args:
+            entries: Iterable berisi tuple (username, action, details)
+        """
+        timestamp = self._timestamp()
+        for username, action, details in entries:
+            self._queue.put((timestamp, username, action, details))
+
+    def _drain(self) -> List[Tuple[str, str, str, str]]:
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                return rows
+
+    def flush(self, force_fsync: bool = False) -> int:
+        """
+        Menulis semua event di antrean dalam satu kali append
+
+        Args:
+            force_fsync: Paksa fsync walaupun interval belum lewat
+
+        Returns:
+            Jumlah baris yang ditulis
+        """
+        with self._flush_lock:
+            rows = self._drain()
+            if not rows and not force_fsync:
+                return 0
+
+            try:
+                if self.store is not None:
+                    if rows:
+                        self.store.append(rows)
+                else:
+                    self._append_csv(rows, force_fsync)
+
+            except Exception as e:
+                logger.error(f"Error writing log: {str(e)}")
+                # Kembalikan ke antrean supaya dicoba lagi pada flush berikutnya
+                for row in rows:
+                    self._queue.put(row)
+                return 0
+
+        if rows and self.on_flush is not None:
+            self.on_flush(len(rows))
+        return len(rows)
+
+    def _append_csv(self, rows: List[Tuple[str, str, str, str]], force_fsync: bool) -> None:
+        write_header = not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0
+        with open(self.file_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            if write_header:
+                writer.writerow(LOG_COLUMNS)
+            writer.writerows(rows)
+            f.flush()
+
+            now = time.monotonic()
+            if force_fsync or now - self._last_fsync >= self.fsync_interval:
+                os.fsync(f.fileno())
+                self._last_fsync = now
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Hentikan background thread dan tulis sisa antrean ke disk"""
+        self._stop_event.set()
+        self._thread.join(timeout=self.flush_interval * 2)
+        self.flush(force_fsync=True)
+
+
+_writers: Dict[str, AuditLogWriter] = {}
+_writers_lock = threading.Lock()
+_stores: Dict[str, AuditLogStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_audit_store(db_path: str, seed_csv_path: Optional[str] = None) -> AuditLogStore:
+    """
+    Mendapatkan AuditLogStore (satu per database per proses)
+
+    Args:
+        db_path: Path file database log
+        seed_csv_path: Log CSV lama yang di-import sekali saat store pertama dibuat
+
+    Returns:
+        AuditLogStore
+    """
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        if key not in _stores:
+            store = AuditLogStore(db_path)
+            if seed_csv_path:
+                imported = store.import_csv(seed_csv_path)
+                if imported:
+                    logger.info(f"Import {imported} baris log dari {seed_csv_path}")
+            _stores[key] = store
+        return _stores[key]
+
+
+def get_audit_writer(
+    file_path: str,
+    on_flush: Optional[Callable[[int], None]] = None,
+    store: Optional[AuditLogStore] = None
+) -> AuditLogWriter:
+    """
+    Mendapatkan AuditLogWriter (satu per file log per proses)
+
+    Args:
+        file_path: Path file log CSV, atau path database jika `store` diberikan
+        on_flush: Callback setelah flush (hanya dipakai saat writer pertama dibuat)
+        store: AuditLogStore tujuan penulisan (hanya dipakai saat writer pertama dibuat)
+
+    Returns:
+        AuditLogWriter
+    """
+    key = os.path.abspath(file_path)
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = AuditLogWriter(file_path, on_flush=on_flush, store=store)
+        return _writers[key]
+
+
+@atexit.register
+def _close_writers() -> None:
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
@@ -0,0 +1,321 @@
+"""
+Utility Functions untuk Backend Agregasi Data DBD
+Agregasi parser (provinsi x tahun, growth rate, statistik summary) lewat
+backend yang bisa diganti: pandas (default) atau Apache Arrow
+(pyarrow.compute / Acero, multi-thread). Backend dipilih per panggilan atau
+lewat variabel environment DBD_AGG_BACKEND; semua backend mengembalikan
+objek pandas yang sama persis dengan backend pandas
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Backend default (pandas / arrow)
+AGG_BACKEND = os.environ.get("DBD_AGG_BACKEND", "pandas")
+
+PROVINCE_YEAR_COLUMNS = [
+    'provinsi',
+    'tahun',
+    'total_kasus',
+    'rata_rata_kasus',
+    'jumlah_record',
+    'jumlah_kabkot'
+]
+
+
+class AggregationBackend(ABC):
+    """
+    Interface backend agregasi. Input dan output selalu objek pandas,
+    sehingga pemanggil tidak perlu tahu backend mana yang dipakai.
+    Backend yang belum mengimplementasikan semua method gagal saat dibuat.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def aggregate_by_province_year(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agregasi per provinsi per tahun
+
+        Args:
+            df: DataFrame data kasus
+
+        Returns:
+            DataFrame dengan kolom PROVINCE_YEAR_COLUMNS
+        """
+
+    @abstractmethod
+    def growth_rate(self, df: pd.DataFrame, groupby_cols: List[str]) -> pd.DataFrame:
+        """
+        Growth rate year-over-year per grup
+
+        Args:
+            df: DataFrame data kasus
+            groupby_cols: Kolom grouping
+
+        Returns:
+            df terurut per groupby_cols + tahun dengan kolom growth_rate
+        """
+
+    @abstractmethod
+    def summary_statistics(self, df: pd.DataFrame) -> Dict:
+        """
+        Statistik summary data kasus
+
+        Args:
+            df: DataFrame data kasus
+
+        Returns:
+            Dictionary berisi statistik
+        """
+
+
+class PandasBackend(AggregationBackend):
+    """
+    Backend referensi (pandas, single-thread)
+    """
+
+    name = 'pandas'
+
+    def aggregate_by_province_year(self, df: pd.DataFrame) -> pd.DataFrame:
+        agg_df = df.groupby(['nama_provinsi', 'tahun'], observed=True).agg({
+            'jumlah_kasus': ['sum', 'mean', 'count'],
+            'nama_kabupaten_kota': 'nunique'
+        }).reset_index()
+
+        agg_df.columns = PROVINCE_YEAR_COLUMNS
+        return agg_df
+
+    def growth_rate(self, df: pd.DataFrame, groupby_cols: List[str]) -> pd.DataFrame:
+        df_sorted = df.sort_values(groupby_cols + ['tahun'])
+
+        df_sorted['growth_rate'] = df_sorted.groupby(groupby_cols)['jumlah_kasus'].pct_change() * 100
+
+        return df_sorted
+
+    def summary_statistics(self, df: pd.DataFrame) -> Dict:
+        return {
+            'total_records': len(df),
+            'total_kasus': df['jumlah_kasus'].sum(),
+            'rata_rata_kasus': df['jumlah_kasus'].mean(),
+            'median_kasus': df['jumlah_kasus'].median(),
+            'min_kasus': df['jumlah_kasus'].min(),
+            'max_kasus': df['jumlah_kasus'].max(),
+            'std_dev_kasus': df['jumlah_kasus'].std(),
+            'jumlah_provinsi': df['nama_provinsi'].nunique(),
+            'jumlah_kabupaten_kota': df['nama_kabupaten_kota'].nunique(),
+            'tahun_range': (df['tahun'].min(), df['tahun'].max()),
+            'tahun_count': df['tahun'].nunique()
+        }
+
+
+def _key_array(series: pd.Series) -> pa.Array:
+    # Kolom categorical dikirim sebagai kode kategori (null untuk NaN) agar
+    # urutan group/sort sama dengan pandas (urutan kategori, bukan leksikal)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        return pa.array(codes, mask=codes < 0)
+    return pa.array(series, from_pandas=True)
+
+
+def _decode_key(values: pa.ChunkedArray, series: pd.Series) -> pd.Series:
+    # Kebalikan _key_array, dengan dtype kolom sumber
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return pd.Series(pd.Categorical.from_codes(values.to_numpy(), dtype=series.dtype))
+    return values.to_pandas().astype(series.dtype)
+
+
+def _sort_codes(series: pd.Series) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    # Kode integer yang urutannya sama dengan sort_values (null di akhir)
+    # beserta mask baris non-null (None jika kolom tidak punya null)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, size = series.cat.codes.to_numpy(), len(series.cat.categories)
+    elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iu':
+        return series.to_numpy(), None
+    else:
+        codes, uniques = pd.factorize(series, sort=True)
+        size = len(uniques)
+    # dtype sekecil mungkin: lexsort memakai radix sort untuk integer 8/16 bit
+    valid = codes >= 0
+    codes = codes.astype(np.min_scalar_type(size))
+    if valid.all():
+        return codes, None
+    codes[~valid] = size
+    return codes, valid
+
+
+def _scalar_type(series: pd.Series) -> type:
+    # Tipe skalar numpy hasil reduksi pandas (min/max) untuk kolom ini;
+    # dtype nullable (Int32) direduksi ke dtype numpy-nya (int32)
+    return getattr(series.dtype, 'numpy_dtype', series.dtype).type
+
+
+def _cast(value, scalar_type: type):
+    return value if value is None else scalar_type(value)
+
+
+def _float_values(series: pd.Series) -> np.ndarray:
+    return series.to_numpy(dtype='float64', na_value=np.nan)
+
+
+class ArrowBackend(AggregationBackend):
+    """
+    Backend Apache Arrow: group-by dan statistik dijalankan oleh engine
+    Acero pyarrow yang memakai semua core; growth rate diurutkan dengan
+    radix sort atas kode integer. Frame pandas hanya dibungkus (kode
+    kategori dan array numerik, tanpa konversi string) dan hasilnya
+    dikembalikan dengan dtype yang sama dengan PandasBackend.
+    """
+
+    name = 'arrow'
+
+    def __init__(self, use_threads: bool = True):
+        """
+        Args:
+            use_threads: Jalankan Acero multi-thread
+        """
+        self.use_threads = use_threads
+        self._reference = PandasBackend()
+
+    def aggregate_by_province_year(self, df: pd.DataFrame) -> pd.DataFrame:
+        table = pa.table({
+            'provinsi': _key_array(df['nama_provinsi']),
+            'tahun': _key_array(df['tahun']),
+            'kasus': pa.array(df['jumlah_kasus'], from_pandas=True),
+            'kabkot': _key_array(df['nama_kabupaten_kota']),
+        })
+        grouped = table.group_by(['provinsi', 'tahun'], use_threads=self.use_threads).aggregate([
+            ('kasus', 'sum', pc.ScalarAggregateOptions(min_count=0)),
+            ('kasus', 'count'),
+            ('kabkot', 'count_distinct'),
+        ])
+        # Grup dengan key null dibuang seperti groupby pandas (dropna)
+        grouped = grouped.filter(pc.and_(pc.is_valid(grouped['provinsi']), pc.is_valid(grouped['tahun'])))
+        grouped = grouped.sort_by([('provinsi', 'ascending'), ('tahun', 'ascending')])
+
+        # dtype hasil mengikuti backend pandas (dihitung pada frame kosong)
+        dtypes = self._reference.aggregate_by_province_year(df.iloc[:0]).dtypes
+        totals = grouped['kasus_sum'].to_numpy()
+        counts = grouped['kasus_count'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+        agg_df = pd.DataFrame({
+            'provinsi': _decode_key(grouped['provinsi'], df['nama_provinsi']),
+            'tahun': _decode_key(grouped['tahun'], df['tahun']),
+            'total_kasus': pd.Series(totals).astype(dtypes['total_kasus']),
+            'rata_rata_kasus': pd.Series(means).astype(dtypes['rata_rata_kasus']),
+            'jumlah_record': pd.Series(counts).astype(dtypes['jumlah_record']),
+            'jumlah_kabkot': pd.Series(grouped['kabkot_count_distinct'].to_numpy()).astype(dtypes['jumlah_kabkot']),
+        })
+        return agg_df
+
+    def growth_rate(self, df: pd.DataFrame, groupby_cols: List[str]) -> pd.DataFrame:
+        sort_cols = groupby_cols + ['tahun']
+        keys = {column: _sort_codes(df[column]) for column in dict.fromkeys(sort_cols)}
+        # Sort multi-kolom Arrow jauh lebih lambat daripada lexsort atas
+        # kode integer; np.lexsort stabil seperti sort_values multi-kolom
+        order = np.lexsort([keys[column][0] for column in reversed(sort_cols)])
+
+        df_sorted = df.take(order)
+        values = _float_values(df['jumlah_kasus'])[order]
+
+        # Baris i satu grup dengan baris i-1 jika semua key sama dan tidak null
+        same_group = np.ones(max(len(order) - 1, 0), dtype=bool)
+        for column in groupby_cols:
+            codes, valid = keys[column]
+            codes = codes[order]
+            same_group &= codes[1:] == codes[:-1]
+            if valid is not None:
+                same_group &= valid[order][1:]
+
+        growth = np.full(len(order), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Urutan operasi sama dengan pct_change() * 100
+            change = (values[1:] / values[:-1] - 1) * 100
+        growth[1:] = np.where(same_group, change, np.nan)
+
+        dtype = self._reference.growth_rate(df.iloc[:0], groupby_cols)['growth_rate'].dtype
+        df_sorted['growth_rate'] = pd.Series(growth, index=df_sorted.index).astype(dtype)
+        return df_sorted
+
+    def summary_statistics(self, df: pd.DataFrame) -> Dict:
+        kasus = pa.array(df['jumlah_kasus'], from_pandas=True)
+        table = pa.table({
+            'kasus': kasus,
+            'provinsi': _key_array(df['nama_provinsi']),
+            'kabkot': _key_array(df['nama_kabupaten_kota']),
+            'tahun': _key_array(df['tahun']),
+        })
+        stats = table.group_by([], use_threads=self.use_threads).aggregate([
+            ('kasus', 'sum', pc.ScalarAggregateOptions(min_count=0)),
+            ('kasus', 'count'),
+            ('kasus', 'min'),
+            ('kasus', 'max'),
+            ('kasus', 'stddev', pc.VarianceOptions(ddof=1)),
+            ('provinsi', 'count_distinct'),
+            ('kabkot', 'count_distinct'),
+            ('tahun', 'min'),
+            ('tahun', 'max'),
+            ('tahun', 'count_distinct'),
+        ]).to_pylist()[0]
+
+        count = stats['kasus_count']
+        median = pc.quantile(kasus, q=0.5, interpolation='linear')[0].as_py()
+        # Tipe skalar mengikuti PandasBackend (np.int64/np.int32/np.float64),
+        # bukan int/float Python hasil to_pylist
+        kasus_type = _scalar_type(df['jumlah_kasus'])
+        sum_type = {'b': np.int64, 'i': np.int64, 'u': np.uint64}.get(np.dtype(kasus_type).kind, kasus_type)
+        tahun_type = _scalar_type(df['tahun'])
+        return {
+            'total_records': len(df),
+            'total_kasus': _cast(stats['kasus_sum'], sum_type),
+            'rata_rata_kasus': np.float64(stats['kasus_sum'] / count if count else np.nan),
+            'median_kasus': np.float64(np.nan if median is None else median),
+            'min_kasus': _cast(stats['kasus_min'], kasus_type),
+            'max_kasus': _cast(stats['kasus_max'], kasus_type),
+            'std_dev_kasus': np.float64(np.nan if stats['kasus_stddev'] is None else stats['kasus_stddev']),
+            'jumlah_provinsi': stats['provinsi_count_distinct'],
+            'jumlah_kabupaten_kota': stats['kabkot_count_distinct'],
+            'tahun_range': (_cast(stats['tahun_min'], tahun_type), _cast(stats['tahun_max'], tahun_type)),
+            'tahun_count': stats['tahun_count_distinct']
+        }
+
+
+BACKENDS = {
+    'pandas': PandasBackend,
+    'arrow': ArrowBackend,
+}
+
+_backends: Dict[str, AggregationBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: Optional[str] = None) -> AggregationBackend:
+    """
+    Mendapatkan backend agregasi (satu instance per nama per proses)
+
+    Args:
+        name: 'pandas' atau 'arrow' (default: AGG_BACKEND)
+
+    Returns:
+        AggregationBackend
+
+    Raises:
+        ValueError: Jika nama backend tidak dikenal
+    """
+    name = (name or AGG_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Backend agregasi tidak dikenal: {name} (pilihan: {', '.join(BACKENDS)})")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
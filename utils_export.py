@@ -0,0 +1,253 @@
+"""
+Utility Functions untuk Export Grafik
+Render batch figure (Plotly via Kaleido, Matplotlib via Agg) ke PNG lewat
+satu renderer yang hidup selama proses, di background worker, dengan hasil
+render di-cache berdasarkan hash figure dan dikemas sebagai ZIP
+"""
+
+import io
+import hashlib
+import logging
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+from matplotlib.figure import Figure
+import plotly.graph_objects as go
+import plotly.io as pio
+
+logger = logging.getLogger(__name__)
+
+# Kaleido opsional: tanpa Kaleido figure Plotly diekspor sebagai HTML
+try:
+    import kaleido
+    KALEIDO_AVAILABLE = True
+except ImportError:
+    kaleido = None
+    KALEIDO_AVAILABLE = False
+
+
+# Ukuran default PNG (sama dengan export_figure_to_png lama)
+EXPORT_WIDTH = 1200
+EXPORT_HEIGHT = 800
+EXPORT_SCALE = 1
+
+# Batas cache PNG hasil render (byte)
+IMAGE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Figure Plotly / Matplotlib, atau builder tanpa argumen yang mengembalikannya
+FigureLike = Union[go.Figure, Figure, Callable[[], Union[go.Figure, Figure]]]
+
+
+class FigureExporter:
+    """
+    Renderer PNG bersama untuk figure Plotly dan Matplotlib.
+
+    Server Kaleido (Chrome headless pada Kaleido v1) dijalankan sekali dan
+    dipakai ulang oleh semua export; render berjalan berurutan di satu
+    background worker sehingga request Streamlit tidak ikut menunggu.
+    """
+
+    def __init__(
+        self,
+        width: int = EXPORT_WIDTH,
+        height: int = EXPORT_HEIGHT,
+        scale: float = EXPORT_SCALE,
+        cache_max_bytes: int = IMAGE_CACHE_MAX_BYTES
+    ):
+        """
+        Args:
+            width: Lebar PNG (pixel layout)
+            height: Tinggi PNG (pixel layout)
+            scale: Faktor skala resolusi
+            cache_max_bytes: Batas total ukuran cache PNG
+        """
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._cache_size = 0
+        self._lock = threading.Lock()
+        self._started = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        """Jalankan server Kaleido persisten (sekali per proses)"""
+        with self._lock:
+            if self._started or not KALEIDO_AVAILABLE:
+                return
+            # Kaleido v1: server sinkron persisten; Kaleido v0 sudah
+            # mempertahankan subprocess-nya sendiri lewat plotly
+            start_server = getattr(kaleido, 'start_sync_server', None)
+            if start_server is not None:
+                try:
+                    start_server(silence_warnings=True)
+                except Exception as e:
+                    logger.warning(f"Server Kaleido persisten gagal dijalankan, render per panggilan: {e}")
+            self._started = True
+
+    def close(self) -> None:
+        """Hentikan worker dan server Kaleido"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._started and getattr(kaleido, 'stop_sync_server', None) is not None:
+                try:
+                    kaleido.stop_sync_server(silence_warnings=True)
+                except Exception as e:
+                    logger.warning(f"Gagal menghentikan server Kaleido: {e}")
+            self._started = False
+
+    def _cache_get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+            return image
+
+    def _cache_put(self, key: Hashable, image: bytes) -> None:
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_size -= len(old)
+            self._cache[key] = image
+            self._cache_size += len(image)
+            while self._cache_size > self.cache_max_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_size -= len(evicted)
+
+    def _plotly_to_png(self, fig: go.Figure) -> bytes:
+        if not KALEIDO_AVAILABLE:
+            raise RuntimeError("Library 'kaleido' belum terinstall (pip install kaleido)")
+        self.start()
+        return pio.to_image(fig, format='png', width=self.width, height=self.height, scale=self.scale)
+
+    def _matplotlib_to_png(self, fig: Figure) -> bytes:
+        buffer = io.BytesIO()
+        # Tanpa pyplot: figure DBDVisualizer punya canvas Agg sendiri, jadi
+        # aman di worker thread dan tidak perlu plt.close()
+        fig.savefig(buffer, format='png', dpi=100 * self.scale, bbox_inches='tight')
+        return buffer.getvalue()
+
+    def render_png(self, figure: FigureLike, cache_key: Optional[Any] = None) -> bytes:
+        """
+        Render satu figure ke PNG (memakai cache)
+
+        Figure Plotly di-cache berdasarkan hash JSON-nya; figure Matplotlib
+        hanya di-cache jika cache_key diberikan (builder tidak dipanggil
+        saat cache hit).
+
+        Args:
+            figure: Figure Plotly/Matplotlib atau builder tanpa argumen
+            cache_key: Kunci cache eksplisit (wajib agar Matplotlib di-cache)
+
+        Returns:
+            Bytes PNG
+        """
+        size = (self.width, self.height, self.scale)
+        if cache_key is not None:
+            # repr: kunci boleh berisi dict/list (mis. signature file)
+            cache_key = ('key', repr(cache_key), size)
+            image = self._cache_get(cache_key)
+            if image is not None:
+                return image
+
+        fig = figure() if callable(figure) else figure
+        if isinstance(fig, go.Figure):
+            fig_hash = hashlib.sha256(fig.to_json().encode('utf-8')).hexdigest()
+            key = ('plotly', fig_hash, size)
+            image = self._cache_get(key)
+            if image is None:
+                image = self._plotly_to_png(fig)
+                self._cache_put(key, image)
+        else:
+            image = self._matplotlib_to_png(fig)
+
+        if cache_key is not None:
+            self._cache_put(cache_key, image)
+        return image
+
+    def export_zip(
+        self,
+        figures: Dict[str, FigureLike],
+        cache_keys: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """
+        Render sekumpulan figure dan kemas dalam satu ZIP
+
+        Tanpa Kaleido, figure Plotly disimpan sebagai <nama>.html agar
+        export tetap lengkap.
+
+        Args:
+            figures: Dict nama file (tanpa ekstensi) -> figure / builder
+            cache_keys: Kunci cache eksplisit per nama (opsional)
+
+        Returns:
+            Bytes file ZIP
+        """
+        cache_keys = cache_keys or {}
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, figure in figures.items():
+                if not KALEIDO_AVAILABLE:
+                    figure = figure() if callable(figure) else figure
+                    if isinstance(figure, go.Figure):
+                        archive.writestr(f"{name}.html", figure.to_html(include_plotlyjs='cdn'))
+                        continue
+                image = self.render_png(figure, cache_keys.get(name))
+                # PNG sudah terkompresi; tidak perlu di-deflate lagi
+                archive.writestr(zipfile.ZipInfo(f"{name}.png"), image, compress_type=zipfile.ZIP_STORED)
+        return buffer.getvalue()
+
+    def submit_zip(
+        self,
+        figures: Dict[str, FigureLike],
+        cache_keys: Optional[Dict[str, Any]] = None
+    ) -> Future:
+        """
+        Jalankan export_zip di background worker
+
+        Args:
+            figures: Dict nama file -> figure / builder
+            cache_keys: Kunci cache eksplisit per nama (opsional)
+
+        Returns:
+            Future yang menghasilkan bytes ZIP
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dbd-export')
+            executor = self._executor
+        return executor.submit(self.export_zip, figures, cache_keys)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistik cache PNG
+
+        Returns:
+            Dict images, bytes
+        """
+        with self._lock:
+            return {'images': len(self._cache), 'bytes': self._cache_size}
+
+
+_exporter: Optional[FigureExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> FigureExporter:
+    """
+    Mendapatkan FigureExporter bersama (satu renderer per proses)
+
+    Returns:
+        FigureExporter
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = FigureExporter()
+        return _exporter
@@ -0,0 +1,218 @@
+"""
+Utility Functions untuk Cache Figure Plotly
+Figure disimpan sebagai JSON dengan kunci (fungsi, fingerprint agregat
+input, parameter) dan eviction LRU, sehingga rerun Streamlit yang tidak
+mengubah filter tidak membangun ulang figure (pandas + plotly)
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+logger = logging.getLogger(__name__)
+
+
+# Batas cache figure bersama (per proses, lintas session)
+FIGURE_CACHE_MAX_ENTRIES = 64
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprint isi DataFrame (kolom, dtype, index dan nilai)
+
+    Args:
+        df: DataFrame
+
+    Returns:
+        Hex digest sha256
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def data_fingerprint(data) -> str:
+    """
+    Fingerprint input figure: objek dengan method fingerprint() (mis.
+    DBDAggregateCube), DataFrame/Series, atau nilai lain via repr
+
+    Args:
+        data: Input figure
+
+    Returns:
+        String fingerprint
+    """
+    if hasattr(data, 'fingerprint'):
+        return data.fingerprint()
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    if isinstance(data, pd.DataFrame):
+        return frame_fingerprint(data)
+    return hashlib.sha256(repr(data).encode('utf-8')).hexdigest()
+
+
+def _freeze(value) -> Hashable:
+    # Parameter list/set/dict -> bentuk hashable yang stabil untuk kunci cache
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+class FigureCache:
+    """
+    Cache LRU untuk figure Plotly yang disimpan sebagai JSON.
+
+    Yang disimpan adalah JSON (bukan objek Figure) agar setiap hit
+    mengembalikan figure baru yang aman dimodifikasi pemanggil dan
+    ukuran cache bisa dibatasi dalam byte.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = FIGURE_CACHE_MAX_ENTRIES,
+        max_bytes: int = FIGURE_CACHE_MAX_BYTES
+    ):
+        """
+        Args:
+            max_entries: Jumlah figure maksimum
+            max_bytes: Total ukuran JSON maksimum (byte)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, str]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Optional[go.Figure]:
+        """
+        Figure untuk kunci tertentu (None jika belum ada)
+
+        Args:
+            key: Kunci cache
+
+        Returns:
+            Plotly Figure baru atau None
+        """
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return pio.from_json(payload)
+
+    def put(self, key: Tuple, fig: go.Figure) -> None:
+        """
+        Simpan figure (sebagai JSON) lalu evict entri terlama bila melewati batas
+
+        Args:
+            key: Kunci cache
+            fig: Plotly Figure
+        """
+        payload = fig.to_json()
+        if len(payload) > self.max_bytes:
+            logger.info(f"Figure {key[0]} ({len(payload):,} byte) melebihi batas cache, tidak disimpan")
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = payload
+            self._size += len(payload)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        """Kosongkan cache"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistik cache
+
+        Returns:
+            Dict entries, bytes, hits, misses
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'hits': self.hits, 'misses': self.misses}
+
+    def memoize(self, name: Optional[str] = None) -> Callable:
+        """
+        Decorator untuk fungsi pembuat figure dengan signature
+        fn(data, *args, **kwargs); kunci cache = (name, fingerprint data,
+        args, kwargs)
+
+        Args:
+            name: Nama fungsi pada kunci (default: nama fungsi)
+        """
+        def decorator(fn):
+            fn_name = name or fn.__name__
+
+            @wraps(fn)
+            def wrapper(data, *args, **kwargs):
+                key = (fn_name, data_fingerprint(data), _freeze(args), _freeze(kwargs))
+                fig = self.get(key)
+                if fig is None:
+                    fig = fn(data, *args, **kwargs)
+                    self.put(key, fig)
+                return fig
+            return wrapper
+        return decorator
+
+
+_figure_cache: Optional[FigureCache] = None
+_figure_cache_lock = threading.Lock()
+
+
+def get_figure_cache() -> FigureCache:
+    """
+    Mendapatkan FigureCache bersama (satu per proses)
+
+    Returns:
+        FigureCache
+    """
+    global _figure_cache
+    with _figure_cache_lock:
+        if _figure_cache is None:
+            _figure_cache = FigureCache()
+        return _figure_cache
+
+
+def cached_figure(name: Optional[str] = None) -> Callable:
+    """
+    Decorator memoize pada FigureCache bersama (cache diambil saat fungsi
+    dipanggil, bukan saat modul di-import)
+
+    Args:
+        name: Nama fungsi pada kunci (default: nama fungsi)
+    """
+    def decorator(fn):
+        fn_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(data, *args, **kwargs):
+            return get_figure_cache().memoize(fn_name)(fn)(data, *args, **kwargs)
+        return wrapper
+    return decorator
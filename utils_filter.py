@@ -0,0 +1,427 @@
+"""
+Utility Functions untuk Filter Data DBD
+Index sekunder (posisi baris per nilai) untuk tahun, provinsi dan kab/kota,
+dan filter engine: seleksi sidebar dikanonikalisasi menjadi frozenset,
+posisi baris hasil filter di-memoize per versi data dalam LRU, sehingga
+rerun tanpa perubahan filter tidak menghitung mask lagi
+"""
+
+import weakref
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Kolom yang diberi index posisi baris (yang tidak ada di frame dilewati)
+INDEX_COLUMNS = ['tahun', 'kode_provinsi', 'kode_kabupaten_kota', 'nama_provinsi', 'nama_kabupaten_kota']
+
+# Jumlah index (per frame) yang disimpan row_index_for
+MAX_INDEXED_FRAMES = 8
+
+# Jumlah seleksi (posisi baris) yang disimpan
+FILTER_CACHE_MAX_ENTRIES = 64
+
+# Jumlah frame hasil filter yang disimpan utuh (paling sering dipakai ulang)
+FILTER_FRAME_MAX_ENTRIES = 4
+
+Selection = Tuple[Tuple[str, Optional[frozenset]], ...]
+
+
+def canonical_selection(selection: Dict[str, Optional[Iterable]]) -> Selection:
+    """
+    Bentuk kanonik seleksi filter: kolom terurut, nilai frozenset
+    (urutan pilihan multiselect tidak memengaruhi kunci)
+
+    Args:
+        selection: Dict kolom -> nilai terpilih (None = tanpa filter)
+
+    Returns:
+        Tuple (kolom, frozenset nilai / None) terurut per kolom
+    """
+    return tuple(
+        (column, None if values is None else frozenset(values))
+        for column, values in sorted(selection.items())
+    )
+
+
+def _version_key(data_version: Any) -> Hashable:
+    # Versi data boleh berupa dict (mis. signature file); di-repr agar hashable
+    try:
+        hash(data_version)
+        return data_version
+    except TypeError:
+        return repr(data_version)
+
+
+def intersect_positions(*arrays: np.ndarray) -> np.ndarray:
+    """
+    AND: irisan beberapa array posisi terurut
+
+    Dimulai dari array terkecil dan setiap array lain dicari dengan
+    searchsorted, sehingga biayanya sebanding dengan ukuran array terkecil
+    (hasil), bukan ukuran tabel.
+
+    Args:
+        arrays: Array posisi terurut tanpa duplikat
+
+    Returns:
+        Array posisi terurut
+    """
+    ordered = sorted(arrays, key=len)
+    result = ordered[0]
+    for other in ordered[1:]:
+        if len(result) == 0 or len(other) == 0:
+            return result[:0]
+        idx = np.searchsorted(other, result)
+        idx[idx == len(other)] = len(other) - 1
+        result = result[other[idx] == result]
+    return result
+
+
+def union_positions(*arrays: np.ndarray) -> np.ndarray:
+    """
+    OR: gabungan array posisi dari nilai-nilai berbeda pada satu kolom
+    (tidak pernah berbagi baris, jadi cukup digabung lalu diurutkan)
+
+    Args:
+        arrays: Array posisi terurut
+
+    Returns:
+        Array posisi terurut tanpa duplikat
+    """
+    arrays = [array for array in arrays if len(array)]
+    if not arrays:
+        return np.empty(0, dtype=np.int64)
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.sort(np.concatenate(arrays))
+
+
+class DBDRowIndex:
+    """
+    Index sekunder posisi baris per nilai kolom.
+
+    Dibangun sekali per data (satu groupby per kolom). Seleksi gabungan
+    dijawab dengan union (OR, nilai dalam satu kolom) lalu irisan (AND,
+    antar kolom) atas array posisi terurut, sebanding dengan ukuran hasil.
+    Seperti container dense pada roaring bitmap, seleksi yang mencakup
+    sebagian besar tabel dikomposisi sebagai bitmap boolean (scatter +
+    AND) karena pada ukuran itu lebih murah daripada sort/irisan.
+    """
+
+    # Di atas fraksi baris ini seleksi dikomposisi sebagai bitmap
+    DENSE_FRACTION = 0.125
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[Sequence[str]] = None):
+        """
+        Args:
+            df: DataFrame data kasus
+            columns: Kolom yang di-index (default: INDEX_COLUMNS yang ada di df)
+        """
+        self.n_rows = len(df)
+        self.columns = [column for column in (columns or INDEX_COLUMNS) if column in df.columns]
+        self._positions: Dict[str, Dict[Any, np.ndarray]] = {
+            column: df.groupby(column, observed=True, sort=False).indices
+            for column in self.columns
+        }
+        self._empty = np.empty(0, dtype=np.int64)
+
+    def covers(self, columns: Iterable[str]) -> bool:
+        """True jika semua kolom punya index"""
+        return all(column in self._positions for column in columns)
+
+    def lookup(self, column: str, value: Any) -> np.ndarray:
+        """
+        Posisi baris untuk satu nilai
+
+        Args:
+            column: Kolom ber-index
+            value: Nilai kolom
+
+        Returns:
+            Array posisi terurut (kosong jika nilai tidak ada)
+        """
+        return self._positions[column].get(value, self._empty)
+
+    def select(self, selection: Dict[str, Any]) -> np.ndarray:
+        """
+        Posisi baris untuk seleksi gabungan: OR antar nilai dalam satu
+        kolom, AND antar kolom
+
+        Args:
+            selection: Dict kolom -> nilai tunggal / iterable nilai (None = tanpa filter)
+
+        Returns:
+            Array posisi terurut
+        """
+        per_column = []
+        for column, values in selection.items():
+            if values is None:
+                continue
+            if isinstance(values, (str, bytes)) or not isinstance(values, Iterable):
+                values = [values]
+            per_column.append([self.lookup(column, value) for value in values])
+        if not per_column:
+            return np.arange(self.n_rows)
+
+        sizes = [sum(len(array) for array in arrays) for arrays in per_column]
+        if min(sizes) <= self.DENSE_FRACTION * self.n_rows:
+            return intersect_positions(*[union_positions(*arrays) for arrays in per_column])
+
+        bitmap = np.ones(self.n_rows, dtype=bool)
+        for arrays in per_column:
+            column_bitmap = np.zeros(self.n_rows, dtype=bool)
+            for array in arrays:
+                column_bitmap[array] = True
+            bitmap &= column_bitmap
+        return np.flatnonzero(bitmap)
+
+    def take(self, df: pd.DataFrame, selection: Dict[str, Any]) -> pd.DataFrame:
+        """
+        DataFrame hasil seleksi (frame yang sama dengan yang di-index)
+
+        Args:
+            df: DataFrame yang di-index
+            selection: Lihat select()
+
+        Returns:
+            DataFrame baru berisi baris terpilih
+        """
+        return df.take(self.select(selection))
+
+
+_indexed_frames: 'OrderedDict[int, Tuple[weakref.ref, DBDRowIndex]]' = OrderedDict()
+_indexed_frames_lock = threading.Lock()
+
+
+def row_index_for(df: pd.DataFrame) -> DBDRowIndex:
+    """
+    DBDRowIndex untuk sebuah frame, dibangun sekali per objek frame
+    (frame tidak boleh diubah barisnya setelah index dibangun)
+
+    Args:
+        df: DataFrame data kasus
+
+    Returns:
+        DBDRowIndex
+    """
+    key = id(df)
+    with _indexed_frames_lock:
+        entry = _indexed_frames.get(key)
+        if entry is not None and entry[0]() is df and entry[1].n_rows == len(df):
+            _indexed_frames.move_to_end(key)
+            return entry[1]
+    index = DBDRowIndex(df)
+    with _indexed_frames_lock:
+        _indexed_frames[key] = (weakref.ref(df), index)
+        while len(_indexed_frames) > MAX_INDEXED_FRAMES:
+            _indexed_frames.popitem(last=False)
+    return index
+
+
+def selection_mask(df: pd.DataFrame, selection: Selection) -> np.ndarray:
+    """
+    Mask boolean untuk seleksi kanonik
+
+    Kolom categorical dicocokkan lewat kode kategori (lookup table),
+    kolom lain lewat isin.
+
+    Args:
+        df: DataFrame data kasus
+        selection: Seleksi kanonik (canonical_selection)
+
+    Returns:
+        Array boolean sepanjang df
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in selection:
+        if values is None:
+            continue
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Slot terakhir menampung kode -1 (NaN)
+            lookup = np.zeros(len(series.cat.categories) + 1, dtype=bool)
+            codes = series.cat.categories.get_indexer(list(values))
+            lookup[codes[codes >= 0]] = True
+            mask &= lookup[series.cat.codes.to_numpy()]
+        else:
+            mask &= series.isin(values).to_numpy()
+    return mask
+
+
+class DBDFilterEngine:
+    """
+    Filter data kasus dengan memoization per (versi data, seleksi).
+
+    Yang disimpan untuk setiap seleksi adalah posisi baris (int array,
+    murah); frame hasil filter hanya disimpan untuk beberapa seleksi
+    terakhir. Seleksi baru dijawab dari DBDRowIndex versi data tersebut
+    (dibangun sekali per versi). Seleksi yang mencakup semua baris
+    mengembalikan frame asli dan posisi yang berurutan mengembalikan slice
+    `iloc`, keduanya tanpa menyalin data.
+    """
+
+    # Jumlah versi data yang index-nya disimpan
+    MAX_INDEXES = 2
+
+    def __init__(
+        self,
+        max_entries: int = FILTER_CACHE_MAX_ENTRIES,
+        max_frames: int = FILTER_FRAME_MAX_ENTRIES
+    ):
+        """
+        Args:
+            max_entries: Jumlah seleksi (posisi baris) yang di-cache
+            max_frames: Jumlah frame hasil filter yang di-cache
+        """
+        self.max_entries = max_entries
+        self.max_frames = max_frames
+        self._positions: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+        self._frames: 'OrderedDict[Tuple, pd.DataFrame]' = OrderedDict()
+        self._indexes: 'OrderedDict[Hashable, DBDRowIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def positions(
+        self,
+        df: pd.DataFrame,
+        data_version: Any,
+        selection: Dict[str, Optional[Iterable]]
+    ) -> np.ndarray:
+        """
+        Posisi baris (iloc) yang lolos filter
+
+        Args:
+            df: DataFrame data kasus (isinya harus sesuai data_version)
+            data_version: Versi data (generation / signature file)
+            selection: Dict kolom -> nilai terpilih (None = tanpa filter)
+
+        Returns:
+            Array posisi baris (read-only)
+        """
+        key = (_version_key(data_version), canonical_selection(selection))
+        with self._lock:
+            cached = self._positions.get(key)
+            if cached is not None:
+                self._positions.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        index = self.row_index(df, key[0])
+        if index.covers(column for column, values in key[1] if values is not None):
+            positions = index.select(dict(key[1]))
+        else:
+            positions = np.flatnonzero(selection_mask(df, key[1]))
+        positions.setflags(write=False)
+        with self._lock:
+            self._positions[key] = positions
+            while len(self._positions) > self.max_entries:
+                self._positions.popitem(last=False)
+        return positions
+
+    def row_index(self, df: pd.DataFrame, data_version: Any) -> DBDRowIndex:
+        """
+        DBDRowIndex untuk versi data (dibangun sekali per versi)
+
+        Args:
+            df: DataFrame data kasus (isinya harus sesuai data_version)
+            data_version: Versi data
+
+        Returns:
+            DBDRowIndex
+        """
+        key = _version_key(data_version)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index = DBDRowIndex(df)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.MAX_INDEXES:
+                self._indexes.popitem(last=False)
+        return index
+
+    def apply(
+        self,
+        df: pd.DataFrame,
+        data_version: Any,
+        selection: Dict[str, Optional[Iterable]]
+    ) -> pd.DataFrame:
+        """
+        DataFrame hasil filter
+
+        Args:
+            df: DataFrame data kasus (isinya harus sesuai data_version)
+            data_version: Versi data (generation / signature file)
+            selection: Dict kolom -> nilai terpilih (None = tanpa filter)
+
+        Returns:
+            DataFrame hasil filter (jangan dimodifikasi in-place; bisa
+            berupa df itu sendiri atau frame yang dipakai bersama)
+        """
+        positions = self.positions(df, data_version, selection)
+        if len(positions) == len(df):
+            return df
+        if len(positions) == 0 or positions[-1] - positions[0] + 1 == len(positions):
+            start = positions[0] if len(positions) else 0
+            return df.iloc[start:start + len(positions)]
+
+        key = (_version_key(data_version), canonical_selection(selection))
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                return frame
+        frame = df.take(positions)
+        with self._lock:
+            self._frames[key] = frame
+            while len(self._frames) > self.max_frames:
+                self._frames.popitem(last=False)
+        return frame
+
+    def clear(self) -> None:
+        """Kosongkan cache"""
+        with self._lock:
+            self._positions.clear()
+            self._frames.clear()
+            self._indexes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistik cache filter
+
+        Returns:
+            Dict selections, frames, hits, misses
+        """
+        with self._lock:
+            return {
+                'selections': len(self._positions),
+                'frames': len(self._frames),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_filter_engine: Optional[DBDFilterEngine] = None
+_filter_engine_lock = threading.Lock()
+
+
+def get_filter_engine() -> DBDFilterEngine:
+    """
+    Mendapatkan DBDFilterEngine bersama (satu per proses)
+
+    Returns:
+        DBDFilterEngine
+    """
+    global _filter_engine
+    with _filter_engine_lock:
+        if _filter_engine is None:
+            _filter_engine = DBDFilterEngine()
+        return _filter_engine
@@ -7,6 +7,12 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from utils_schema import CATEGORY_COLUMNS, REQUIRED_COLUMNS, apply_case_schema, concat_case_frames
+from utils_validation import DBDValidationEngine, DuplicateReport, ValidationReport, find_duplicates
+from utils_filter import DBDRowIndex
+from utils_query import DBDQuery
+from utils_backend import get_backend
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,15 +23,7 @@ class DBDDataParser:
     Class untuk parsing dan validasi data DBD dari CSV
     """
     
-    REQUIRED_COLUMNS = [
-        'kode_provinsi',
-        'nama_provinsi',
-        'kode_kabupaten_kota',
-        'nama_kabupaten_kota',
-        'jumlah_kasus',
-        'satuan',
-        'tahun'
-    ]
+    REQUIRED_COLUMNS = REQUIRED_COLUMNS
     
     def __init__(self, file_path: str):
         """
@@ -37,24 +35,43 @@ class DBDDataParser:
         self.file_path = file_path
         self.df = None
         self.validation_errors = []
-    
-    def load_csv(self, encoding: str = 'utf-8', delimiter: str = ',') -> pd.DataFrame:
+        self.ingest_issues = []
+        self._duplicates = None
+        self._row_index = None
+    
+    def load_csv(
+        self,
+        encoding: str = 'utf-8',
+        delimiter: str = ',',
+        chunksize: Optional[int] = None
+    ) -> pd.DataFrame:
         """
         Load data dari CSV file
         
         Args:
             encoding: Encoding file (default: utf-8)
             delimiter: Delimiter CSV (default: ,)
+            chunksize: Jika diisi, file dibaca per potongan lewat
+                ingest_csv_chunks; catatan validasi per baris disimpan di
+                self.ingest_issues
             
         Returns:
             DataFrame pandas
         """
         try:
-            self.df = pd.read_csv(
-                self.file_path,
-                encoding=encoding,
-                delimiter=delimiter
-            )
+            if chunksize:
+                self.df, self.ingest_issues = ingest_csv_chunks(
+                    self.file_path,
+                    chunksize=chunksize,
+                    encoding=encoding,
+                    delimiter=delimiter
+                )
+            else:
+                self.df = apply_case_schema(pd.read_csv(
+                    self.file_path,
+                    encoding=encoding,
+                    delimiter=delimiter
+                ))
             logger.info(f"Berhasil load {len(self.df)} baris data dari {self.file_path}")
             return self.df
         
@@ -87,14 +104,26 @@ class DBDDataParser:
         if self.df.empty:
             errors.append("Data kosong")
         
-        # Cek duplikat
-        duplicate_count = self.df.duplicated().sum()
-        if duplicate_count > 0:
-            errors.append(f"Ditemukan {duplicate_count} baris duplikat")
+        # Cek duplikat (natural key, hasil di-cache untuk clean_data)
+        duplicates = self.find_duplicates()
+        if duplicates.exact_count > 0:
+            errors.append(f"Ditemukan {duplicates.exact_count} baris duplikat")
         
         self.validation_errors = errors
         return len(errors) == 0, errors
     
+    def find_duplicates(self) -> DuplicateReport:
+        """
+        Deteksi duplikat berbasis natural key (hash sekali per DataFrame,
+        dipakai bersama oleh validate_structure dan clean_data)
+        
+        Returns:
+            DuplicateReport
+        """
+        if self._duplicates is None or self._duplicates[0] is not self.df:
+            self._duplicates = (self.df, find_duplicates(self.df))
+        return self._duplicates[1]
+    
     def validate_data_types(self) -> Tuple[bool, List[str]]:
         """
         Validasi tipe data kolom
@@ -158,6 +187,14 @@ class DBDDataParser:
         if high_cases > 0:
             warnings.append(f"Ditemukan {high_cases} baris dengan jumlah kasus sangat tinggi (outlier)")
         
+        # Cek key sama tetapi isi berbeda (peringatan: koreksi data dengan id baru tidak menggagalkan load)
+        duplicates = self.find_duplicates()
+        if duplicates.conflicting_count > 0:
+            warnings.append(
+                f"Ditemukan {duplicates.conflicting_count} baris dengan key "
+                f"{', '.join(duplicates.key)} sama tetapi isi berbeda"
+            )
+        
         # Cek satuan konsistensi
         unique_satuan = self.df['satuan'].unique()
         if len(unique_satuan) > 1:
@@ -175,59 +212,85 @@ class DBDDataParser:
         if self.df is None:
             raise ValueError("Data belum di-load")
         
-        df_clean = self.df.copy()
-        
-        # Hapus duplikat
-        df_clean = df_clean.drop_duplicates()
+        # Hapus duplikat (mask yang sama dengan validate_structure)
+        df_clean = self.df[~self.find_duplicates().exact]
         
         # Hapus baris dengan null di kolom penting
         df_clean = df_clean.dropna(subset=self.REQUIRED_COLUMNS)
         
+        # Trim whitespace di kolom string (pada categorical cukup per kategori)
+        for col in CATEGORY_COLUMNS:
+            if col in df_clean.columns:
+                df_clean[col] = df_clean[col].map(str.strip)
+        
         # Konversi tipe data
-        df_clean['jumlah_kasus'] = pd.to_numeric(df_clean['jumlah_kasus'], errors='coerce')
-        df_clean['tahun'] = pd.to_numeric(df_clean['tahun'], errors='coerce')
-        df_clean['kode_provinsi'] = pd.to_numeric(df_clean['kode_provinsi'], errors='coerce')
-        df_clean['kode_kabupaten_kota'] = pd.to_numeric(df_clean['kode_kabupaten_kota'], errors='coerce')
+        df_clean = apply_case_schema(df_clean)
         
         # Hapus baris dengan jumlah kasus negatif
         df_clean = df_clean[df_clean['jumlah_kasus'] >= 0]
         
-        # Trim whitespace di kolom string
-        string_columns = ['nama_provinsi', 'nama_kabupaten_kota', 'satuan']
-        for col in string_columns:
-            if col in df_clean.columns:
-                df_clean[col] = df_clean[col].str.strip()
-        
         logger.info(f"Data dibersihkan: {len(self.df)} -> {len(df_clean)} baris")
         
         self.df = df_clean
         return df_clean
     
-    def get_summary_statistics(self) -> Dict:
+    def validate_and_clean(self) -> 'ValidationReport':
+        """
+        Validasi + pembersihan dalam satu pass (DBDValidationEngine),
+        pengganti validate_structure/validate_data_types/
+        validate_business_rules/clean_data berurutan
+        
+        Returns:
+            ValidationReport; self.df diganti frame bersih jika data valid
+        """
+        if self.df is None:
+            raise ValueError("Data belum di-load")
+        
+        df_clean, report = DBDValidationEngine().run(self.df)
+        self.validation_errors = report.errors
+        if report.is_valid:
+            self.df = df_clean
+        return report
+    
+    def get_summary_statistics(self, backend: Optional[str] = None) -> Dict:
         """
         Mendapatkan statistik summary data
         
+        Args:
+            backend: Backend agregasi ('pandas' / 'arrow', default: DBD_AGG_BACKEND)
+        
         Returns:
             Dictionary berisi statistik
         """
         if self.df is None:
             raise ValueError("Data belum di-load")
         
-        stats = {
-            'total_records': len(self.df),
-            'total_kasus': self.df['jumlah_kasus'].sum(),
-            'rata_rata_kasus': self.df['jumlah_kasus'].mean(),
-            'median_kasus': self.df['jumlah_kasus'].median(),
-            'min_kasus': self.df['jumlah_kasus'].min(),
-            'max_kasus': self.df['jumlah_kasus'].max(),
-            'std_dev_kasus': self.df['jumlah_kasus'].std(),
-            'jumlah_provinsi': self.df['nama_provinsi'].nunique(),
-            'jumlah_kabupaten_kota': self.df['nama_kabupaten_kota'].nunique(),
-            'tahun_range': (self.df['tahun'].min(), self.df['tahun'].max()),
-            'tahun_count': self.df['tahun'].nunique()
-        }
-        
-        return stats
+        return get_backend(backend).summary_statistics(self.df)
+    
+    def row_index(self) -> DBDRowIndex:
+        """
+        Index posisi baris (tahun, kode/nama provinsi, kode/nama kab/kota),
+        dibangun sekali per DataFrame
+        
+        Returns:
+            DBDRowIndex
+        """
+        if self.df is None:
+            raise ValueError("Data belum di-load")
+        if self._row_index is None or self._row_index[0] is not self.df:
+            self._row_index = (self.df, DBDRowIndex(self.df))
+        return self._row_index[1]
+    
+    def query(self) -> DBDQuery:
+        """
+        Query lazy atas data (memakai row_index untuk where), mis.
+        parser.query().where(tahun=2023, nama_provinsi=p).groupby('nama_kabupaten_kota')
+        .agg(total=('jumlah_kasus', 'sum')).collect()
+        
+        Returns:
+            DBDQuery
+        """
+        return DBDQuery(self.df, index=self.row_index())
     
     def get_data_by_year(self, year: int) -> pd.DataFrame:
         """
@@ -239,10 +302,7 @@ class DBDDataParser:
         Returns:
             DataFrame terfilter
         """
-        if self.df is None:
-            raise ValueError("Data belum di-load")
-        
-        return self.df[self.df['tahun'] == year].copy()
+        return self.query().where(tahun=year).collect()
     
     def get_data_by_province(self, province_name: str) -> pd.DataFrame:
         """
@@ -254,36 +314,22 @@ class DBDDataParser:
         Returns:
             DataFrame terfilter
         """
-        if self.df is None:
-            raise ValueError("Data belum di-load")
-        
-        return self.df[self.df['nama_provinsi'] == province_name].copy()
+        return self.query().where(nama_provinsi=province_name).collect()
     
-    def aggregate_by_province_year(self) -> pd.DataFrame:
+    def aggregate_by_province_year(self, backend: Optional[str] = None) -> pd.DataFrame:
         """
         Agregasi data per provinsi per tahun
         
+        Args:
+            backend: Backend agregasi ('pandas' / 'arrow', default: DBD_AGG_BACKEND)
+        
         Returns:
             DataFrame agregat
         """
         if self.df is None:
             raise ValueError("Data belum di-load")
         
-        agg_df = self.df.groupby(['nama_provinsi', 'tahun']).agg({
-            'jumlah_kasus': ['sum', 'mean', 'count'],
-            'nama_kabupaten_kota': 'nunique'
-        }).reset_index()
-        
-        agg_df.columns = [
-            'provinsi',
-            'tahun',
-            'total_kasus',
-            'rata_rata_kasus',
-            'jumlah_record',
-            'jumlah_kabkot'
-        ]
-        
-        return agg_df
+        return get_backend(backend).aggregate_by_province_year(self.df)
 
 
 # Fungsi-fungsi utility standalone
@@ -299,25 +345,109 @@ def quick_load_and_validate(file_path: str) -> Tuple[Optional[pd.DataFrame], boo
     """
     try:
         parser = DBDDataParser(file_path)
-        df = parser.load_csv()
-        
-        is_valid_structure, structure_errors = parser.validate_structure()
-        is_valid_types, type_errors = parser.validate_data_types()
-        is_valid_business, business_warnings = parser.validate_business_rules()
+        parser.load_csv()
+        report = parser.validate_and_clean()
         
-        all_errors = structure_errors + type_errors + business_warnings
-        is_valid = is_valid_structure and is_valid_types
-        
-        if is_valid:
-            df_clean = parser.clean_data()
-            return df_clean, True, []
+        if report.is_valid:
+            return parser.df, True, []
         else:
-            return df, False, all_errors
+            return parser.df, False, report.errors + report.warnings
     
     except Exception as e:
         return None, False, [str(e)]
 
 
+# Jumlah baris per potongan saat membaca CSV besar (upload)
+INGEST_CHUNK_ROWS = 100_000
+
+# Batas nomor baris yang dicantumkan per pesan validasi
+MAX_REPORTED_ROWS = 10
+
+
+def _format_row_issue(rows: pd.Index, message: str) -> str:
+    shown = ', '.join(str(row) for row in rows[:MAX_REPORTED_ROWS])
+    if len(rows) > MAX_REPORTED_ROWS:
+        shown += f" (+{len(rows) - MAX_REPORTED_ROWS} baris lain)"
+    return f"Baris {shown}: {message}"
+
+
+def validate_chunk(raw: pd.DataFrame, typed: pd.DataFrame) -> List[str]:
+    """
+    Validasi satu potongan data dan laporkan nomor baris yang bermasalah
+
+    Args:
+        raw: Potongan CSV apa adanya (sebelum konversi tipe)
+        typed: Potongan yang sama setelah apply_case_schema
+
+    Returns:
+        List pesan validasi ("Baris 12, 15: ...")
+    """
+    issues = []
+    # Nomor baris mengikuti file CSV (baris 1 = header)
+    line_numbers = typed.index + 2
+
+    for col in DBDDataParser.REQUIRED_COLUMNS:
+        empty = raw[col].isna()
+        if empty.any():
+            issues.append(_format_row_issue(line_numbers[empty.to_numpy()], f"kolom {col} kosong"))
+        if col not in CATEGORY_COLUMNS:
+            invalid = typed[col].isna() & ~empty
+            if invalid.any():
+                issues.append(_format_row_issue(line_numbers[invalid.to_numpy()], f"kolom {col} bukan angka"))
+
+    out_of_range = ((typed['tahun'] < 2000) | (typed['tahun'] > 2100)).fillna(False)
+    if out_of_range.any():
+        issues.append(_format_row_issue(line_numbers[out_of_range.to_numpy()], "tahun di luar range 2000-2100"))
+
+    negative = (typed['jumlah_kasus'] < 0).fillna(False)
+    if negative.any():
+        issues.append(_format_row_issue(line_numbers[negative.to_numpy()], "jumlah kasus negatif"))
+
+    return issues
+
+
+def ingest_csv_chunks(
+    source,
+    chunksize: int = INGEST_CHUNK_ROWS,
+    encoding: str = 'utf-8',
+    delimiter: str = ','
+) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Baca CSV per potongan: setiap potongan langsung divalidasi dan
+    dikonversi ke skema ringkas, sehingga teks mentah satu file penuh
+    tidak pernah ada di memori sekaligus
+
+    Args:
+        source: Path atau file-like (mis. hasil st.file_uploader)
+        chunksize: Jumlah baris per potongan
+        encoding: Encoding file
+        delimiter: Delimiter CSV
+
+    Returns:
+        Tuple (dataframe, pesan validasi per baris)
+
+    Raises:
+        ValueError: Jika kolom wajib tidak ditemukan
+    """
+    frames = []
+    issues = []
+
+    reader = pd.read_csv(source, chunksize=chunksize, encoding=encoding, delimiter=delimiter)
+    for raw in reader:
+        missing_columns = set(DBDDataParser.REQUIRED_COLUMNS) - set(raw.columns)
+        if missing_columns:
+            raise ValueError(f"Kolom berikut tidak ditemukan: {', '.join(sorted(missing_columns))}")
+
+        typed = apply_case_schema(raw)
+        issues.extend(validate_chunk(raw, typed))
+        frames.append(typed)
+
+    chunk_count = len(frames)
+    df = concat_case_frames(frames)
+    logger.info(f"Berhasil ingest {len(df)} baris dalam {chunk_count} potongan ({len(issues)} catatan validasi)")
+    return df, issues
+
+
 def convert_to_long_format(df: pd.DataFrame) -> pd.DataFrame:
     """
     Konversi data ke long format untuk analisis time series
@@ -336,22 +466,77 @@ def convert_to_long_format(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-def calculate_growth_rate(df: pd.DataFrame, groupby_cols: List[str]) -> pd.DataFrame:
+def calculate_growth_rate(
+    df: pd.DataFrame,
+    groupby_cols: List[str],
+    backend: Optional[str] = None
+) -> pd.DataFrame:
     """
     Hitung growth rate year-over-year
     
     Args:
         df: DataFrame input
         groupby_cols: Kolom untuk grouping
+        backend: Backend agregasi ('pandas' / 'arrow', default: DBD_AGG_BACKEND)
         
     Returns:
         DataFrame dengan kolom growth_rate
     """
-    df_sorted = df.sort_values(groupby_cols + ['tahun'])
-    
-    df_sorted['growth_rate'] = df_sorted.groupby(groupby_cols)['jumlah_kasus'].pct_change() * 100
+    return get_backend(backend).growth_rate(df, groupby_cols)
+
+
+def calculate_region_growth(
+    df: pd.DataFrame,
+    level: str = 'nama_provinsi',
+    value_col: str = 'jumlah_kasus'
+) -> pd.DataFrame:
+    """
+    Hitung pertumbuhan kasus tahun pertama -> tahun terakhir untuk setiap wilayah
+    dengan satu groupby (tanpa loop mask per wilayah)
     
-    return df_sorted
+    Args:
+        df: DataFrame input
+        level: Kolom wilayah (nama_provinsi, nama_kabupaten_kota, ...)
+        value_col: Kolom nilai yang dijumlahkan per tahun
+        
+    Returns:
+        DataFrame ber-index wilayah (urutan kemunculan di df, hanya wilayah
+        dengan data > 1 tahun) dengan kolom tahun_awal, tahun_akhir,
+        kasus_awal, kasus_akhir, jumlah_tahun, growth_pct, cagr_pct.
+        Growth dan CAGR bernilai 0 jika kasus tahun pertama <= 0.
+    """
+    columns = ['tahun_awal', 'tahun_akhir', 'kasus_awal', 'kasus_akhir', 'jumlah_tahun', 'growth_pct', 'cagr_pct']
+    yearly = df.groupby([level, 'tahun'], sort=True, observed=True)[value_col].sum()
+    if yearly.empty:
+        return pd.DataFrame(columns=columns)
+    
+    frame = pd.DataFrame(
+        {'tahun': yearly.index.get_level_values('tahun'), 'kasus': yearly.to_numpy(dtype=float)},
+        index=yearly.index.get_level_values(level)
+    )
+    growth = frame.groupby(level=0, sort=False).agg(
+        tahun_awal=('tahun', 'first'),
+        tahun_akhir=('tahun', 'last'),
+        kasus_awal=('kasus', 'first'),
+        kasus_akhir=('kasus', 'last'),
+        jumlah_tahun=('tahun', 'size')
+    )
+    growth = growth[growth['jumlah_tahun'] > 1]
+    
+    awal = growth['kasus_awal'].to_numpy()
+    akhir = growth['kasus_akhir'].to_numpy()
+    span = (growth['tahun_akhir'] - growth['tahun_awal']).to_numpy(dtype=float)
+    positive = awal > 0
+    safe_awal = np.where(positive, awal, 1.0)
+    
+    growth['growth_pct'] = np.where(positive, (akhir - awal) / safe_awal * 100, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = (np.power(akhir / safe_awal, 1.0 / np.where(span > 0, span, 1.0)) - 1) * 100
+    growth['cagr_pct'] = np.where(positive & (span > 0), cagr, 0.0)
+    
+    # Pertahankan urutan kemunculan wilayah seperti loop df[level].unique() sebelumnya
+    order = pd.Index(df[level].dropna().unique(), name=level)
+    return growth.loc[order[order.isin(growth.index)], columns]
 
 
 # Contoh penggunaan
@@ -0,0 +1,262 @@
+"""
+Utility Functions untuk Profiling Rerun Streamlit
+Span berbasis context manager / decorator untuk hot path (load, filter,
+agregasi, figure, export, AI), dicatat per rerun ke sink JSONL agar
+p50/p95 per span bisa dilihat lintas session
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils_storage import CACHE_DIR_NAME
+
+logger = logging.getLogger(__name__)
+
+
+# Sink JSONL (satu baris per span); DBD_PROFILE_PATH mengganti lokasinya,
+# DBD_PROFILING=0 mematikan profiling sepenuhnya
+PROFILE_LOG_PATH = os.environ.get("DBD_PROFILE_PATH", os.path.join(CACHE_DIR_NAME, "profile.jsonl"))
+PROFILING_ENABLED = os.environ.get("DBD_PROFILING", "1") != "0"
+
+# File sink dirotasi (-> .1) jika melewati ukuran ini
+PROFILE_MAX_BYTES = 5 * 1024 * 1024
+
+# Jumlah session yang rerun terakhirnya disimpan di memori
+MAX_TRACKED_SESSIONS = 256
+
+
+class Profiler:
+    """
+    Pencatat durasi span per rerun.
+
+    Setiap script run Streamlit berjalan di thread-nya sendiri, sehingga
+    span dikumpulkan per thread dan ditulis ke sink dalam satu append saat
+    rerun selesai (bukan satu write per span).
+    """
+
+    def __init__(
+        self,
+        sink_path: Optional[str] = PROFILE_LOG_PATH,
+        enabled: bool = PROFILING_ENABLED,
+        max_bytes: int = PROFILE_MAX_BYTES
+    ):
+        """
+        Args:
+            sink_path: Path file JSONL (None = hanya di memori)
+            enabled: False = span tidak mencatat apa pun
+            max_bytes: Ukuran maksimum file sink sebelum dirotasi
+        """
+        self.sink_path = sink_path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._sink_lock = threading.Lock()
+        self._last_reruns: Dict[str, List[Dict]] = {}
+
+    def _state(self):
+        state = self._local
+        if not hasattr(state, 'stack'):
+            state.stack = []
+            state.records = None
+        return state
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Ukur durasi blok kode
+
+        Args:
+            name: Nama span (mis. 'load_data', 'ai.stream')
+        """
+        if not self.enabled:
+            yield
+            return
+        state = self._state()
+        parent = state.stack[-1] if state.stack else None
+        state.stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            state.stack.pop()
+            if state.records is not None:
+                state.records.append({'span': name, 'parent': parent, 'ms': round(elapsed_ms, 3)})
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """
+        Decorator: setiap pemanggilan fungsi dicatat sebagai span
+
+        Args:
+            name: Nama span (default: nama fungsi)
+        """
+        def decorator(fn):
+            span_name = name or fn.__name__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def rerun(self, app: str, session_id: Optional[str] = None):
+        """
+        Tandai satu rerun script; semua span di dalamnya ditulis ke sink
+        saat blok selesai (termasuk saat st.stop()/st.rerun() memotong run)
+
+        Args:
+            app: Nama aplikasi (semua / dashboard)
+            session_id: ID session Streamlit
+        """
+        if not self.enabled:
+            yield
+            return
+        state = self._state()
+        state.records = []
+        state.stack = []
+        try:
+            with self.span('rerun'):
+                yield
+        finally:
+            records, state.records = state.records, None
+            meta = {
+                'ts': datetime.now().isoformat(timespec='seconds'),
+                'app': app,
+                'session': session_id,
+                'rerun': uuid.uuid4().hex[:12],
+            }
+            records = [{**meta, **record} for record in records]
+            self._last_reruns.pop(session_id or app, None)
+            self._last_reruns[session_id or app] = records
+            if len(self._last_reruns) > MAX_TRACKED_SESSIONS:
+                self._last_reruns.pop(next(iter(self._last_reruns)))
+            self._write(records)
+
+    def last_rerun(self, session_id: str) -> pd.DataFrame:
+        """
+        Span dari rerun terakhir yang selesai untuk satu session
+
+        Args:
+            session_id: ID session
+
+        Returns:
+            DataFrame kolom span, parent, ms (urutan selesai)
+        """
+        return pd.DataFrame(self._last_reruns.get(session_id, []), columns=['span', 'parent', 'ms'])
+
+    def _write(self, records: List[Dict]) -> None:
+        if not self.sink_path or not records:
+            return
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        try:
+            with self._sink_lock:
+                os.makedirs(os.path.dirname(self.sink_path) or '.', exist_ok=True)
+                if os.path.exists(self.sink_path) and os.path.getsize(self.sink_path) > self.max_bytes:
+                    os.replace(self.sink_path, self.sink_path + ".1")
+                with open(self.sink_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+        except OSError as e:
+            logger.warning(f"Gagal menulis profil ke {self.sink_path}: {e}")
+
+    def read_sink(self, max_lines: int = 50_000) -> pd.DataFrame:
+        """
+        Baca record span dari sink JSONL (baris terbaru)
+
+        Args:
+            max_lines: Jumlah baris terakhir yang dibaca
+
+        Returns:
+            DataFrame record span
+        """
+        if not self.sink_path or not os.path.exists(self.sink_path):
+            return pd.DataFrame(columns=['ts', 'app', 'session', 'rerun', 'span', 'parent', 'ms'])
+        with self._sink_lock, open(self.sink_path, encoding='utf-8') as f:
+            lines = f.readlines()[-max_lines:]
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return pd.DataFrame(records)
+
+    def summary(self, app: Optional[str] = None, max_lines: int = 50_000) -> pd.DataFrame:
+        """
+        Statistik durasi per span lintas session
+
+        Args:
+            app: Batasi ke satu aplikasi (None = semua)
+            max_lines: Jumlah baris terakhir sink yang dihitung
+
+        Returns:
+            DataFrame ber-index span dengan kolom count, p50_ms, p95_ms,
+            max_ms, total_ms (terurut p95 menurun)
+        """
+        records = self.read_sink(max_lines)
+        if app is not None and not records.empty:
+            records = records[records['app'] == app]
+        if records.empty:
+            return pd.DataFrame(columns=['count', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms'])
+        grouped = records.groupby('span')['ms']
+        summary = pd.DataFrame({
+            'count': grouped.size(),
+            'p50_ms': grouped.quantile(0.5),
+            'p95_ms': grouped.quantile(0.95),
+            'max_ms': grouped.max(),
+            'total_ms': grouped.sum(),
+        })
+        return summary.sort_values('p95_ms', ascending=False).round(2)
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """
+    Mendapatkan Profiler bersama (satu per proses)
+
+    Returns:
+        Profiler
+    """
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler()
+        return _profiler
+
+
+def span(name: str):
+    """Context manager span pada profiler bersama"""
+    return get_profiler().span(name)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """
+    Decorator span pada profiler bersama (profiler diambil saat fungsi
+    dipanggil, bukan saat modul di-import)
+
+    Args:
+        name: Nama span (default: nama fungsi)
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_profiler().span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,283 @@
+"""
+Utility Functions untuk Report Bundle
+Artefak export (CSV/Parquet/XLSX tabel, PNG grafik, teks AI) didaftarkan
+sebagai builder dan baru dibuat saat diminta, di-cache per hash input, dan
+bisa dikemas menjadi satu arsip ZIP
+"""
+
+import io
+import hashlib
+import logging
+import threading
+import zipfile
+import importlib.util
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from utils_export import KALEIDO_AVAILABLE, get_exporter
+
+logger = logging.getLogger(__name__)
+
+
+# Batas total ukuran artefak yang di-cache (byte, lintas session)
+ARTIFACT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+MIME_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'png': 'image/png',
+    'html': 'text/html',
+    'txt': 'text/plain',
+    'zip': 'application/zip',
+}
+
+# Format yang sudah terkompresi disimpan apa adanya di ZIP
+_STORED_FORMATS = {'parquet', 'xlsx', 'png'}
+
+
+def excel_engine() -> Optional[str]:
+    """
+    Engine Excel yang tersedia (openpyxl / xlsxwriter bersifat opsional)
+
+    Returns:
+        Nama engine atau None
+    """
+    for engine in ('openpyxl', 'xlsxwriter'):
+        if importlib.util.find_spec(engine) is not None:
+            return engine
+    return None
+
+
+def frame_formats() -> Tuple[str, ...]:
+    """Format tabel yang bisa dibuat di environment ini"""
+    return ('csv', 'parquet', 'xlsx') if excel_engine() else ('csv', 'parquet')
+
+
+def serialize_frame(df: pd.DataFrame, fmt: str) -> bytes:
+    """
+    Serialisasi DataFrame ke bytes
+
+    Args:
+        df: DataFrame
+        fmt: 'csv', 'parquet' atau 'xlsx'
+
+    Returns:
+        Bytes file
+    """
+    if fmt == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    buffer = io.BytesIO()
+    if fmt == 'parquet':
+        df.to_parquet(buffer, index=False)
+    elif fmt == 'xlsx':
+        engine = excel_engine()
+        if engine is None:
+            raise RuntimeError("Export XLSX butuh library 'openpyxl' atau 'xlsxwriter'")
+        df.to_excel(buffer, index=False, engine=engine)
+    else:
+        raise ValueError(f"Format tabel tidak dikenal: {fmt}")
+    return buffer.getvalue()
+
+
+class ArtifactCache:
+    """
+    Cache LRU bytes artefak dengan batas total ukuran
+    """
+
+    def __init__(self, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES):
+        """
+        Args:
+            max_bytes: Total ukuran maksimum (byte)
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class ReportBundle:
+    """
+    Kumpulan artefak export yang dibuat secara lazy.
+
+    Mendaftarkan artefak hanya menyimpan builder (murah, aman dipanggil
+    setiap rerun); bytes dibuat saat artefak/arsip diminta lalu di-cache
+    dengan kunci (key bundle, nama, format). `key` harus berubah setiap
+    kali input berubah, mis. (versi data, filter).
+    """
+
+    def __init__(self, key: Any, cache: Optional[ArtifactCache] = None):
+        """
+        Args:
+            key: Kunci input bundle (di-repr lalu di-hash)
+            cache: ArtifactCache (default: cache bersama)
+        """
+        self.key = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        self.cache = cache if cache is not None else get_artifact_cache()
+        self._artifacts: Dict[str, Tuple[str, Sequence[str], Callable]] = {}
+
+    def add_frame(
+        self,
+        name: str,
+        frame: Union[pd.DataFrame, Callable[[], pd.DataFrame]],
+        formats: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Daftarkan tabel
+
+        Args:
+            name: Nama file (tanpa ekstensi)
+            frame: DataFrame atau builder tanpa argumen
+            formats: Format yang disediakan (default: frame_formats())
+        """
+        self._artifacts[name] = ('frame', tuple(formats or frame_formats()), frame)
+
+    def add_figure(
+        self,
+        name: str,
+        figure: Callable,
+        formats: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Daftarkan grafik (di-render lewat FigureExporter bersama)
+
+        Args:
+            name: Nama file (tanpa ekstensi)
+            figure: Figure Plotly/Matplotlib atau builder tanpa argumen
+            formats: ('png',) atau ('html',) untuk Plotly (default: png bila
+                Kaleido tersedia, selain itu html)
+        """
+        self._artifacts[name] = ('figure', tuple(formats or (('png',) if KALEIDO_AVAILABLE else ('html',))), figure)
+
+    def add_text(self, name: str, text: Union[str, Callable[[], str]]) -> None:
+        """
+        Daftarkan teks (mis. AI insights)
+
+        Args:
+            name: Nama file (tanpa ekstensi)
+            text: Teks atau builder tanpa argumen
+        """
+        self._artifacts[name] = ('text', ('txt',), text)
+
+    def artifacts(self) -> List[Tuple[str, str]]:
+        """
+        Daftar artefak yang tersedia
+
+        Returns:
+            List (nama, format)
+        """
+        return [(name, fmt) for name, (_, formats, _) in self._artifacts.items() for fmt in formats]
+
+    def _render(self, kind: str, fmt: str, source) -> bytes:
+        value = source() if callable(source) else source
+        if kind == 'frame':
+            return serialize_frame(value, fmt)
+        if kind == 'text':
+            return value.encode('utf-8')
+        if fmt == 'html':
+            return value.to_html(include_plotlyjs='cdn').encode('utf-8')
+        return get_exporter().render_png(value)
+
+    def build(self, name: str, fmt: str) -> bytes:
+        """
+        Bytes satu artefak (dibuat sekali per key bundle)
+
+        Args:
+            name: Nama artefak
+            fmt: Format artefak
+
+        Returns:
+            Bytes file
+        """
+        kind, formats, source = self._artifacts[name]
+        if fmt not in formats:
+            raise ValueError(f"Artefak {name} tidak tersedia dalam format {fmt}")
+        cache_key = f"{self.key}:{name}:{fmt}"
+        if kind == 'text' and not callable(source):
+            # Teks dikenali dari isinya, bukan dari key bundle
+            cache_key = f"text:{hashlib.sha256(source.encode('utf-8')).hexdigest()}"
+        data = self.cache.get(cache_key)
+        if data is None:
+            data = self._render(kind, fmt, source)
+            self.cache.put(cache_key, data)
+        return data
+
+    def lazy(self, name: str, fmt: str) -> Callable[[], bytes]:
+        """
+        Callable tanpa argumen untuk `st.download_button(data=...)`;
+        artefak baru dibuat saat tombol diklik
+
+        Args:
+            name: Nama artefak
+            fmt: Format artefak
+        """
+        return lambda: self.build(name, fmt)
+
+    def archive(self, formats: Optional[Sequence[str]] = None) -> bytes:
+        """
+        Kemas artefak ke satu ZIP
+
+        Args:
+            formats: Batasi ke format tertentu (None = semua)
+
+        Returns:
+            Bytes file ZIP
+        """
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, fmt in self.artifacts():
+                if formats is not None and fmt not in formats:
+                    continue
+                try:
+                    data = self.build(name, fmt)
+                except Exception as e:
+                    logger.warning(f"Artefak {name}.{fmt} dilewati: {e}")
+                    continue
+                compress = zipfile.ZIP_STORED if fmt in _STORED_FORMATS else zipfile.ZIP_DEFLATED
+                archive.writestr(f"{name}.{fmt}", data, compress_type=compress)
+        return buffer.getvalue()
+
+    def lazy_archive(self, formats: Optional[Sequence[str]] = None) -> Callable[[], bytes]:
+        """Callable tanpa argumen untuk download arsip ZIP secara lazy"""
+        return lambda: self.archive(formats)
+
+
+_artifact_cache: Optional[ArtifactCache] = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """
+    Mendapatkan ArtifactCache bersama (satu per proses)
+
+    Returns:
+        ArtifactCache
+    """
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = ArtifactCache()
+        return _artifact_cache
@@ -0,0 +1,140 @@
+"""
+Utility Functions untuk Skema Tipe Data Kasus DBD
+Satu definisi dtype ringkas (categorical + integer kecil) yang dipakai semua loader
+"""
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+# Kolom wajib tabel kasus DBD
+REQUIRED_COLUMNS = [
+    'kode_provinsi',
+    'nama_provinsi',
+    'kode_kabupaten_kota',
+    'nama_kabupaten_kota',
+    'jumlah_kasus',
+    'satuan',
+    'tahun'
+]
+
+# Kolom teks berulang -> categorical (groupby berjalan di atas kode integer)
+CATEGORY_COLUMNS = ['nama_provinsi', 'nama_kabupaten_kota', 'satuan']
+
+# Kolom integer -> dtype numpy terkecil yang cukup; versi nullable dipakai
+# jika kolom mengandung nilai kosong
+INTEGER_COLUMNS = {
+    'kode_provinsi': ('int16', 'Int16'),
+    'kode_kabupaten_kota': ('int32', 'Int32'),
+    'tahun': ('int16', 'Int16'),
+    'jumlah_kasus': ('Int32', 'Int32'),
+}
+
+
+def _to_integer(series: pd.Series, dtype: str, nullable_dtype: str) -> pd.Series:
+    values = pd.to_numeric(series, errors='coerce')
+    non_null = values.dropna()
+    limits = np.iinfo(nullable_dtype.lower())
+    # Nilai pecahan / di luar jangkauan dtype dibiarkan numerik apa adanya
+    if len(non_null) and (
+        not (non_null % 1 == 0).all()
+        or non_null.min() < limits.min
+        or non_null.max() > limits.max
+    ):
+        return values
+    return values.astype(nullable_dtype if values.isna().any() else dtype)
+
+
+def apply_case_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Terapkan skema dtype ringkas ke DataFrame kasus DBD
+
+    Args:
+        df: DataFrame kasus (kolom yang tidak ada dilewati)
+
+    Returns:
+        DataFrame baru dengan kolom nama_* / satuan categorical, tahun int16,
+        jumlah_kasus Int32, kode_provinsi int16, kode_kabupaten_kota int32
+    """
+    df = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col, (dtype, nullable_dtype) in INTEGER_COLUMNS.items():
+        if col in df.columns and str(df[col].dtype) not in (dtype, nullable_dtype):
+            df[col] = _to_integer(df[col], dtype, nullable_dtype)
+    return df
+
+
+def to_editable_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Kembalikan kolom categorical ke string biasa (untuk st.data_editor,
+    supaya user bisa mengetik nilai baru di luar kategori yang ada)
+
+    Args:
+        df: DataFrame kasus
+
+    Returns:
+        DataFrame baru tanpa kolom categorical
+    """
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+    return df
+
+
+
+def harmonize_integer_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Seragamkan dtype kolom integer di tempat (tanpa menyalin kolom lain),
+    mis. gabungan potongan int16 dan Int16 yang jatuh ke float/object
+
+    Args:
+        df: DataFrame kasus (diubah di tempat)
+
+    Returns:
+        DataFrame yang sama
+    """
+    for col, (dtype, nullable_dtype) in INTEGER_COLUMNS.items():
+        if col in df.columns and str(df[col].dtype) not in (dtype, nullable_dtype):
+            df[col] = _to_integer(df[col], dtype, nullable_dtype)
+    return df
+
+
+def concat_case_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Gabungkan beberapa potongan DataFrame kasus tanpa kehilangan skema
+    (kategori tiap potongan disatukan dengan union_categoricals, bukan
+    jatuh ke object seperti pd.concat biasa)
+
+    Digabung per kolom dan setiap kolom langsung dilepas dari potongannya,
+    sehingga puncak memori sekitar ukuran data + satu kolom, bukan dua
+    sampai tiga salinan data penuh. Potongan di `frames` ikut dikosongkan.
+
+    Args:
+        frames: Daftar DataFrame dengan kolom yang sama (skema apply_case_schema)
+
+    Returns:
+        DataFrame gabungan dengan skema apply_case_schema
+    """
+    if not frames:
+        return pd.DataFrame()
+    non_empty = [frame for frame in frames if not frame.empty] or frames[:1]
+    if len(non_empty) == 1:
+        return harmonize_integer_columns(non_empty[0].reset_index(drop=True))
+
+    columns = {}
+    for col in list(non_empty[0].columns):
+        parts = [frame.pop(col) for frame in non_empty]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[col] = pd.Series(union_categoricals(parts, sort_categories=True), name=col)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+        del parts
+    frames.clear()
+    # Dtype integer antar potongan bisa berbeda (int16 vs Int16) -> seragamkan
+    return harmonize_integer_columns(pd.DataFrame(columns, copy=False))
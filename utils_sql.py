@@ -0,0 +1,422 @@
+"""
+Utility Functions untuk Query SQL Data DBD
+Query agregasi bernama dan berparameter (total per tahun, top N wilayah,
+trend wilayah x tahun, heatmap, growth, cell cube) yang dijalankan DuckDB
+in-process langsung atas mirror Parquet sumber data (out-of-core, filter &
+kolom di-push ke scan Parquet). Sumber bisa file CSV atau database kasus
+SQLite (mirror dibangun ulang per revisi). Tanpa DuckDB query yang sama
+dijawab oleh pandas (DBDAggregateCube) atas snapshot kolumnar
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from utils_aggregate import DBDAggregateCube
+from utils_filter import INDEX_COLUMNS, row_index_for
+from utils_parsing import calculate_region_growth
+from utils_query import DBDQuery
+from utils_storage import CACHE_DIR_NAME, file_signature, get_case_store, load_table, parse_case_csv
+
+logger = logging.getLogger(__name__)
+
+# DuckDB opsional: tanpa DuckDB query dijalankan lewat pandas
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    duckdb = None
+    DUCKDB_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+MIRROR_META_KEY = b"dbd_source_signature"
+
+# Jumlah baris per row group Parquet; data diurutkan per tahun/provinsi
+# sehingga statistik min/max row group bisa dipakai untuk melewati data
+MIRROR_ROW_GROUP_SIZE = 128 * 1024
+
+# Kolom yang boleh difilter / dijadikan level wilayah (masuk ke teks SQL)
+FILTER_COLUMNS = tuple(INDEX_COLUMNS)
+REGION_LEVELS = ('nama_provinsi', 'nama_kabupaten_kota')
+
+_KASUS = "CAST(COALESCE(SUM(jumlah_kasus), 0) AS BIGINT)"
+
+# {level} hanya diisi nama kolom dari REGION_LEVELS; nilai selalu lewat
+# parameter. Setiap query membaca dari CTE `filtered` (sumber + filter).
+NAMED_QUERIES: Dict[str, str] = {
+    'cells': f"""
+        SELECT nama_provinsi, nama_kabupaten_kota, tahun,
+            {_KASUS} AS "sum", COUNT(jumlah_kasus) AS "count"
+        FROM filtered
+        WHERE nama_provinsi IS NOT NULL AND nama_kabupaten_kota IS NOT NULL AND tahun IS NOT NULL
+        GROUP BY nama_provinsi, nama_kabupaten_kota, tahun
+        ORDER BY nama_provinsi, nama_kabupaten_kota, tahun
+    """,
+    'yearly_totals': f"""
+        SELECT tahun, {_KASUS} AS jumlah_kasus
+        FROM filtered
+        GROUP BY tahun
+        ORDER BY tahun
+    """,
+    'top_regions': f"""
+        SELECT {{level}}, {_KASUS} AS jumlah_kasus
+        FROM filtered
+        GROUP BY {{level}}
+        ORDER BY jumlah_kasus DESC, {{level}}
+        LIMIT ?
+    """,
+    'region_year': f"""
+        SELECT tahun, {{level}}, {_KASUS} AS jumlah_kasus
+        FROM filtered
+        GROUP BY tahun, {{level}}
+        ORDER BY tahun, {{level}}
+    """,
+    'heatmap': f"""
+        WITH top AS (
+            SELECT nama_kabupaten_kota
+            FROM filtered
+            GROUP BY nama_kabupaten_kota
+            ORDER BY {_KASUS} DESC, nama_kabupaten_kota
+            LIMIT ?
+        )
+        SELECT nama_kabupaten_kota, tahun, {_KASUS} AS jumlah_kasus
+        FROM filtered
+        WHERE nama_kabupaten_kota IN (SELECT nama_kabupaten_kota FROM top)
+        GROUP BY nama_kabupaten_kota, tahun
+    """,
+    'growth': f"""
+        WITH yearly AS (
+            SELECT {{level}}, tahun, CAST({_KASUS} AS DOUBLE) AS kasus
+            FROM filtered
+            GROUP BY {{level}}, tahun
+        ),
+        spans AS (
+            SELECT
+                {{level}},
+                MIN(tahun) AS tahun_awal,
+                MAX(tahun) AS tahun_akhir,
+                arg_min(kasus, tahun) AS kasus_awal,
+                arg_max(kasus, tahun) AS kasus_akhir,
+                COUNT(*) AS jumlah_tahun
+            FROM yearly
+            GROUP BY {{level}}
+            HAVING COUNT(*) > 1
+        )
+        SELECT
+            *,
+            CASE WHEN kasus_awal > 0
+                THEN (kasus_akhir - kasus_awal) / kasus_awal * 100 ELSE 0 END AS growth_pct,
+            CASE WHEN kasus_awal > 0 AND tahun_akhir > tahun_awal
+                THEN (power(kasus_akhir / kasus_awal, 1.0 / (tahun_akhir - tahun_awal)) - 1) * 100
+                ELSE 0 END AS cagr_pct
+        FROM spans
+        ORDER BY {{level}}
+    """,
+}
+
+
+def parquet_mirror_path(source_path: str) -> str:
+    """
+    Path mirror Parquet untuk sebuah file sumber
+
+    Args:
+        source_path: Path file sumber (mis. data_dbd.csv)
+
+    Returns:
+        Path file .parquet di dalam folder cache
+    """
+    directory = os.path.dirname(os.path.abspath(source_path))
+    return os.path.join(directory, CACHE_DIR_NAME, os.path.basename(source_path) + ".parquet")
+
+
+def _mirror_signature(mirror_path: str) -> Optional[Dict[str, int]]:
+    try:
+        metadata = pq.read_schema(mirror_path).metadata or {}
+    except Exception:
+        return None
+    stored = metadata.get(MIRROR_META_KEY)
+    return None if stored is None else json.loads(stored)
+
+
+def ensure_parquet_mirror(
+    source_path: str,
+    parse_fn: Callable[[str], pd.DataFrame] = parse_case_csv,
+    signature: Optional[Dict[str, int]] = None
+) -> str:
+    """
+    Pastikan mirror Parquet sesuai dengan file sumber (ditulis ulang secara
+    atomik hanya jika mtime/ukuran sumber berubah)
+
+    Args:
+        source_path: Path file sumber
+        parse_fn: Fungsi untuk parse file sumber menjadi DataFrame
+        signature: Signature sumber (default: mtime/ukuran file)
+
+    Returns:
+        Path file Parquet
+    """
+    if pq is None:
+        raise RuntimeError("Mirror Parquet butuh library 'pyarrow'")
+    if signature is None:
+        signature = file_signature(source_path)
+    mirror_path = parquet_mirror_path(source_path)
+    if os.path.exists(mirror_path) and _mirror_signature(mirror_path) == signature:
+        return mirror_path
+
+    df = load_table(source_path, parse_fn, signature)
+    sort_columns = [column for column in ('tahun', 'kode_provinsi', 'kode_kabupaten_kota') if column in df.columns]
+    table = pa.Table.from_pandas(df.sort_values(sort_columns, kind='stable'), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[MIRROR_META_KEY] = json.dumps(signature).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(mirror_path), exist_ok=True)
+    tmp_path = f"{mirror_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, row_group_size=MIRROR_ROW_GROUP_SIZE, compression='zstd')
+    os.replace(tmp_path, mirror_path)
+    logger.info(f"Mirror Parquet {mirror_path} dibangun ulang dari {source_path}")
+    return mirror_path
+
+
+def _normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    normalized = {}
+    for column, values in (filters or {}).items():
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Kolom filter tidak dikenal: {column}")
+        if values is None:
+            continue
+        if isinstance(values, (str, bytes)) or not isinstance(values, Iterable):
+            values = [values]
+        normalized[column] = [value.item() if hasattr(value, 'item') else value for value in values]
+    return normalized
+
+
+def _plain_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # Hasil query memakai kolom biasa (bukan categorical) di kedua engine
+    categorical = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+    return df.astype({column: str for column in categorical}) if categorical else df
+
+
+class DBDSQLEngine:
+    """
+    Lapisan query analitik atas satu sumber data kasus (file CSV atau
+    database kasus, lihat get_case_sql_engine).
+
+    Dengan DuckDB, setiap query membaca mirror Parquet secara langsung:
+    hanya kolom yang dipakai dan row group yang lolos filter yang dibaca,
+    jadi data tidak perlu dimuat penuh per session. Tanpa DuckDB, query
+    bernama yang sama dijawab lewat DBDQuery + DBDAggregateCube dengan
+    kolom dan urutan hasil yang sama.
+    """
+
+    def __init__(
+        self,
+        source_path: str,
+        parse_fn: Callable[[str], pd.DataFrame] = parse_case_csv,
+        use_duckdb: Optional[bool] = None,
+        signature_fn: Optional[Callable[[], Dict[str, int]]] = None
+    ):
+        """
+        Args:
+            source_path: Path file sumber (CSV / database)
+            parse_fn: Fungsi untuk parse file sumber menjadi DataFrame
+            use_duckdb: Paksa engine (default: DuckDB jika terinstall)
+            signature_fn: Signature isi sumber (default: mtime/ukuran file)
+        """
+        self.source_path = source_path
+        self.parse_fn = parse_fn
+        self.signature_fn = signature_fn or (lambda: file_signature(source_path))
+        self.use_duckdb = DUCKDB_AVAILABLE if use_duckdb is None else use_duckdb
+        if self.use_duckdb and not DUCKDB_AVAILABLE:
+            raise RuntimeError("Library 'duckdb' belum terinstall (pip install duckdb)")
+        self._conn = duckdb.connect(':memory:') if self.use_duckdb else None
+        self._frame: Optional[Tuple[Dict[str, int], pd.DataFrame]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self) -> str:
+        """Nama engine yang dipakai ('duckdb' / 'pandas')"""
+        return 'duckdb' if self.use_duckdb else 'pandas'
+
+    def _source(self) -> str:
+        with self._lock:
+            mirror_path = ensure_parquet_mirror(self.source_path, self.parse_fn, self.signature_fn())
+        return "read_parquet('{}')".format(mirror_path.replace("'", "''"))
+
+    def execute(self, sql: str, params: Iterable[Any] = (), filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Jalankan SQL DuckDB atas data (hanya engine DuckDB)
+
+        Args:
+            sql: Query yang membaca dari tabel `filtered` (boleh diawali WITH)
+            params: Parameter posisi (?) setelah parameter filter
+            filters: Dict kolom -> nilai tunggal / iterable nilai
+
+        Returns:
+            DataFrame hasil
+        """
+        if not self.use_duckdb:
+            raise RuntimeError("Query SQL bebas butuh DuckDB")
+        filters = _normalize_filters(filters)
+        # Seleksi kosong (mis. multiselect dikosongkan) = tidak ada baris;
+        # `IN ()` sendiri adalah syntax error di DuckDB
+        clauses = [
+            f"{column} IN ({', '.join('?' for _ in values)})" if values else "FALSE"
+            for column, values in filters.items()
+        ]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        filtered = f"filtered AS (SELECT * FROM {self._source()} {where})"
+        # CTE milik sql digabung setelah `filtered` (WITH tidak boleh bersarang)
+        body = sql.strip()
+        if body[:4].upper() == 'WITH' and body[4:5].isspace():
+            statement = f"WITH {filtered}, {body[5:]}"
+        else:
+            statement = f"WITH {filtered} {body}"
+        # Cursor = koneksi sendiri ke database yang sama (aman lintas thread)
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(
+                statement,
+                [value for values in filters.values() for value in values] + list(params)
+            ).df()
+        finally:
+            cursor.close()
+
+    def _pandas_frame(self, filters: Dict[str, List[Any]]) -> pd.DataFrame:
+        signature = self.signature_fn()
+        with self._lock:
+            if self._frame is None or self._frame[0] != signature:
+                self._frame = (signature, load_table(self.source_path, self.parse_fn, signature))
+            df = self._frame[1]
+        return DBDQuery(df, index=row_index_for(df)).where(filters).collect()
+
+    def _query_pandas(self, name: str, filters: Dict[str, List[Any]], level: str, n: int) -> pd.DataFrame:
+        df = self._pandas_frame(filters)
+        cube = DBDAggregateCube(df)
+        if name == 'cells':
+            result = cube.cells
+        elif name == 'yearly_totals':
+            result = cube.by_year().reset_index()
+        elif name == 'top_regions':
+            result = cube.by_region(level).reset_index()
+            result[level] = result[level].astype(str)
+            return result.sort_values(['jumlah_kasus', level], ascending=[False, True]).head(n).reset_index(drop=True)
+        elif name == 'region_year':
+            result = _plain_columns(cube.region_year(level))
+            return result.sort_values(['tahun', level]).reset_index(drop=True)
+        elif name == 'heatmap':
+            matrix = cube.heatmap_matrix(top_n=n)
+            matrix.index = matrix.index.astype(str)
+            return matrix
+        else:
+            result = calculate_region_growth(df, level).rename_axis(level).reset_index()
+            result[level] = result[level].astype(str)
+            return result.sort_values(level).reset_index(drop=True)
+        return _plain_columns(result)
+
+    def query(
+        self,
+        name: str,
+        filters: Optional[Dict[str, Any]] = None,
+        level: str = 'nama_kabupaten_kota',
+        n: int = 15
+    ) -> pd.DataFrame:
+        """
+        Jalankan query bernama
+
+        Args:
+            name: Nama query (lihat NAMED_QUERIES)
+            filters: Dict kolom -> nilai tunggal / iterable nilai (AND antar kolom)
+            level: Kolom wilayah (top_regions, region_year, growth)
+            n: Jumlah wilayah (top_regions, heatmap)
+
+        Returns:
+            DataFrame hasil; 'heatmap' berupa matriks kab/kota x tahun
+            seperti DBDAggregateCube.heatmap_matrix, 'cells' berupa cell
+            DBDAggregateCube
+        """
+        if name not in NAMED_QUERIES:
+            raise ValueError(f"Query tidak dikenal: {name} (pilihan: {', '.join(NAMED_QUERIES)})")
+        if level not in REGION_LEVELS:
+            raise ValueError(f"Level wilayah tidak dikenal: {level}")
+        filters = _normalize_filters(filters)
+        if not self.use_duckdb:
+            return self._query_pandas(name, filters, level, n)
+
+        params = [n] if name in ('top_regions', 'heatmap') else []
+        result = self.execute(NAMED_QUERIES[name].format(level=level), params, filters)
+        if name == 'heatmap':
+            return result.pivot_table(
+                values='jumlah_kasus',
+                index='nama_kabupaten_kota',
+                columns='tahun',
+                aggfunc='sum',
+                fill_value=0
+            )
+        return result
+
+    def cube(self, filters: Optional[Dict[str, Any]] = None) -> DBDAggregateCube:
+        """
+        Cube agregat wilayah x tahun untuk seleksi filter; agregasinya
+        dijalankan engine (DuckDB atas mirror Parquet), bukan atas frame
+        yang dimuat aplikasi
+
+        Args:
+            filters: Dict kolom -> nilai tunggal / iterable nilai (AND antar kolom)
+
+        Returns:
+            DBDAggregateCube (kolom wilayah berupa string biasa)
+        """
+        return DBDAggregateCube.from_cells(self.query('cells', filters))
+
+
+_engines: Dict[Any, DBDSQLEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_sql_engine(source_path: str) -> DBDSQLEngine:
+    """
+    Mendapatkan DBDSQLEngine bersama untuk sebuah file (satu per path)
+
+    Args:
+        source_path: Path file sumber
+
+    Returns:
+        DBDSQLEngine
+    """
+    key = os.path.abspath(source_path)
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = DBDSQLEngine(source_path)
+        return _engines[key]
+
+
+def get_case_sql_engine(db_path: str) -> DBDSQLEngine:
+    """
+    Mendapatkan DBDSQLEngine bersama untuk database kasus (satu per path).
+    Mirror Parquet dibangun dari DBDCaseStore.read_frame dan dikunci ke
+    revisi database, jadi perubahan CRUD admin langsung terlihat
+
+    Args:
+        db_path: Path file database SQLite
+
+    Returns:
+        DBDSQLEngine
+    """
+    store = get_case_store(db_path)
+    key = ('store', os.path.abspath(db_path))
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = DBDSQLEngine(store.db_path, store.read_frame, signature_fn=store.snapshot_signature)
+        return _engines[key]
@@ -0,0 +1,517 @@
+"""
+Utility Functions untuk Penyimpanan Data DBD
+Snapshot kolumnar (Arrow IPC / Feather) dan penyimpanan per-baris (SQLite)
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils_schema import apply_case_schema
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+    pa_ipc = None
+
+logger = logging.getLogger(__name__)
+
+# Folder cache diletakkan di samping file sumber (lihat .gitignore)
+CACHE_DIR_NAME = ".dbd_cache"
+
+# Naikkan nilai ini setiap kali hasil parse_case_csv berubah bentuk/tipe
+# agar snapshot lama otomatis dianggap kadaluarsa.
+SNAPSHOT_SCHEMA_VERSION = 2
+
+SNAPSHOT_META_KEY = b"dbd_source_signature"
+
+CASE_COLUMNS = [
+    'id', 'kode_provinsi', 'nama_provinsi', 'kode_kabupaten_kota',
+    'nama_kabupaten_kota', 'jumlah_kasus', 'satuan', 'tahun'
+]
+
+# Nama counter generasi yang dipakai sebagai kunci cache Streamlit
+DATA_GENERATION = 'data'
+LOG_GENERATION = 'log'
+
+# Counter dimulai dari waktu import (bukan 0) supaya modul yang di-reload
+# tidak pernah mengulang nomor generasi yang sudah ada di cache.
+_GENERATION_BASE = time.time_ns()
+_generations: Dict[str, int] = {}
+_generation_lock = threading.Lock()
+
+
+def get_generation(name: str) -> int:
+    """
+    Mendapatkan nomor generasi saat ini (shared untuk semua session)
+
+    Args:
+        name: Nama counter (DATA_GENERATION atau LOG_GENERATION)
+
+    Returns:
+        Nomor generasi
+    """
+    with _generation_lock:
+        return _generations.get(name, _GENERATION_BASE)
+
+
+def bump_generation(name: str) -> int:
+    """
+    Menaikkan nomor generasi sehingga entri cache lama tidak dipakai lagi
+
+    Args:
+        name: Nama counter (DATA_GENERATION atau LOG_GENERATION)
+
+    Returns:
+        Nomor generasi yang baru
+    """
+    with _generation_lock:
+        _generations[name] = _generations.get(name, _GENERATION_BASE) + 1
+        return _generations[name]
+
+
+def file_signature(path: str) -> Dict[str, int]:
+    """
+    Mendapatkan signature file sumber (mtime & ukuran)
+
+    Args:
+        path: Path file sumber
+
+    Returns:
+        Dictionary berisi mtime_ns, size, dan versi schema snapshot
+    """
+    stat = os.stat(path)
+    return {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'schema': SNAPSHOT_SCHEMA_VERSION
+    }
+
+
+def snapshot_path_for(source_path: str) -> str:
+    """
+    Path snapshot kolumnar untuk sebuah file sumber
+
+    Args:
+        source_path: Path file sumber (mis. data_dbd.csv)
+
+    Returns:
+        Path file .arrow di dalam folder cache
+    """
+    directory = os.path.dirname(os.path.abspath(source_path))
+    filename = os.path.basename(source_path) + ".arrow"
+    return os.path.join(directory, CACHE_DIR_NAME, filename)
+
+
+def read_snapshot(snapshot_path: str, signature: Dict[str, int]) -> Optional[pd.DataFrame]:
+    """
+    Membaca snapshot via memory-map jika signature-nya masih cocok
+
+    Args:
+        snapshot_path: Path file snapshot
+        signature: Signature file sumber saat ini
+
+    Returns:
+        DataFrame, atau None jika snapshot tidak ada / kadaluarsa
+    """
+    if pa is None or not os.path.exists(snapshot_path):
+        return None
+
+    try:
+        with pa.memory_map(snapshot_path, 'r') as source:
+            reader = pa_ipc.open_file(source)
+            metadata = reader.schema.metadata or {}
+            stored = metadata.get(SNAPSHOT_META_KEY)
+            if stored is None or json.loads(stored) != signature:
+                return None
+            return reader.read_all().to_pandas()
+
+    except Exception as e:
+        logger.warning(f"Snapshot {snapshot_path} tidak bisa dibaca: {str(e)}")
+        return None
+
+
+def write_snapshot(df: pd.DataFrame, snapshot_path: str, signature: Dict[str, int]) -> None:
+    """
+    Menulis snapshot kolumnar secara atomik (tulis ke file sementara lalu rename)
+
+    Args:
+        df: DataFrame yang akan disimpan
+        snapshot_path: Path file snapshot
+        signature: Signature file sumber yang menjadi dasar snapshot
+    """
+    if pa is None:
+        return
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SNAPSHOT_META_KEY] = json.dumps(signature).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+
+    # Tanpa kompresi supaya file bisa di-memory-map langsung
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    os.replace(tmp_path, snapshot_path)
+
+
+def parse_case_csv(file_path: str) -> pd.DataFrame:
+    """
+    Parse CSV data kasus DBD dan konversi tipe data kolom
+
+    Args:
+        file_path: Path ke file CSV
+
+    Returns:
+        DataFrame dengan skema dtype ringkas (lihat utils_schema)
+    """
+    return apply_case_schema(pd.read_csv(file_path))
+
+
+def load_table(
+    source_path: str,
+    parse_fn: Callable[[str], pd.DataFrame] = parse_case_csv,
+    signature: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """
+    Load tabel dari snapshot kolumnar, rebuild dari sumber hanya jika
+    mtime/ukuran file sumber berubah
+
+    Args:
+        source_path: Path file sumber
+        parse_fn: Fungsi untuk parse file sumber menjadi DataFrame
+        signature: Signature sumber (default: mtime/ukuran file)
+
+    Returns:
+        DataFrame pandas
+    """
+    if signature is None:
+        signature = file_signature(source_path)
+    snapshot_path = snapshot_path_for(source_path)
+
+    df = read_snapshot(snapshot_path, signature)
+    if df is not None:
+        return df
+
+    df = parse_fn(source_path)
+    logger.info(f"Snapshot {snapshot_path} dibangun ulang dari {source_path}")
+
+    try:
+        write_snapshot(df, snapshot_path, signature)
+    except Exception as e:
+        # Snapshot hanya akselerasi; kegagalan menulis tidak boleh menggagalkan load
+        logger.warning(f"Gagal menulis snapshot {snapshot_path}: {str(e)}")
+
+    return df
+
+
+def _to_sql_value(value: Any) -> Any:
+    """Konversi nilai pandas/numpy ke tipe yang diterima sqlite3"""
+    if value is None:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+class DBDCaseStore:
+    """
+    Penyimpanan data kasus DBD di SQLite dengan primary key `id`.
+
+    CSV hanya dipakai sebagai seed saat tabel masih kosong (atau lewat
+    import ulang eksplisit dari admin); setelah itu database adalah sumber
+    data dan semua perubahan CRUD diterapkan per baris sehingga waktu
+    simpan tidak bergantung pada ukuran dataset.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Inisialisasi store dan buat schema jika belum ada
+
+        Args:
+            db_path: Path file database SQLite
+        """
+        self.db_path = db_path
+        self._warned_signature: Optional[str] = None
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Koneksi per operasi: aman dipakai dari thread session Streamlit mana pun
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_schema(self) -> None:
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS kasus (
+                    id INTEGER PRIMARY KEY,
+                    kode_provinsi INTEGER,
+                    nama_provinsi TEXT,
+                    kode_kabupaten_kota TEXT,
+                    nama_kabupaten_kota TEXT,
+                    jumlah_kasus INTEGER,
+                    satuan TEXT,
+                    tahun INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_kasus_wilayah_tahun
+                    ON kasus (kode_kabupaten_kota, tahun);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    @staticmethod
+    def _get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def _bump_revision(self, conn: sqlite3.Connection) -> None:
+        revision = int(self._get_meta(conn, 'revision') or 0) + 1
+        self._set_meta(conn, 'revision', str(revision))
+
+    def revision(self) -> int:
+        """
+        Nomor revisi data (naik setiap transaksi perubahan)
+
+        Returns:
+            Nomor revisi
+        """
+        with self._connect() as conn:
+            return int(self._get_meta(conn, 'revision') or 0)
+
+    def sync_from_csv(self, csv_path: str, force: bool = False) -> bool:
+        """
+        Seed database dari CSV jika tabel kasus masih kosong
+
+        CSV yang berubah (mtime/ukuran) tidak pernah di-import ulang secara
+        otomatis: database menyimpan perubahan CRUD admin yang tidak ditulis
+        balik ke CSV, sehingga import ulang akan menghapusnya. Import ulang
+        hanya terjadi lewat force=True (aksi admin eksplisit).
+
+        Args:
+            csv_path: Path file CSV sumber
+            force: Ganti seluruh isi database dengan isi CSV
+
+        Returns:
+            True jika database di-import (ulang)
+        """
+        if not os.path.exists(csv_path):
+            return False
+
+        signature = json.dumps(file_signature(csv_path), sort_keys=True)
+        with self._connect() as conn:
+            if not force and self._get_meta(conn, 'seed_signature') == signature:
+                return False
+            has_rows = conn.execute("SELECT EXISTS (SELECT 1 FROM kasus)").fetchone()[0]
+            revision = int(self._get_meta(conn, 'revision') or 0)
+            seed_revision = int(self._get_meta(conn, 'seed_revision') or 0)
+
+        if has_rows and not force:
+            if self._warned_signature != signature:
+                self._warned_signature = signature
+                if revision > seed_revision:
+                    logger.warning(
+                        f"{csv_path} berubah sejak seed, tetapi database {self.db_path} berisi "
+                        f"perubahan admin (revisi {revision} > seed {seed_revision}); CSV tidak "
+                        f"di-import ulang. Gunakan import ulang dari halaman admin untuk menimpa."
+                    )
+                else:
+                    logger.info(f"{csv_path} berubah sejak seed; database tidak di-import ulang otomatis")
+            return False
+
+        df = parse_case_csv(csv_path)
+        missing_columns = set(CASE_COLUMNS) - set(df.columns) - {'id'}
+        if missing_columns:
+            raise ValueError(f"Kolom berikut tidak ditemukan: {', '.join(missing_columns)}")
+
+        if 'id' not in df.columns:
+            df.insert(0, 'id', range(1, len(df) + 1))
+
+        records = [
+            tuple(_to_sql_value(value) for value in row)
+            for row in df[CASE_COLUMNS].itertuples(index=False, name=None)
+        ]
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM kasus")
+            conn.executemany(
+                f"INSERT INTO kasus ({', '.join(CASE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in CASE_COLUMNS)})",
+                records
+            )
+            self._set_meta(conn, 'seed_signature', signature)
+            self._bump_revision(conn)
+            self._set_meta(conn, 'seed_revision', self._get_meta(conn, 'revision'))
+
+        logger.info(f"Database {self.db_path} di-import ulang dari {csv_path}: {len(records)} baris")
+        return True
+
+    def read_frame(self, db_path: Optional[str] = None) -> pd.DataFrame:
+        """
+        Membaca seluruh tabel kasus
+
+        Args:
+            db_path: Diabaikan; ada agar bisa dipakai sebagai parse_fn load_table
+
+        Returns:
+            DataFrame pandas
+        """
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(CASE_COLUMNS)} FROM kasus ORDER BY id", conn
+            )
+        return apply_case_schema(df)
+
+    def snapshot_signature(self) -> Dict[str, int]:
+        """
+        Signature isi database untuk snapshot/mirror turunan (berubah setiap revisi)
+
+        Returns:
+            Dict revision + versi skema
+        """
+        return {'revision': self.revision(), 'schema': SNAPSHOT_SCHEMA_VERSION}
+
+    def load_frame(self) -> pd.DataFrame:
+        """
+        Membaca tabel kasus lewat snapshot kolumnar (dibangun ulang per revisi)
+
+        Returns:
+            DataFrame pandas
+        """
+        return load_table(self.db_path, self.read_frame, signature=self.snapshot_signature())
+
+    def apply_changes(
+        self,
+        upserts: Iterable[Dict[str, Any]],
+        deleted_ids: Iterable[Any] = ()
+    ) -> Tuple[int, int]:
+        """
+        Menerapkan UPSERT dan DELETE per baris dalam satu transaksi
+
+        Args:
+            upserts: Baris yang diubah/ditambah (id None = baris baru)
+            deleted_ids: Daftar id yang dihapus
+
+        Returns:
+            Tuple (jumlah baris di-upsert, jumlah baris dihapus)
+        """
+        columns = [col for col in CASE_COLUMNS if col != 'id']
+        upsert_sql = (
+            f"INSERT INTO kasus ({', '.join(CASE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in CASE_COLUMNS)}) "
+            f"ON CONFLICT(id) DO UPDATE SET "
+            + ", ".join(f"{col} = excluded.{col}" for col in columns)
+        )
+
+        kode_index = CASE_COLUMNS.index('kode_kabupaten_kota')
+        rows = []
+        for record in upserts:
+            values = [_to_sql_value(record.get(col)) for col in CASE_COLUMNS]
+            if values[kode_index] is not None:
+                values[kode_index] = str(values[kode_index])
+            rows.append(tuple(values))
+
+        ids = [(int(_to_sql_value(row_id)),) for row_id in deleted_ids
+               if _to_sql_value(row_id) is not None]
+
+        if not rows and not ids:
+            return 0, 0
+
+        with self._connect() as conn:
+            if rows:
+                conn.executemany(upsert_sql, rows)
+            if ids:
+                conn.executemany("DELETE FROM kasus WHERE id = ?", ids)
+            self._bump_revision(conn)
+
+        return len(rows), len(ids)
+
+
+_stores: Dict[str, DBDCaseStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_case_store(db_path: str) -> DBDCaseStore:
+    """
+    Mendapatkan instance DBDCaseStore (satu per path database per proses)
+
+    Args:
+        db_path: Path file database SQLite
+
+    Returns:
+        DBDCaseStore
+    """
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = DBDCaseStore(db_path)
+        return _stores[key]
+
+
+def editor_changes_to_records(
+    df_display: pd.DataFrame,
+    editor_state: Dict,
+    defaults: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """
+    Mengubah state st.data_editor (edited/added/deleted rows) menjadi
+    record UPSERT dan daftar id yang dihapus
+
+    Args:
+        df_display: DataFrame yang ditampilkan di data_editor
+        editor_state: st.session_state[<key data_editor>]
+        defaults: Nilai default untuk kolom kosong pada baris baru
+
+    Returns:
+        Tuple (upsert_records, deleted_ids)
+    """
+    defaults = defaults or {}
+    upserts = []
+
+    for row_index, changes in editor_state.get("edited_rows", {}).items():
+        row_index = int(row_index)
+        if row_index >= len(df_display):
+            continue
+        record = df_display.iloc[row_index].to_dict()
+        record.update(changes)
+        upserts.append(record)
+
+    for new_row in editor_state.get("added_rows", []):
+        record = {col: new_row.get(col) for col in CASE_COLUMNS}
+        for col, value in defaults.items():
+            if _to_sql_value(record.get(col)) is None:
+                record[col] = value
+        upserts.append(record)
+
+    deleted_ids = [
+        df_display.iloc[int(row_index)].get('id')
+        for row_index in editor_state.get("deleted_rows", [])
+        if int(row_index) < len(df_display)
+    ]
+
+    return upserts, deleted_ids
@@ -0,0 +1,433 @@
+"""
+Utility Functions untuk Validasi Data DBD
+Engine validasi berbasis rule: semua pengecekan dihitung dalam satu pass
+vektor (mask dihitung sekali dan dipakai bersama) dan menghasilkan laporan
+terstruktur sekaligus frame bersih
+"""
+
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils_schema import CATEGORY_COLUMNS, INTEGER_COLUMNS, REQUIRED_COLUMNS, apply_case_schema
+
+logger = logging.getLogger(__name__)
+
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+# Natural key satu record kasus; kolom periode (jika ada) ikut menjadi key
+NATURAL_KEY = ['kode_kabupaten_kota', 'tahun']
+PERIOD_COLUMNS = ['bulan', 'minggu']
+
+# Kolom surrogate yang tidak ikut dibandingkan saat mencari duplikat
+SURROGATE_COLUMNS = ['id']
+
+
+class DuplicateReport:
+    """
+    Hasil deteksi duplikat berbasis natural key
+
+    Attributes:
+        key: Kolom natural key yang dipakai
+        exact: Mask baris yang isinya identik dengan baris sebelumnya
+            (tanpa kolom surrogate id)
+        conflicting: Mask baris dengan key yang sudah muncul tetapi isinya
+            berbeda (mis. jumlah_kasus beda untuk kab/kota + tahun yang sama)
+    """
+
+    def __init__(self, key: List[str], exact: np.ndarray, conflicting: np.ndarray):
+        self.key = key
+        self.exact = exact
+        self.conflicting = conflicting
+
+    @property
+    def exact_count(self) -> int:
+        return int(self.exact.sum())
+
+    @property
+    def conflicting_count(self) -> int:
+        return int(self.conflicting.sum())
+
+
+def natural_key(df: pd.DataFrame) -> List[str]:
+    """
+    Kolom natural key untuk DataFrame kasus
+
+    Args:
+        df: DataFrame kasus
+
+    Returns:
+        NATURAL_KEY ditambah kolom periode yang ada di df
+    """
+    return NATURAL_KEY + [col for col in PERIOD_COLUMNS if col in df.columns]
+
+
+def _confirmed_duplicated(df: pd.DataFrame, columns: List[str], hashes: pd.Series) -> np.ndarray:
+    # Hash sama belum tentu isi sama (collision): hanya baris kandidat yang
+    # hash-nya muncul lebih dari sekali dibandingkan ulang nilainya
+    result = np.zeros(len(df), dtype=bool)
+    candidates = np.flatnonzero(hashes.duplicated(keep=False).to_numpy())
+    if len(candidates):
+        result[candidates] = df[columns].iloc[candidates].duplicated().to_numpy()
+    return result
+
+
+def find_duplicates(df: pd.DataFrame, key: Optional[List[str]] = None) -> DuplicateReport:
+    """
+    Deteksi duplikat dalam satu pass hash O(n): setiap baris diringkas jadi
+    hash uint64 untuk key dan untuk isi baris, lalu duplikat dicari di atas
+    array integer tersebut (bukan perbandingan seluruh kolom per baris).
+    Kandidat dengan hash sama dikonfirmasi dengan perbandingan nilai, sehingga
+    collision hash tidak pernah membuat record berbeda dianggap duplikat
+
+    Args:
+        df: DataFrame kasus
+        key: Kolom key (default: natural_key(df))
+
+    Returns:
+        DuplicateReport
+    """
+    key = key or natural_key(df)
+    if df.empty or any(col not in df.columns for col in key):
+        empty = np.zeros(len(df), dtype=bool)
+        return DuplicateReport(key, empty, empty.copy())
+
+    value_columns = [col for col in df.columns if col not in SURROGATE_COLUMNS]
+    key_hash = pd.util.hash_pandas_object(df[key], index=False)
+    row_hash = pd.util.hash_pandas_object(df[value_columns], index=False)
+
+    exact = _confirmed_duplicated(df, value_columns, row_hash)
+    conflicting = _confirmed_duplicated(df, key, key_hash) & ~exact
+    return DuplicateReport(key, exact, conflicting)
+
+
+class ValidationContext:
+    """
+    Hasil perhitungan bersama untuk semua rule (dihitung sekali per run)
+
+    Attributes:
+        raw: DataFrame input apa adanya
+        typed: DataFrame setelah apply_case_schema
+        null: Matriks boolean nilai kosong kolom wajib (baris x kolom)
+        duplicates: DuplicateReport berbasis natural key
+        details: Nilai tambahan untuk format pesan rule
+    """
+
+    def __init__(self, raw: pd.DataFrame, typed: pd.DataFrame):
+        self.raw = raw
+        self.typed = typed
+        self.null = raw[REQUIRED_COLUMNS].isna().to_numpy()
+        # Duplikat dicek di frame bertipe: categorical/integer di-hash jauh
+        # lebih cepat dari string object
+        self.duplicates = find_duplicates(typed)
+        self.details: Dict[str, object] = {'key': ', '.join(self.duplicates.key)}
+
+    def null_mask(self, col: str) -> np.ndarray:
+        return self.null[:, REQUIRED_COLUMNS.index(col)]
+
+
+class ValidationRule:
+    """
+    Satu aturan validasi
+
+    Args:
+        rule_id: ID rule (muncul di laporan)
+        severity: 'error' (data tidak valid) atau 'warning'
+        message: Template pesan; {count} dan key di ValidationContext.details
+        check: Fungsi ValidationContext -> mask boolean baris yang melanggar
+        drop: True jika baris yang melanggar dibuang dari frame bersih
+    """
+
+    def __init__(
+        self,
+        rule_id: str,
+        severity: str,
+        message: str,
+        check: Callable[[ValidationContext], np.ndarray],
+        drop: bool = False
+    ):
+        self.rule_id = rule_id
+        self.severity = severity
+        self.message = message
+        self.check = check
+        self.drop = drop
+
+
+def _not_numeric(col: str) -> Callable[[ValidationContext], np.ndarray]:
+    def check(ctx: ValidationContext) -> np.ndarray:
+        return ctx.typed[col].isna().to_numpy() & ~ctx.null_mask(col)
+    return check
+
+
+def _null(col: str) -> Callable[[ValidationContext], np.ndarray]:
+    def check(ctx: ValidationContext) -> np.ndarray:
+        return ctx.null_mask(col)
+    return check
+
+
+def _tahun_out_of_range(ctx: ValidationContext) -> np.ndarray:
+    tahun = ctx.typed['tahun']
+    return ((tahun < 2000) | (tahun > 2100)).fillna(False).to_numpy(dtype=bool)
+
+
+def _negative_cases(ctx: ValidationContext) -> np.ndarray:
+    return (ctx.typed['jumlah_kasus'] < 0).fillna(False).to_numpy(dtype=bool)
+
+
+def _outlier_cases(ctx: ValidationContext) -> np.ndarray:
+    kasus = ctx.typed['jumlah_kasus']
+    threshold = kasus.quantile(0.99)
+    return (kasus > threshold * 2).fillna(False).to_numpy(dtype=bool)
+
+
+def _conflicting_duplicates(ctx: ValidationContext) -> np.ndarray:
+    # Contoh nilai key yang bentrok ikut ditampilkan di pesan
+    mask = ctx.duplicates.conflicting
+    samples = ctx.typed.loc[mask, ctx.duplicates.key].head(3)
+    ctx.details['conflict_samples'] = ', '.join(
+        '/'.join(str(value) for value in row) for row in samples.itertuples(index=False)
+    )
+    return mask
+
+
+def _satuan_variation(ctx: ValidationContext) -> np.ndarray:
+    satuan = ctx.typed['satuan']
+    counts = satuan.value_counts(sort=True)
+    counts = counts[counts > 0]
+    ctx.details['satuan'] = ', '.join(str(value) for value in counts.index)
+    if len(counts) <= 1:
+        return np.zeros(len(satuan), dtype=bool)
+    # Baris dengan satuan selain satuan mayoritas
+    return (satuan != counts.index[0]).fillna(False).to_numpy(dtype=bool)
+
+
+def default_rules() -> List[ValidationRule]:
+    """
+    Rule bawaan (setara validate_structure, validate_data_types,
+    validate_business_rules, dan clean_data di DBDDataParser)
+
+    Returns:
+        List ValidationRule
+    """
+    rules = [
+        ValidationRule('duplicate_rows', SEVERITY_ERROR, "Ditemukan {count} baris duplikat",
+                       lambda ctx: ctx.duplicates.exact, drop=True),
+        # Konflik key (mis. koreksi data dengan id baru) hanya dilaporkan,
+        # tidak menggagalkan load
+        ValidationRule('conflicting_duplicates', SEVERITY_WARNING,
+                       "Ditemukan {count} baris dengan key {key} sama tetapi isi berbeda (contoh: {conflict_samples})",
+                       _conflicting_duplicates),
+    ]
+    for col in REQUIRED_COLUMNS:
+        rules.append(ValidationRule(f'null_{col}', SEVERITY_ERROR,
+                                    f"Kolom {col} memiliki {{count}} nilai null", _null(col), drop=True))
+    for col in INTEGER_COLUMNS:
+        rules.append(ValidationRule(f'not_numeric_{col}', SEVERITY_ERROR,
+                                    f"Kolom {col} memiliki {{count}} nilai bukan angka", _not_numeric(col), drop=True))
+    rules.extend([
+        ValidationRule('tahun_range', SEVERITY_ERROR,
+                       "Ditemukan {count} baris dengan tahun di luar range 2000-2100", _tahun_out_of_range),
+        ValidationRule('negative_cases', SEVERITY_WARNING,
+                       "Ditemukan {count} baris dengan jumlah kasus negatif", _negative_cases, drop=True),
+        ValidationRule('outlier_cases', SEVERITY_WARNING,
+                       "Ditemukan {count} baris dengan jumlah kasus sangat tinggi (outlier)", _outlier_cases),
+        ValidationRule('satuan_variation', SEVERITY_WARNING,
+                       "Ditemukan variasi satuan: {satuan}", _satuan_variation),
+    ])
+    return rules
+
+
+class ValidationReport:
+    """
+    Laporan hasil validasi
+
+    Attributes:
+        issues: List dict {rule, severity, count, rows, message}; rows berisi
+            contoh index baris yang melanggar
+        total_rows: Jumlah baris input
+        clean_rows: Jumlah baris di frame bersih
+    """
+
+    def __init__(self, issues: List[Dict], total_rows: int, clean_rows: int):
+        self.issues = issues
+        self.total_rows = total_rows
+        self.clean_rows = clean_rows
+
+    @property
+    def is_valid(self) -> bool:
+        return not any(issue['severity'] == SEVERITY_ERROR for issue in self.issues)
+
+    @property
+    def errors(self) -> List[str]:
+        return [issue['message'] for issue in self.issues if issue['severity'] == SEVERITY_ERROR]
+
+    @property
+    def warnings(self) -> List[str]:
+        return [issue['message'] for issue in self.issues if issue['severity'] == SEVERITY_WARNING]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Laporan sebagai DataFrame (satu baris per rule yang dilanggar)"""
+        return pd.DataFrame(self.issues, columns=['rule', 'severity', 'count', 'rows', 'message'])
+
+
+class DBDValidationEngine:
+    """
+    Engine validasi satu pass.
+
+    Konversi tipe (apply_case_schema), mask null, dan mask duplikat dihitung
+    sekali; setiap rule hanya menghasilkan mask boolean di atasnya. Frame
+    bersih dibuat dengan satu boolean indexing dari gabungan mask rule drop.
+    """
+
+    def __init__(self, rules: Optional[List[ValidationRule]] = None, sample_size: int = 10):
+        """
+        Args:
+            rules: Daftar rule (default: default_rules())
+            sample_size: Jumlah contoh index baris per rule di laporan
+        """
+        self.rules = rules if rules is not None else default_rules()
+        self.sample_size = sample_size
+
+    def run(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, ValidationReport]:
+        """
+        Validasi dan bersihkan data
+
+        Args:
+            df: DataFrame kasus (mentah atau sudah bertipe)
+
+        Returns:
+            Tuple (frame bersih, ValidationReport)
+        """
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing_columns:
+            issue = self._issue('missing_columns', SEVERITY_ERROR,
+                                f"Kolom berikut tidak ditemukan: {', '.join(missing_columns)}",
+                                len(missing_columns), [])
+            return df, ValidationReport([issue], len(df), len(df))
+        if df.empty:
+            issue = self._issue('empty_data', SEVERITY_ERROR, "Data kosong", 0, [])
+            return df, ValidationReport([issue], 0, 0)
+
+        ctx = ValidationContext(df, apply_case_schema(df))
+        issues = []
+        drop = np.zeros(len(df), dtype=bool)
+
+        for rule in self.rules:
+            mask = rule.check(ctx)
+            count = int(mask.sum())
+            if rule.drop:
+                drop |= mask
+            if count == 0:
+                continue
+            rows = ctx.typed.index[mask][:self.sample_size].tolist()
+            message = rule.message.format(count=count, **ctx.details)
+            issues.append(self._issue(rule.rule_id, rule.severity, message, count, rows))
+
+        df_clean = ctx.typed[~drop] if drop.any() else ctx.typed
+        # Trim whitespace cukup dicek pada daftar kategori, bukan per baris
+        # (ctx.typed adalah salinan milik engine, aman diubah langsung)
+        for col in CATEGORY_COLUMNS:
+            categories = df_clean[col].cat.categories
+            if not categories.str.strip().equals(categories):
+                df_clean[col] = df_clean[col].map(str.strip).astype('category')
+
+        report = ValidationReport(issues, len(df), len(df_clean))
+        logger.info(
+            f"Validasi selesai: {report.total_rows} -> {report.clean_rows} baris, "
+            f"{len(report.errors)} error, {len(report.warnings)} warning"
+        )
+        return df_clean, report
+
+    @staticmethod
+    def _issue(rule_id: str, severity: str, message: str, count: int, rows: List) -> Dict:
+        return {'rule': rule_id, 'severity': severity, 'count': count, 'rows': rows, 'message': message}
+
+
+def _legacy_validate(df: pd.DataFrame) -> pd.DataFrame:
+    from utils_parsing import DBDDataParser
+
+    parser = DBDDataParser(file_path=None)
+    parser.df = df.copy()
+    parser.validate_structure()
+    parser.validate_data_types()
+    parser.validate_business_rules()
+    return parser.clean_data()
+
+
+def make_benchmark_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Data sintetis (string object, seperti hasil read_csv) untuk benchmark
+
+    Args:
+        n_rows: Jumlah baris
+        seed: Seed random
+
+    Returns:
+        DataFrame kasus
+    """
+    rng = np.random.default_rng(seed)
+    kabkot = np.array([f"KABUPATEN {i:03d}" for i in range(500)], dtype=object)
+    provinsi = np.array([f"PROVINSI {i:02d}" for i in range(38)], dtype=object)
+    region = rng.integers(0, len(kabkot), n_rows)
+    return pd.DataFrame({
+        'id': np.arange(n_rows),
+        'kode_provinsi': 11 + region % 38,
+        'nama_provinsi': provinsi[region % 38],
+        'kode_kabupaten_kota': 1101 + region,
+        'nama_kabupaten_kota': kabkot[region],
+        'jumlah_kasus': rng.integers(0, 5000, n_rows),
+        'satuan': np.full(n_rows, 'ORANG', dtype=object),
+        'tahun': rng.integers(2010, 2025, n_rows),
+    })
+
+
+def benchmark(n_rows: int = 1_000_000, repeat: int = 3) -> Dict[str, float]:
+    """
+    Bandingkan alur lama (validate_* + clean_data) dengan engine satu pass
+
+    Args:
+        n_rows: Jumlah baris data sintetis
+        repeat: Jumlah pengulangan (diambil waktu terbaik)
+
+    Returns:
+        Dict {legacy_s, engine_s, speedup}
+    """
+    df = make_benchmark_frame(n_rows)
+    engine = DBDValidationEngine()
+
+    def best_of(fn) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(df)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    legacy_s = best_of(_legacy_validate)
+    engine_s = best_of(engine.run)
+    return {'legacy_s': legacy_s, 'engine_s': engine_s, 'speedup': legacy_s / engine_s}
+
+
+# Contoh penggunaan
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    print("=" * 50)
+    print("CONTOH: Validasi data sample")
+    print("=" * 50)
+    df_clean, report = DBDValidationEngine().run(pd.read_csv("data_dbd_sample.csv"))
+    print(f"\nValid: {report.is_valid}, {report.total_rows} -> {report.clean_rows} baris")
+    print(report.to_frame())
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK: 1.000.000 baris")
+    print("=" * 50)
+    result = benchmark(1_000_000)
+    print(f"\nAlur lama (validate_* + clean_data): {result['legacy_s']:.3f}s")
+    print(f"Engine satu pass                    : {result['engine_s']:.3f}s")
+    print(f"Speedup                             : {result['speedup']:.1f}x")
@@ -9,8 +9,12 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+import os
+import logging
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -19,6 +23,196 @@ warnings.filterwarnings('ignore')
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
+logger = logging.getLogger(__name__)
+
+
+def _agg_figure(figsize: Tuple[int, int]) -> Figure:
+    """
+    Figure Matplotlib dengan canvas Agg sendiri, tanpa state global pyplot.
+    Aman dibangun di thread lain (mis. worker export) bersamaan dengan
+    script Streamlit, dan tidak perlu plt.close()
+
+    Args:
+        figsize: Ukuran figure
+
+    Returns:
+        Matplotlib Figure object
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+# ========== TREND BESAR (TRACE CAP + WEBGL) ==========
+
+# Batas tetap jumlah trace per grafik trend (None = hanya dibatasi
+# FIGURE_BYTE_BUDGET); wilayah lain digabung ke OTHERS_LABEL
+MAX_TREND_TRACES = int(os.environ["DBD_MAX_TREND_TRACES"]) if os.environ.get("DBD_MAX_TREND_TRACES") else None
+OTHERS_LABEL = "Lainnya"
+
+# Jumlah titik sumbu-x maksimum per trace (periode di atasnya digabung per bin)
+MAX_TREND_POINTS = 500
+
+# Di atas jumlah titik ini (sebelum cap) trend dirender dengan Scattergl
+WEBGL_POINT_THRESHOLD = 1_000
+
+# Batas ukuran JSON figure yang dikirim ke browser per rerun (byte)
+FIGURE_BYTE_BUDGET = int(os.environ.get("DBD_FIGURE_BYTE_BUDGET", 1_000_000))
+
+
+def cap_trend_series(
+    trend_data: pd.DataFrame,
+    x: str,
+    y: str,
+    color: str,
+    max_traces: int = MAX_TREND_TRACES,
+    others_label: str = OTHERS_LABEL
+) -> pd.DataFrame:
+    """
+    Pertahankan max_traces grup dengan total terbesar, sisanya dijumlah
+    per x menjadi satu grup others_label
+    
+    Args:
+        trend_data: DataFrame long-format (x, color, y)
+        x: Kolom sumbu-x (mis. 'tahun')
+        y: Kolom nilai
+        color: Kolom grup (satu trace per grup)
+        max_traces: Jumlah grup yang dipertahankan
+        others_label: Label grup gabungan
+        
+    Returns:
+        DataFrame long-format dengan paling banyak max_traces + 1 grup,
+        terurut dari total terbesar (others_label paling akhir)
+    """
+    totals = trend_data.groupby(color, observed=True)[y].sum().sort_values(ascending=False)
+    if len(totals) <= max_traces:
+        return trend_data
+    
+    keep = totals.index[:max_traces]
+    is_kept = trend_data[color].isin(keep)
+    others = (
+        trend_data.loc[~is_kept]
+        .groupby(x, observed=True)[y].sum()
+        .reset_index()
+        .assign(**{color: others_label})
+    )
+    kept = trend_data.loc[is_kept, [x, color, y]].astype({color: str})
+    
+    capped = pd.concat([kept, others[[x, color, y]]], ignore_index=True)
+    capped[color] = pd.Categorical(capped[color], categories=[str(name) for name in keep] + [others_label])
+    return capped.sort_values([color, x]).reset_index(drop=True)
+
+
+def decimate_trend_series(
+    trend_data: pd.DataFrame,
+    x: str,
+    y: str,
+    color: str,
+    max_points: int = MAX_TREND_POINTS
+) -> pd.DataFrame:
+    """
+    Gabungkan titik sumbu-x ke max_points bin (jumlah per bin, x = awal bin)
+    bila jumlah titik x unik melebihi max_points
+    
+    Args:
+        trend_data: DataFrame long-format (x, color, y)
+        x: Kolom sumbu-x numerik (mis. minggu berurutan)
+        y: Kolom nilai
+        color: Kolom grup
+        max_points: Jumlah titik maksimum per trace
+        
+    Returns:
+        DataFrame long-format dengan paling banyak max_points titik per grup
+    """
+    x_values = np.sort(trend_data[x].unique())
+    if len(x_values) <= max_points:
+        return trend_data
+    
+    bin_starts = x_values[np.linspace(0, len(x_values), max_points, endpoint=False).astype(int)]
+    binned = bin_starts[np.searchsorted(bin_starts, trend_data[x].to_numpy(), side='right') - 1]
+    return (
+        trend_data.assign(**{x: binned})
+        .groupby([x, color], observed=True, sort=False)[y].sum()
+        .reset_index()
+    )
+
+
+def figure_payload_bytes(fig: go.Figure) -> int:
+    """Ukuran JSON figure plotly (payload yang dikirim ke browser)"""
+    return len(fig.to_json())
+
+
+def build_trend_figure(
+    trend_data: pd.DataFrame,
+    x: str,
+    y: str,
+    color: str,
+    kind: str = 'bar',
+    title: str = "",
+    labels: Optional[Dict[str, str]] = None,
+    height: int = 500,
+    max_traces: Optional[int] = MAX_TREND_TRACES,
+    max_points: int = MAX_TREND_POINTS,
+    byte_budget: Optional[int] = FIGURE_BYTE_BUDGET,
+    render_mode: str = 'auto'
+) -> go.Figure:
+    """
+    Grafik trend per grup yang tetap ringan pada skala nasional.
+    
+    Sumbu-x di-decimate ke max_points; bila jumlah titik melebihi
+    WEBGL_POINT_THRESHOLD grafik dirender sebagai line Scattergl (bar tidak
+    punya varian WebGL). Semua grup ditampilkan selama JSON figure muat di
+    byte_budget (mis. 27 kab/kota satu provinsi tetap grouped bar); jika
+    tidak, grup di luar N teratas digabung ke "Lainnya" dan N dipotong
+    setengah sampai muat.
+    
+    Args:
+        trend_data: DataFrame long-format (x, color, y) hasil agregasi
+        x: Kolom sumbu-x
+        y: Kolom nilai
+        color: Kolom grup (satu trace per grup)
+        kind: 'bar' (grouped) atau 'line'
+        title: Judul grafik
+        labels: Label kolom untuk plotly express
+        height: Tinggi grafik
+        max_traces: Batas tetap jumlah trace sebelum "Lainnya" (None = dari byte_budget)
+        max_points: Jumlah titik sumbu-x maksimum per trace
+        byte_budget: Batas ukuran JSON figure (None = tanpa batas)
+        render_mode: 'auto', 'svg' atau 'webgl'
+        
+    Returns:
+        Plotly Figure object
+    """
+    n_groups = trend_data[color].nunique()
+    data = decimate_trend_series(trend_data, x, y, color, max_points)
+    # WebGL ditentukan dari jumlah titik data, bukan dari jumlah trace
+    use_webgl = render_mode == 'webgl' or (render_mode == 'auto' and len(data) > WEBGL_POINT_THRESHOLD)
+    
+    while True:
+        capped = max_traces is not None and n_groups > max_traces
+        plot_data = cap_trend_series(data, x, y, color, max_traces) if capped else data
+        
+        fig_title = f"{title} (Top {max_traces} + {OTHERS_LABEL})".strip() if capped else title
+        common = dict(x=x, y=y, color=color, title=fig_title, labels=labels or {}, height=height)
+        
+        if use_webgl:
+            fig = px.line(plot_data, markers=True, render_mode='webgl', **common)
+        elif kind == 'bar':
+            fig = px.bar(plot_data, barmode='group', **common)
+        else:
+            fig = px.line(plot_data, markers=True, **common)
+        
+        traces = min(max_traces or n_groups, n_groups)
+        if byte_budget is None or traces <= 1:
+            break
+        payload = figure_payload_bytes(fig)
+        if payload <= byte_budget:
+            break
+        logger.info(f"Figure trend {payload:,} byte > budget {byte_budget:,}; trace dikurangi dari {traces}")
+        max_traces = max(1, traces // 2)
+    
+    return fig
+
 
 class DBDVisualizer:
     """
@@ -40,7 +234,9 @@ class DBDVisualizer:
     def create_bar_trend(
         self,
         provinces: Optional[List[str]] = None,
-        title: str = "Trend Kasus DBD per Tahun"
+        title: str = "Trend Kasus DBD per Tahun",
+        max_traces: int = MAX_TREND_TRACES,
+        render_mode: str = 'auto'
     ) -> go.Figure:
         """
         Membuat bar chart trend kasus per tahun
@@ -48,6 +244,8 @@ class DBDVisualizer:
         Args:
             provinces: List nama provinsi (None untuk semua)
             title: Judul grafik
+            max_traces: Jumlah provinsi maksimum sebelum digabung ke "Lainnya"
+            render_mode: 'auto', 'svg' atau 'webgl' (lihat build_trend_figure)
             
         Returns:
             Plotly Figure object
@@ -57,21 +255,23 @@ class DBDVisualizer:
         else:
             df_filtered = self.df
         
-        trend_data = df_filtered.groupby(['tahun', 'nama_provinsi'])['jumlah_kasus'].sum().reset_index()
+        trend_data = df_filtered.groupby(['tahun', 'nama_provinsi'], observed=True)['jumlah_kasus'].sum().reset_index()
         
-        fig = px.bar(
+        fig = build_trend_figure(
             trend_data,
             x='tahun',
             y='jumlah_kasus',
             color='nama_provinsi',
+            kind='bar',
             title=title,
             labels={
                 'jumlah_kasus': 'Jumlah Kasus',
                 'tahun': 'Tahun',
                 'nama_provinsi': 'Provinsi'
             },
-            barmode='group',
-            height=600
+            height=600,
+            max_traces=max_traces,
+            render_mode=render_mode
         )
         
         fig.update_layout(
@@ -92,7 +292,9 @@ class DBDVisualizer:
     def create_line_trend(
         self,
         groupby: str = 'nama_provinsi',
-        title: str = "Trend Line Kasus DBD"
+        title: str = "Trend Line Kasus DBD",
+        max_traces: int = MAX_TREND_TRACES,
+        render_mode: str = 'auto'
     ) -> go.Figure:
         """
         Membuat line chart trend kasus
@@ -100,24 +302,28 @@ class DBDVisualizer:
         Args:
             groupby: Kolom untuk grouping
             title: Judul grafik
+            max_traces: Jumlah grup maksimum sebelum digabung ke "Lainnya"
+            render_mode: 'auto', 'svg' atau 'webgl' (lihat build_trend_figure)
             
         Returns:
             Plotly Figure object
         """
-        trend_data = self.df.groupby(['tahun', groupby])['jumlah_kasus'].sum().reset_index()
+        trend_data = self.df.groupby(['tahun', groupby], observed=True)['jumlah_kasus'].sum().reset_index()
         
-        fig = px.line(
+        fig = build_trend_figure(
             trend_data,
             x='tahun',
             y='jumlah_kasus',
             color=groupby,
+            kind='line',
             title=title,
             labels={
                 'jumlah_kasus': 'Jumlah Kasus',
                 'tahun': 'Tahun'
             },
-            markers=True,
-            height=600
+            height=600,
+            max_traces=max_traces,
+            render_mode=render_mode
         )
         
         fig.update_traces(line=dict(width=3))
@@ -150,7 +356,7 @@ class DBDVisualizer:
             df_filtered = self.df[self.df['nama_provinsi'] == province]
             title = f"{title} - {province}"
         else:
-            top_kabkot = self.df.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(top_n).index
+            top_kabkot = self.df.groupby('nama_kabupaten_kota', observed=True)['jumlah_kasus'].sum().nlargest(top_n).index
             df_filtered = self.df[self.df['nama_kabupaten_kota'].isin(top_kabkot)]
             title = f"{title} (Top {top_n})"
         
@@ -159,7 +365,8 @@ class DBDVisualizer:
             index='nama_kabupaten_kota',
             columns='tahun',
             aggfunc='sum',
-            fill_value=0
+            fill_value=0,
+            observed=True
         )
         
         fig = px.imshow(
@@ -193,7 +400,7 @@ class DBDVisualizer:
         Returns:
             Plotly Figure object
         """
-        dist_data = self.df.groupby(groupby)['jumlah_kasus'].sum().nlargest(top_n).reset_index()
+        dist_data = self.df.groupby(groupby, observed=True)['jumlah_kasus'].sum().nlargest(top_n).reset_index()
         
         fig = px.pie(
             dist_data,
@@ -254,7 +461,7 @@ class DBDVisualizer:
             Plotly Figure object
         """
         treemap_data = self.df.groupby(
-            ['nama_provinsi', 'nama_kabupaten_kota']
+            ['nama_provinsi', 'nama_kabupaten_kota'], observed=True
         )['jumlah_kasus'].sum().reset_index()
         
         fig = px.treemap(
@@ -289,7 +496,7 @@ class DBDVisualizer:
         """
         df_filtered = self.df[self.df['tahun'].isin(years)]
         comparison_data = df_filtered.groupby(
-            ['nama_provinsi', 'tahun']
+            ['nama_provinsi', 'tahun'], observed=True
         )['jumlah_kasus'].sum().reset_index()
         
         fig = go.Figure()
@@ -321,7 +528,7 @@ class DBDVisualizer:
         self,
         figsize: Tuple[int, int] = (14, 8),
         save_path: Optional[str] = None
-    ) -> plt.Figure:
+    ) -> Figure:
         """
         Membuat trend chart dengan matplotlib
         
@@ -332,9 +539,10 @@ class DBDVisualizer:
         Returns:
             Matplotlib Figure object
         """
-        trend_data = self.df.groupby(['tahun', 'nama_provinsi'])['jumlah_kasus'].sum().reset_index()
+        trend_data = self.df.groupby(['tahun', 'nama_provinsi'], observed=True)['jumlah_kasus'].sum().reset_index()
         
-        fig, ax = plt.subplots(figsize=figsize)
+        fig = _agg_figure(figsize)
+        ax = fig.add_subplot()
         
         for province in trend_data['nama_provinsi'].unique():
             prov_data = trend_data[trend_data['nama_provinsi'] == province]
@@ -352,10 +560,10 @@ class DBDVisualizer:
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
         ax.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
         
         return fig
     
@@ -364,7 +572,7 @@ class DBDVisualizer:
         province: Optional[str] = None,
         figsize: Tuple[int, int] = (12, 10),
         save_path: Optional[str] = None
-    ) -> plt.Figure:
+    ) -> Figure:
         """
         Membuat heatmap dengan seaborn
         
@@ -379,7 +587,7 @@ class DBDVisualizer:
         if province:
             df_filtered = self.df[self.df['nama_provinsi'] == province]
         else:
-            top_kabkot = self.df.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(15).index
+            top_kabkot = self.df.groupby('nama_kabupaten_kota', observed=True)['jumlah_kasus'].sum().nlargest(15).index
             df_filtered = self.df[self.df['nama_kabupaten_kota'].isin(top_kabkot)]
         
         heatmap_data = df_filtered.pivot_table(
@@ -387,13 +595,16 @@ class DBDVisualizer:
             index='nama_kabupaten_kota',
             columns='tahun',
             aggfunc='sum',
-            fill_value=0
+            fill_value=0,
+            observed=True
         )
         
-        fig, ax = plt.subplots(figsize=figsize)
+        fig = _agg_figure(figsize)
+        ax = fig.add_subplot()
         
+        # jumlah_kasus bertipe nullable Int32 (utils_schema); seaborn butuh float
         sns.heatmap(
-            heatmap_data,
+            heatmap_data.astype(float),
             annot=True,
             fmt='.0f',
             cmap='Reds',
@@ -407,10 +618,10 @@ class DBDVisualizer:
         ax.set_xlabel('Tahun', fontsize=12, fontweight='bold')
         ax.set_ylabel('Kabupaten/Kota', fontsize=12, fontweight='bold')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
         
         return fig
     
@@ -418,7 +629,7 @@ class DBDVisualizer:
         self,
         figsize: Tuple[int, int] = (10, 8),
         save_path: Optional[str] = None
-    ) -> plt.Figure:
+    ) -> Figure:
         """
         Membuat correlation matrix
         
@@ -434,13 +645,15 @@ class DBDVisualizer:
             values='jumlah_kasus',
             index='nama_provinsi',
             columns='tahun',
-            aggfunc='sum'
+            aggfunc='sum',
+            observed=True
         )
         
         # Hitung correlation
         corr_matrix = pivot_data.corr()
         
-        fig, ax = plt.subplots(figsize=figsize)
+        fig = _agg_figure(figsize)
+        ax = fig.add_subplot()
         
         sns.heatmap(
             corr_matrix,
@@ -456,10 +669,10 @@ class DBDVisualizer:
         
         ax.set_title('Correlation Matrix Kasus DBD Antar Tahun', fontsize=14, fontweight='bold')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
         
         return fig
     
@@ -468,7 +681,7 @@ class DBDVisualizer:
         year: int,
         figsize: Tuple[int, int] = (16, 12),
         save_path: Optional[str] = None
-    ) -> plt.Figure:
+    ) -> Figure:
         """
         Membuat dashboard summary dengan multiple plots
         
@@ -482,13 +695,13 @@ class DBDVisualizer:
         """
         df_year = self.df[self.df['tahun'] == year]
         
-        fig = plt.figure(figsize=figsize)
+        fig = _agg_figure(figsize)
         gs = fig.add_gridspec(3, 2, hspace=0.3, wspace=0.3)
         
         # Plot 1: Top 10 Provinsi
         ax1 = fig.add_subplot(gs[0, 0])
-        top_provinces = df_year.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(10)
-        top_provinces.plot(kind='barh', ax=ax1, color='steelblue')
+        top_provinces = df_year.groupby('nama_provinsi', observed=True)['jumlah_kasus'].sum().nlargest(10)
+        ax1.barh(top_provinces.index.astype(str), top_provinces.to_numpy(dtype=float), color='steelblue')
         ax1.set_title(f'Top 10 Provinsi - {year}', fontweight='bold')
         ax1.set_xlabel('Jumlah Kasus')
         
@@ -501,8 +714,8 @@ class DBDVisualizer:
         
         # Plot 3: Top 10 Kabupaten/Kota
         ax3 = fig.add_subplot(gs[1, :])
-        top_kabkot = df_year.groupby('nama_kabupaten_kota')['jumlah_kasus'].sum().nlargest(10)
-        top_kabkot.plot(kind='bar', ax=ax3, color='lightgreen', edgecolor='black')
+        top_kabkot = df_year.groupby('nama_kabupaten_kota', observed=True)['jumlah_kasus'].sum().nlargest(10)
+        ax3.bar(top_kabkot.index.astype(str), top_kabkot.to_numpy(dtype=float), color='lightgreen', edgecolor='black')
         ax3.set_title(f'Top 10 Kabupaten/Kota - {year}', fontweight='bold')
         ax3.set_xlabel('Kabupaten/Kota')
         ax3.set_ylabel('Jumlah Kasus')
@@ -510,7 +723,7 @@ class DBDVisualizer:
         
         # Plot 4: Pie chart provinsi
         ax4 = fig.add_subplot(gs[2, :])
-        province_dist = df_year.groupby('nama_provinsi')['jumlah_kasus'].sum().nlargest(8)
+        province_dist = df_year.groupby('nama_provinsi', observed=True)['jumlah_kasus'].sum().nlargest(8)
         ax4.pie(
             province_dist.values,
             labels=province_dist.index,
@@ -522,7 +735,7 @@ class DBDVisualizer:
         fig.suptitle(f'Dashboard Summary DBD Indonesia - {year}', fontsize=16, fontweight='bold', y=0.995)
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
         
         return fig
 